@@ -0,0 +1,334 @@
+"""
+In-Process A2A Transport
+Dispatches A2A calls straight to a co-located agent's request handler, without sockets or JSON
+"""
+import functools
+import os
+from collections.abc import AsyncGenerator, Callable
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+from a2a.client import ClientConfig, ClientFactory
+from a2a.client.errors import A2AClientJSONRPCError
+from a2a.client.middleware import ClientCallContext, ClientCallInterceptor
+from a2a.client.transports.base import ClientTransport
+from a2a.client.transports.jsonrpc import JsonRpcTransport
+from a2a.types import (
+    AgentCard,
+    GetTaskPushNotificationConfigParams,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskPushNotificationConfig,
+    TaskQueryParams,
+    TaskStatusUpdateEvent,
+    TransportProtocol,
+)
+
+if TYPE_CHECKING:
+    # Server-side modules are only needed for in-process dispatch; importing
+    # them eagerly would add SQLAlchemy (via the a2a task stores) to every client
+    from a2a.server.context import ServerCallContext
+    from a2a.server.request_handlers import RequestHandler
+
+    from replica_set import ReplicaSet
+
+# Marker placed in ServerCallContext.state['transport'] for in-process calls
+IN_MEMORY_TRANSPORT = 'IN_MEMORY'
+
+# agent card URL -> (request handler, agent card) for agents served in this process
+_local_handlers: dict[str, tuple['RequestHandler', AgentCard]] = {}
+
+
+def in_memory_transport_enabled() -> bool:
+    """Whether A2A_TRANSPORT selects in-process dispatch for co-located agents."""
+    return os.getenv('A2A_TRANSPORT', 'jsonrpc').lower() in ('in_memory', 'inmemory', 'auto')
+
+
+def register_local_agent(agent_card: AgentCard, request_handler: 'RequestHandler'):
+    """Make an agent served by this process reachable through the in-memory transport."""
+    _local_handlers[agent_card.url.rstrip('/')] = (request_handler, agent_card)
+
+
+def get_local_agent(url: str) -> Optional[tuple['RequestHandler', AgentCard]]:
+    return _local_handlers.get(url.rstrip('/'))
+
+
+class InMemoryTransport(ClientTransport):
+    """ClientTransport that calls a DefaultRequestHandler in the same process.
+
+    Requests and results are deep-copied instead of serialized, so neither
+    side can mutate the other's objects, matching the isolation of a real
+    network hop. Server errors surface as A2AClientJSONRPCError, like the
+    JSON-RPC transport.
+    """
+
+    def __init__(self, request_handler: 'RequestHandler', agent_card: AgentCard,
+                 interceptors: Optional[list[ClientCallInterceptor]] = None):
+        self.request_handler = request_handler
+        self.agent_card = agent_card
+        self.interceptors = interceptors or []
+
+    def _server_context(self, context: Optional[ClientCallContext], extensions: Optional[list[str]]) -> 'ServerCallContext':
+        from a2a.server.context import ServerCallContext
+
+        headers = {}
+        if context:
+            headers = dict((context.state.get('http_kwargs') or {}).get('headers', {}))
+        return ServerCallContext(
+            state={'headers': headers, 'transport': IN_MEMORY_TRANSPORT},
+            requested_extensions=set(extensions or []),
+        )
+
+    async def _call(self, method, request, context, extensions):
+        from a2a.utils.errors import ServerError
+
+        try:
+            result = await method(request.model_copy(deep=True), self._server_context(context, extensions))
+        except ServerError as e:
+            raise A2AClientJSONRPCError(JSONRPCErrorResponse(error=e.error, id=None)) from e
+        return result.model_copy(deep=True) if result is not None else None
+
+    async def _stream(self, method, request, context, extensions):
+        from a2a.utils.errors import ServerError
+
+        try:
+            async for event in method(request.model_copy(deep=True), self._server_context(context, extensions)):
+                yield event.model_copy(deep=True)
+        except ServerError as e:
+            raise A2AClientJSONRPCError(JSONRPCErrorResponse(error=e.error, id=None)) from e
+
+    async def send_message(
+        self, request: MessageSendParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task | Message:
+        return await self._call(self.request_handler.on_message_send, request, context, extensions)
+
+    async def send_message_streaming(
+        self, request: MessageSendParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Message | Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self._stream(self.request_handler.on_message_send_stream, request, context, extensions):
+            yield event
+
+    async def get_task(
+        self, request: TaskQueryParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        return await self._call(self.request_handler.on_get_task, request, context, extensions)
+
+    async def cancel_task(
+        self, request: TaskIdParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        return await self._call(self.request_handler.on_cancel_task, request, context, extensions)
+
+    async def set_task_callback(
+        self, request: TaskPushNotificationConfig, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self._call(
+            self.request_handler.on_set_task_push_notification_config, request, context, extensions
+        )
+
+    async def get_task_callback(
+        self, request: GetTaskPushNotificationConfigParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self._call(
+            self.request_handler.on_get_task_push_notification_config, request, context, extensions
+        )
+
+    async def resubscribe(
+        self, request: TaskIdParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Task | Message | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self._stream(self.request_handler.on_resubscribe_to_task, request, context, extensions):
+            yield event
+
+    async def get_card(
+        self, *, context: ClientCallContext | None = None, extensions: list[str] | None = None,
+        signature_verifier: Callable[[AgentCard], None] | None = None,
+    ) -> AgentCard:
+        return self.agent_card.model_copy(deep=True)
+
+    async def close(self) -> None:
+        pass
+
+
+class BalancedTransport(ClientTransport):
+    """ClientTransport spreading calls over the replicas of an agent (see replica_set.py).
+
+    Each call goes to the replica the replica set picks, through that
+    replica's own JSON-RPC transport (in-memory when the replica is served by
+    this process and `in_memory` is set). The conversation and task of every
+    response are pinned to the replica that served it. A call that could not
+    connect is retried on another replica; other errors are raised as is.
+    """
+
+    def __init__(self, replicas: 'ReplicaSet', agent_card: AgentCard, config: ClientConfig,
+                 interceptors: Optional[list[ClientCallInterceptor]] = None, in_memory: bool = False):
+        self.replicas = replicas
+        self.agent_card = agent_card
+        self.httpx_client = config.httpx_client or httpx.AsyncClient()
+        self.extensions = config.extensions or None
+        self.interceptors = interceptors or []
+        self.in_memory = in_memory
+        self._transports: dict[str, ClientTransport] = {}
+
+    def _transport(self, url: str) -> ClientTransport:
+        transport = self._transports.get(url)
+        if transport is None:
+            local = get_local_agent(url) if self.in_memory else None
+            if local is not None:
+                transport = InMemoryTransport(local[0], local[1], self.interceptors)
+            else:
+                card = self.agent_card.model_copy(update={'url': url})
+                transport = JsonRpcTransport(self.httpx_client, card, url, self.interceptors, self.extensions)
+            self._transports[url] = transport
+        return transport
+
+    def _remember(self, replica, result):
+        task_id = result.id if isinstance(result, Task) else getattr(result, 'task_id', None)
+        self.replicas.remember(replica, getattr(result, 'context_id', None), task_id)
+
+    async def _call(self, method: str, request, context_id=None, task_id=None, **kwargs):
+        from replica_set import is_connect_failure
+
+        tried = []
+        while True:
+            replica = self.replicas.pick(context_id, task_id, exclude=tried)
+            try:
+                with self.replicas.track(replica):
+                    result = await getattr(self._transport(replica.url), method)(request, **kwargs)
+            except Exception as e:
+                tried.append(replica.url)
+                if is_connect_failure(e) and len(tried) < len(self.replicas.replicas):
+                    continue
+                raise
+            self._remember(replica, result)
+            return result
+
+    async def _stream(self, method: str, request, context_id=None, task_id=None, **kwargs):
+        from replica_set import is_connect_failure
+
+        tried = []
+        while True:
+            replica = self.replicas.pick(context_id, task_id, exclude=tried)
+            started = False
+            try:
+                with self.replicas.track(replica):
+                    async for event in getattr(self._transport(replica.url), method)(request, **kwargs):
+                        started = True
+                        self._remember(replica, event)
+                        yield event
+                return
+            except Exception as e:
+                tried.append(replica.url)
+                if not started and is_connect_failure(e) and len(tried) < len(self.replicas.replicas):
+                    continue
+                raise
+
+    async def send_message(
+        self, request: MessageSendParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task | Message:
+        return await self._call('send_message', request, request.message.context_id, request.message.task_id,
+                                context=context, extensions=extensions)
+
+    async def send_message_streaming(
+        self, request: MessageSendParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Message | Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self._stream('send_message_streaming', request, request.message.context_id,
+                                        request.message.task_id, context=context, extensions=extensions):
+            yield event
+
+    async def get_task(
+        self, request: TaskQueryParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        return await self._call('get_task', request, task_id=request.id, context=context, extensions=extensions)
+
+    async def cancel_task(
+        self, request: TaskIdParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        return await self._call('cancel_task', request, task_id=request.id, context=context, extensions=extensions)
+
+    async def set_task_callback(
+        self, request: TaskPushNotificationConfig, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self._call('set_task_callback', request, task_id=request.task_id,
+                                context=context, extensions=extensions)
+
+    async def get_task_callback(
+        self, request: GetTaskPushNotificationConfigParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self._call('get_task_callback', request, task_id=request.id,
+                                context=context, extensions=extensions)
+
+    async def resubscribe(
+        self, request: TaskIdParams, *, context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Task | Message | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self._stream('resubscribe', request, task_id=request.id,
+                                        context=context, extensions=extensions):
+            yield event
+
+    async def get_card(
+        self, *, context: ClientCallContext | None = None, extensions: list[str] | None = None,
+        signature_verifier: Callable[[AgentCard], None] | None = None,
+    ) -> AgentCard:
+        # Any replica serves the card; it is not a task result to pin
+        replica = self.replicas.pick()
+        with self.replicas.track(replica):
+            return await self._transport(replica.url).get_card(
+                context=context, extensions=extensions, signature_verifier=signature_verifier
+            )
+
+    async def close(self) -> None:
+        for transport in self._transports.values():
+            await transport.close()
+
+
+def _in_memory_producer(card: AgentCard, url: str, config: ClientConfig,
+                        interceptors: list[ClientCallInterceptor]) -> ClientTransport:
+    """Transport producer: in-memory for co-located agents, JSON-RPC otherwise."""
+    local = get_local_agent(url)
+    if local is not None:
+        return InMemoryTransport(local[0], local[1], interceptors)
+    return JsonRpcTransport(
+        config.httpx_client or httpx.AsyncClient(), card, url, interceptors, config.extensions or None
+    )
+
+
+def _balanced_producer(replicas: 'ReplicaSet', in_memory: bool, card: AgentCard, url: str,
+                       config: ClientConfig, interceptors: list[ClientCallInterceptor]) -> ClientTransport:
+    """Transport producer: the replica set's replicas instead of the card's single URL."""
+    return BalancedTransport(replicas, card, config, interceptors, in_memory)
+
+
+def create_client_factory(httpx_client: Optional[httpx.AsyncClient] = None,
+                          in_memory: Optional[bool] = None, replicas: Optional['ReplicaSet'] = None,
+                          **config_kwargs) -> ClientFactory:
+    """ClientFactory that routes JSON-RPC calls to co-located agents in memory.
+
+    `in_memory` defaults to the A2A_TRANSPORT environment variable.
+    Agents not served by this process are still reached over HTTP. With
+    `replicas`, JSON-RPC calls are balanced across the replica set's URLs.
+    """
+    config_kwargs.setdefault('supported_transports', [TransportProtocol.jsonrpc, TransportProtocol.http_json])
+    config = ClientConfig(httpx_client=httpx_client, **config_kwargs)
+    factory = ClientFactory(config)
+    in_memory = in_memory if in_memory is not None else in_memory_transport_enabled()
+    if replicas is not None:
+        factory.register(TransportProtocol.jsonrpc, functools.partial(_balanced_producer, replicas, in_memory))
+    elif in_memory:
+        factory.register(TransportProtocol.jsonrpc, _in_memory_producer)
+    return factory
@@ -0,0 +1,266 @@
+"""
+Admission Control
+Bounds in-flight A2A tasks per agent with a priority queue and fast 429 load shedding
+"""
+import asyncio
+import heapq
+import hmac
+import itertools
+import json
+import os
+import re
+import time
+from typing import Optional
+
+from profiling import admin_token
+
+# Priority classes (lower is served first)
+PRIORITY_PREMIUM = 0
+PRIORITY_STANDARD = 1
+PRIORITY_BASIC = 2
+
+TIER_PRIORITIES = {
+    'premium': PRIORITY_PREMIUM,
+    'vip': PRIORITY_PREMIUM,
+    'standard': PRIORITY_STANDARD,
+    'basic': PRIORITY_BASIC,
+    'free': PRIORITY_BASIC,
+}
+
+# Premium / VIP customers named in the agent prompts
+DEFAULT_PREMIUM_CUSTOMER_IDS = {1, 12345}
+
+# Upper bounds (seconds) of the queue-time histogram buckets
+QUEUE_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CUSTOMER_ID_PATTERN = re.compile(r'customer(?:\s+id)?\s*(?:is\s*)?#?(\d+)', re.IGNORECASE)
+
+
+def premium_customer_ids() -> set[int]:
+    """Premium customer IDs, overridable via PREMIUM_CUSTOMER_IDS (comma-separated)."""
+    raw = os.getenv('PREMIUM_CUSTOMER_IDS')
+    if not raw:
+        return set(DEFAULT_PREMIUM_CUSTOMER_IDS)
+    return {int(value) for value in raw.split(',') if value.strip()}
+
+
+def trusted_proxies() -> set[str]:
+    """Peer addresses allowed to set the tier and customer headers, from TRUSTED_PROXIES (comma-separated)."""
+    return {value.strip() for value in os.getenv('TRUSTED_PROXIES', '').split(',') if value.strip()}
+
+
+def is_trusted_caller(scope, headers: dict, proxies: set[str]) -> bool:
+    """Whether the request comes from a trusted proxy or carries the admin token."""
+    client = scope.get('client')
+    if client and client[0] in proxies:
+        return True
+    token = admin_token()
+    supplied = headers.get('x-admin-token') or headers.get('authorization', '').removeprefix('Bearer ')
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class AdmissionController:
+    """Limits concurrent requests and queues the overflow by priority.
+
+    Requests beyond `max_in_flight` wait in a bounded priority queue. When
+    the queue is full, a new request either displaces the lowest-priority
+    waiter (if it outranks it) or is rejected immediately. Waiters that are
+    not admitted within `queue_timeout` seconds are rejected, which keeps
+    latency bounded for admitted requests under overload.
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 64, queue_timeout: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._queue = []  # heap of [priority, seq, future]
+        self._seq = itertools.count()
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_queue_full': 0,
+            'rejected_timeout': 0,
+            'displaced': 0,
+            'peak_in_flight': 0,
+            'peak_queue': 0,
+        }
+        self.queue_time_buckets = [0] * (len(QUEUE_TIME_BUCKETS) + 1)
+        self.queue_time_sum = 0.0
+        self.service_time_avg = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _admit(self):
+        self.in_flight += 1
+        self.stats['admitted'] += 1
+        self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+
+    def _observe_queue_time(self, seconds: float):
+        self.queue_time_sum += seconds
+        for i, bound in enumerate(QUEUE_TIME_BUCKETS):
+            if seconds <= bound:
+                self.queue_time_buckets[i] += 1
+                return
+        self.queue_time_buckets[-1] += 1
+
+    async def acquire(self, priority: int = PRIORITY_STANDARD) -> bool:
+        """Wait for a slot. Returns False if the request should be shed."""
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self._admit()
+            self._observe_queue_time(0.0)
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            worst = max(self._queue, default=None)
+            if worst is None or worst[0] <= priority:
+                self.stats['rejected_queue_full'] += 1
+                return False
+            # Displace the lowest-priority, most recent waiter
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            worst[2].set_result(False)
+            self.stats['displaced'] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._queue, entry)
+        self.stats['queued'] += 1
+        self.stats['peak_queue'] = max(self.stats['peak_queue'], len(self._queue))
+
+        started = time.monotonic()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and future.result():
+                # Admitted just as the timeout fired: give the slot back
+                self.release()
+            elif entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            self.stats['rejected_timeout'] += 1
+            return False
+        except asyncio.CancelledError:
+            if future.done() and future.result():
+                self.release()
+            elif entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+        if admitted:
+            self._observe_queue_time(time.monotonic() - started)
+        return admitted
+
+    def release(self, service_time: Optional[float] = None):
+        """Free a slot and hand it to the highest-priority waiter."""
+        self.in_flight -= 1
+        if service_time is not None:
+            self.service_time_avg = 0.9 * self.service_time_avg + 0.1 * service_time if self.service_time_avg else service_time
+        while self._queue and self.in_flight < self.max_in_flight:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._admit()
+                future.set_result(True)
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait, estimated from the backlog."""
+        if not self.service_time_avg:
+            return 1
+        backlog = (self.queue_depth + self.in_flight) / max(self.max_in_flight, 1)
+        return max(1, int(backlog * self.service_time_avg + 0.5))
+
+    def snapshot(self) -> dict:
+        """Current state and counters, for metrics endpoints."""
+        cumulative, buckets = 0, {}
+        for bound, count in zip(QUEUE_TIME_BUCKETS + (float('inf'),), self.queue_time_buckets):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            **self.stats,
+            'queue_time_seconds': {'buckets': buckets, 'sum': self.queue_time_sum, 'count': cumulative},
+        }
+
+
+def classify_priority(headers: dict, body: bytes, premium_ids: set[int], trusted: bool = False) -> int:
+    """Priority from the tier or customer header of a trusted caller, else from customer IDs in the message.
+
+    Untrusted clients could otherwise jump the queue by claiming a tier, so
+    their headers are ignored and the tier is derived from `premium_ids`.
+    """
+    tier = headers.get('x-customer-tier') if trusted else None
+    if tier and tier.lower() in TIER_PRIORITIES:
+        return TIER_PRIORITIES[tier.lower()]
+    customer_id = headers.get('x-customer-id') if trusted else None
+    ids = [customer_id] if customer_id else CUSTOMER_ID_PATTERN.findall(body.decode('utf-8', 'ignore'))
+    if any(int(i) in premium_ids for i in ids if str(i).isdigit()):
+        return PRIORITY_PREMIUM
+    return PRIORITY_STANDARD
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to POST requests.
+
+    GET requests (agent card, health and stats endpoints) bypass admission.
+    `GET /admission` returns the controller snapshot as JSON. Tier and
+    customer headers only count from `proxies` or with the admin token.
+    """
+
+    def __init__(self, app, controller: AdmissionController, premium_ids: Optional[set[int]] = None,
+                 proxies: Optional[set[str]] = None):
+        self.app = app
+        self.controller = controller
+        self.premium_ids = premium_ids if premium_ids is not None else premium_customer_ids()
+        self.proxies = proxies if proxies is not None else trusted_proxies()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self.controller.max_in_flight <= 0:
+            return await self.app(scope, receive, send)
+        if scope['method'] == 'GET' and scope['path'] == '/admission':
+            return await self._send_json(send, 200, self.controller.snapshot())
+        if scope['method'] != 'POST':
+            return await self.app(scope, receive, send)
+
+        # Buffer the (small) JSON-RPC body so it can be classified and replayed
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        priority = classify_priority(headers, body, self.premium_ids,
+                                     trusted=is_trusted_caller(scope, headers, self.proxies))
+        if not await self.controller.acquire(priority):
+            return await self._send_json(
+                send, 429, {'error': 'Server overloaded, retry later'},
+                extra_headers=[(b'retry-after', str(self.controller.retry_after()).encode())],
+            )
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, replay_receive, send)
+        finally:
+            self.controller.release(time.monotonic() - started)
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: dict, extra_headers: Optional[list] = None):
+        body = json.dumps(payload).encode()
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers + (extra_headers or [])})
+        await send({'type': 'http.response.body', 'body': body})
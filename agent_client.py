@@ -2,11 +2,30 @@
 Agent Client Helper
 Simplifies calling A2A agents with multi-turn conversation support
 """
+import asyncio
+import contextlib
 import httpx
-from typing import Optional, Dict, Any
-from a2a.client import ClientConfig, ClientFactory, create_text_message_object
-from a2a.types import TransportProtocol
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List
+from a2a.client import create_text_message_object
+from a2a.client.errors import A2AClientJSONRPCError
+from a2a.types import (
+    MessageSendParams,
+    SendMessageResponse,
+    Task,
+    TaskIdParams,
+    TaskQueryParams,
+    TaskState,
+    TransportProtocol,
+)
 from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+from a2a_transport import create_client_factory, get_local_agent, in_memory_transport_enabled
+from metrics import record_cache_lookup
+from prefetch import CUSTOMER_ID_METADATA_KEY
+from replica_set import replica_set_for_url
+from report_jobs import REPORT_JOB_METADATA_KEY, report_rows
+from tracing import span, trace_metadata
+
+TERMINAL_TASK_STATES = (TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected)
 
 
 class A2ASimpleClient:
@@ -15,57 +34,85 @@ class A2ASimpleClient:
     def __init__(self, default_timeout: float = 240.0):
         self._agent_info_cache: dict[str, dict | None] = {}  # Cache for agent metadata
         self.default_timeout = default_timeout
-    
-    async def create_task(self, agent_url: str, message: str) -> str:
-        """Send a message following the official A2A SDK pattern."""
-        # Configure httpx client with timeout
-        timeout_config = httpx.Timeout(
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
             timeout=self.default_timeout,
             connect=10.0,
             read=self.default_timeout,
             write=10.0,
             pool=5.0,
         )
-        
-        async with httpx.AsyncClient(timeout=timeout_config) as httpx_client:
-            # Check if we have cached agent card data
-            if (
-                agent_url in self._agent_info_cache
-                and self._agent_info_cache[agent_url] is not None
-            ):
-                agent_card_data = self._agent_info_cache[agent_url]
-            else:
-                # Fetch the agent card
-                agent_card_response = await httpx_client.get(
-                    f'{agent_url}{AGENT_CARD_WELL_KNOWN_PATH}'
-                )
-                agent_card_data = self._agent_info_cache[agent_url] = (
-                    agent_card_response.json()
-                )
-            
-            # Create AgentCard from data
-            from a2a.types import AgentCard
-            agent_card = AgentCard(**agent_card_data)
-            
-            # Create A2A client with the agent card
-            config = ClientConfig(
-                httpx_client=httpx_client,
-                supported_transports=[
-                    TransportProtocol.jsonrpc,
-                    TransportProtocol.http_json,
-                ],
-                use_client_preference=True,
-            )
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
+
+    async def _get_agent_card(self, httpx_client: httpx.AsyncClient, agent_url: str):
+        """Agent card for `agent_url`, fetched once and then served from the cache.
+
+        For a replicated agent the other replicas are tried when `agent_url` is down.
+        """
+        from a2a.types import AgentCard
+
+        cached = self._agent_info_cache.get(agent_url) is not None
+        record_cache_lookup('agent_card', cached)
+        if not cached:
+            replicas = replica_set_for_url(agent_url)
+            urls = [agent_url] + [url for url in (replicas.urls if replicas else []) if url != agent_url.rstrip('/')]
+            for url in urls:
+                try:
+                    agent_card_response = await httpx_client.get(f'{url}{AGENT_CARD_WELL_KNOWN_PATH}')
+                    break
+                except httpx.TransportError:
+                    if url == urls[-1]:
+                        raise
+            self._agent_info_cache[agent_url] = agent_card_response.json()
+        return AgentCard(**self._agent_info_cache[agent_url])
+    
+    async def _client(self, httpx_client: httpx.AsyncClient, agent_url: str, **config):
+        """A2A client for the agent (in-process when it is served by this process and A2A_TRANSPORT=in_memory,
+        balanced across its replicas when `agent_url` is one of several `<ROLE>_AGENT_URLS`)."""
+        agent_card = await self._get_agent_card(httpx_client, agent_url)
+        factory = create_client_factory(
+            httpx_client=httpx_client,
+            supported_transports=[
+                TransportProtocol.jsonrpc,
+                TransportProtocol.http_json,
+            ],
+            use_client_preference=True,
+            replicas=replica_set_for_url(agent_url),
+            **config,
+        )
+        return factory.create(agent_card)
+
+    async def create_task(
+        self,
+        agent_url: str,
+        message: str,
+        on_first_event: Optional[Callable[[], None]] = None,
+        context_id: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> str:
+        """Send a message following the official A2A SDK pattern.
+
+        `on_first_event` is called once when the first response event
+        arrives (used to measure time-to-first-byte). Messages sharing a
+        `context_id` land in the same ADK session on the agent. `metadata`
+        is sent as request metadata (e.g. the known customer ID).
+        """
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            client = await self._client(httpx_client, agent_url)
             
             # Create the message object
             message_obj = create_text_message_object(content=message)
+            message_obj.context_id = context_id
             
-            # Send the message and collect responses
+            # Send the message and collect responses; the trace context
+            # travels in the request metadata (W3C traceparent)
+            request_metadata = {**(metadata or {}), **trace_metadata()} or None
             responses = []
-            async for response in client.send_message(message_obj):
-                responses.append(response)
+            with span('a2a.client send_message', **{'a2a.url': agent_url}):
+                async for response in client.send_message(message_obj, request_metadata=request_metadata):
+                    if not responses and on_first_event:
+                        on_first_event()
+                    responses.append(response)
             
             # The response is a tuple - get the first element (Task object)
             if (
@@ -73,22 +120,142 @@ class A2ASimpleClient:
                 and isinstance(responses[0], tuple)
                 and len(responses[0]) > 0
             ):
-                task = responses[0][0]  # First element of the tuple
-                
-                # Extract text: task.artifacts[0].parts[0].root.text
-                try:
-                    return task.artifacts[0].parts[0].root.text
-                except (AttributeError, IndexError):
-                    return str(task)
+                return response_text(responses[0][0])
             
             return 'No response received'
 
+    async def submit_report(self, agent_url: str, report: str, args: Optional[dict] = None) -> Task:
+        """Start a background report job (see report_jobs.py); returns the `working` task at once."""
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            client = await self._client(httpx_client, agent_url, streaming=False, polling=True)
+            message_obj = create_text_message_object(content=f"Run report {report}")
+            request_metadata = {REPORT_JOB_METADATA_KEY: {'report': report, 'args': args or {}}, **trace_metadata()}
+            with span('a2a.client submit_report', **{'a2a.url': agent_url, 'report': report}):
+                async for response in client.send_message(message_obj, request_metadata=request_metadata):
+                    return response[0] if isinstance(response, tuple) else response
+        raise RuntimeError('No response received')
+
+    async def get_task(self, agent_url: str, task_id: str) -> Task:
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            client = await self._client(httpx_client, agent_url)
+            return await client.get_task(TaskQueryParams(id=task_id))
+
+    async def cancel_task(self, agent_url: str, task_id: str) -> Task:
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            client = await self._client(httpx_client, agent_url)
+            return await client.cancel_task(TaskIdParams(id=task_id))
+
+    async def watch_task(self, agent_url: str, task_id: str) -> AsyncIterator[Task]:
+        """Stream a running task (tasks/resubscribe), yielding it after every progress update.
+
+        A task that has already finished is yielded once as it is.
+        """
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            client = await self._client(httpx_client, agent_url)
+            task = await client.get_task(TaskQueryParams(id=task_id))
+            if task.status.state in TERMINAL_TASK_STATES:
+                yield task
+                return
+            async for task, _update in client.resubscribe(TaskIdParams(id=task_id)):
+                yield task
+
+    async def create_tasks(
+        self,
+        agent_url: str,
+        messages: List[str],
+        context_ids: Optional[List[Optional[str]]] = None,
+        max_batch: int = 20,
+    ) -> List[str | A2AClientJSONRPCError]:
+        """Send several independent messages to one agent in a single HTTP request.
+
+        The messages go out as one JSON-RPC batch of `message/send` calls
+        (split every `max_batch` messages, the server's MAX_BATCH) and run
+        concurrently on the agent. Results are in message order; a message
+        that failed yields its A2AClientJSONRPCError instead of a string.
+        Agents served by this process (A2A_TRANSPORT=in_memory) are called
+        directly instead.
+        """
+        context_ids = context_ids or [None] * len(messages)
+        async with httpx.AsyncClient(timeout=self._timeout()) as httpx_client:
+            agent_card = await self._get_agent_card(httpx_client, agent_url)
+            if in_memory_transport_enabled() and get_local_agent(agent_card.url):
+                return list(await asyncio.gather(*(
+                    self.create_task(agent_url, message, context_id=context_id)
+                    for message, context_id in zip(messages, context_ids)
+                )))
+
+            metadata = trace_metadata() or None
+            requests = []
+            for index, (message, context_id) in enumerate(zip(messages, context_ids)):
+                message_obj = create_text_message_object(content=message)
+                message_obj.context_id = context_id
+                params = MessageSendParams(message=message_obj, metadata=metadata)
+                requests.append({
+                    'jsonrpc': '2.0',
+                    'id': index,
+                    'method': 'message/send',
+                    'params': params.model_dump(mode='json', by_alias=True, exclude_none=True),
+                })
+
+            replicas = replica_set_for_url(agent_url)
+
+            async def send_batch(batch):
+                # A replicated agent gets each batch on the replica the balancer picks
+                tried = []
+                while True:
+                    replica = replicas.pick(exclude=tried) if replicas else None
+                    try:
+                        with span('a2a.client send_batch', **{'a2a.url': agent_url, 'a2a.batch_size': len(batch)}), \
+                                (replicas.track(replica) if replica else contextlib.nullcontext()):
+                            response = await httpx_client.post(replica.url if replica else agent_card.url, json=batch)
+                            response.raise_for_status()
+                        break
+                    except httpx.ConnectError:
+                        # The batch never reached the replica: send it to another one
+                        tried.append(replica.url if replica else None)
+                        if replica is None or len(tried) >= len(replicas.urls):
+                            raise
+                payload = response.json()
+                if isinstance(payload, dict):
+                    # The whole batch was rejected (e.g. larger than the server's MAX_BATCH)
+                    raise A2AClientJSONRPCError(SendMessageResponse.model_validate(payload).root)
+                return payload
+
+            # Batches beyond max_batch are split and sent concurrently
+            payloads = await asyncio.gather(*(
+                send_batch(requests[start:start + max_batch]) for start in range(0, len(requests), max_batch)
+            ))
+            by_id = {
+                item.get('id'): SendMessageResponse.model_validate(item).root
+                for payload in payloads for item in payload
+            }
+            results = []
+            for index in range(len(messages)):
+                item = by_id.get(index)
+                if item is None:
+                    results.append('No response received')
+                elif hasattr(item, 'error'):
+                    results.append(A2AClientJSONRPCError(item))
+                else:
+                    results.append(response_text(item.result))
+            return results
+
+
+def response_text(result) -> str:
+    """Text of a Task (first artifact) or Message (first part) returned by message/send."""
+    try:
+        parts = result.artifacts[0].parts if hasattr(result, 'artifacts') else result.parts
+        return parts[0].root.text
+    except (AttributeError, IndexError, TypeError):
+        return str(result)
+
 
 # Enhanced convenience function with context support
 async def call_agent(
     agent_url: str, 
     message: str,
-    context: Optional[Dict[str, Any]] = None
+    context: Optional[Dict[str, Any]] = None,
+    on_first_event: Optional[Callable[[], None]] = None,
 ) -> str:
     """
     Call an A2A agent with a message and optional conversation context.
@@ -99,15 +266,19 @@ async def call_agent(
         context: Optional conversation context including:
             - history: Previous conversation turns
             - customer_id: Known customer ID
-            - session_id: Session identifier
+            - session_id: A2A context ID; when set, the agent keeps the
+              conversation state and only the new message is sent
+        on_first_event: Optional callback fired when the first response
+            event arrives
     
     Returns:
         The agent's response as a string
     """
     # Build enhanced message with context embedded
     full_message = message
+    session_id = context.get('session_id') if context else None
     
-    if context:
+    if context and not session_id:
         context_parts = []
         
         # Add customer ID if known
@@ -131,6 +302,43 @@ async def call_agent(
         if context_parts:
             full_message = "\n".join(context_parts) + "\n\nCURRENT MESSAGE: " + message
     
+    # The known customer ID also travels as request metadata, so the agents
+    # can prefetch that customer's data before the model asks for it
+    metadata = None
+    if context and context.get('customer_id'):
+        metadata = {CUSTOMER_ID_METADATA_KEY: context['customer_id']}
+
     # Use the original client to send the enhanced message
     client = A2ASimpleClient()
-    return await client.create_task(agent_url, full_message)
\ No newline at end of file
+    return await client.create_task(
+        agent_url, full_message, on_first_event=on_first_event, context_id=session_id, metadata=metadata
+    )
+
+
+async def run_report(
+    agent_url: str,
+    report: str,
+    args: Optional[dict] = None,
+    on_progress: Optional[Callable[[Task], None]] = None,
+    poll_interval: float = 1.0,
+) -> List[dict]:
+    """Run a background report job to completion, polling its task, and return the rows.
+
+    `on_progress` is called with the task after every poll (its metadata
+    carries `progress`: scanned / total customers).
+    """
+    client = A2ASimpleClient()
+    task = await client.submit_report(agent_url, report, args)
+    while task.status.state not in TERMINAL_TASK_STATES:
+        if on_progress:
+            on_progress(task)
+        await asyncio.sleep(poll_interval)
+        task = await client.get_task(agent_url, task.id)
+    if task.status.state != TaskState.completed:
+        raise RuntimeError(f"Report {report} {task.status.state.value}: {response_text(task.status.message)}")
+    return report_rows(task)
+
+
+async def call_agent_batch(agent_url: str, messages: List[str]) -> List[str | A2AClientJSONRPCError]:
+    """Send independent single-turn messages to one agent in one JSON-RPC batch request."""
+    return await A2ASimpleClient().create_tasks(agent_url, messages)
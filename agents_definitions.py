@@ -1,260 +1,485 @@
 """
 Agent Definitions for Multi-Agent Customer Service System
-Defines individual agents and their configurations
+Declares each agent and its card; ADK agents and A2A cards are built on first access
 """
+import functools
 import os
-from dotenv import load_dotenv
-load_dotenv()
-
-from google.adk.agents import Agent, SequentialAgent
-from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
-from a2a.types import (
-    AgentCapabilities,
-    AgentCard,
-    AgentSkill,
-    TransportProtocol,
-)
-from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
-from mcp_tools_wrapper import create_mcp_tools
-
-# MCP Tools
-mcp_tools = create_mcp_tools()
+
+from service_config import AGENT_ROLES, agent_history_turns, agent_url
+
+DEFAULT_MODEL = 'gemini-2.0-flash-lite'
+
+# Stronger model the specialists escalate to (see `cascade` in each spec)
+ESCALATION_MODEL = 'gemini-2.0-flash'
 
 # ============================================================================
 # Agent 1: Customer Data Agent (Specialist)
 # ============================================================================
 
-customer_data_agent = Agent(
-    model='gemini-2.0-flash-lite',
-    name='customer_data_agent',
-    instruction="""
+CUSTOMER_DATA_AGENT = {
+    'name': 'customer_data_agent',
+    'instruction': """
     You are the Customer Data Agent. Your role is to access and manage customer database information via MCP tools.
-    
+
     Your responsibilities:
-    - Retrieve customer information by ID
+    - Retrieve customer information by ID (the customer profile tool returns the customer,
+      ticket counts and recent tickets in one call; use it instead of separate lookups)
+    - Find customers by email, phone or name (do not page through customer lists to identify someone)
     - List customers with optional status filtering
     - Update customer records
     - Get customer ticket history
     - Get customers with open tickets
-    
+
     Premium / VIP customers: IDs 1 and 12345. Whenever their data is requested,
     explicitly mention that they are premium customers so the Router can route accordingly.
-    
+
     You MUST use your MCP tools to access the database. Do not answer from your own knowledge.
     Always validate data before returning it.
-    
+
     When updating customer records, ensure the data is in valid JSON format.
     """,
-    tools=mcp_tools,
-)
-
-customer_data_agent_card = AgentCard(
-    name='Customer Data Agent',
-    url='http://localhost:10021',
-    description='Specialist agent for accessing and managing customer database information via MCP tools',
-    version='1.0',
-    capabilities=AgentCapabilities(streaming=True),
-    default_input_modes=['text/plain'],
-    default_output_modes=['text/plain', 'application/json'],
-    preferred_transport=TransportProtocol.jsonrpc,
-    skills=[
-        AgentSkill(
-            id='get_customer_info',
-            name='Get Customer Information',
-            description='Retrieves customer details by ID using customers.id field',
-            tags=['customer', 'data', 'retrieval', 'mcp'],
-            examples=[
-                'Get customer information for ID 1',
-                'Retrieve customer 12345',
-                'Show me customer details for ID 5',
-            ],
-        ),
-        AgentSkill(
-            id='list_customers',
-            name='List Customers',
-            description='Lists customers with optional status filtering using customers.status field',
-            tags=['customer', 'list', 'filter', 'mcp'],
-            examples=[
-                'List all active customers',
-                'Show me customers with disabled status',
-                'Get 10 customers',
-            ],
-        ),
-        AgentSkill(
-            id='update_customer',
-            name='Update Customer',
-            description='Updates customer records using customers fields',
-            tags=['customer', 'update', 'modify', 'mcp'],
-            examples=[
-                'Update email for customer 1',
-                'Change phone number for customer 123',
-            ],
-        ),
-        AgentSkill(
-            id='get_customer_history',
-            name='Get Customer History',
-            description='Retrieves ticket history for a customer using tickets.customer_id field',
-            tags=['customer', 'history', 'tickets', 'mcp'],
-            examples=[
-                'Show ticket history for customer 1',
-                'Get all tickets for customer 12345',
-            ],
-        ),
-        AgentSkill(
-            id='get_customers_with_open_tickets',
-            name='Get Customers with Open Tickets',
-            description='Finds customers who have open tickets, optionally filtered by status',
-            tags=['customer', 'tickets', 'query', 'mcp'],
-            examples=[
-                'Show active customers with open tickets',
-                'List customers who have unresolved tickets',
-            ],
-        ),
-    ],
-)
+    'mcp_tools': True,
+    # Lookups are mostly simple; escalate when the answer misses the customer asked about
+    'cascade': {
+        'tiers': [DEFAULT_MODEL, ESCALATION_MODEL],
+        'min_confidence': 0.6,
+        'required_fields': ['customer_id'],
+    },
+    # Bulk reports run as background A2A tasks (see report_jobs.py)
+    'report_jobs': True,
+    'card': {
+        'name': 'Customer Data Agent',
+        'description': 'Specialist agent for accessing and managing customer database information via MCP tools',
+        'output_modes': ['text/plain', 'application/json'],
+        'skills': [
+            {
+                'id': 'get_customer_info',
+                'name': 'Get Customer Information',
+                'description': 'Retrieves customer details by ID using customers.id field',
+                'tags': ['customer', 'data', 'retrieval', 'mcp'],
+                'examples': [
+                    'Get customer information for ID 1',
+                    'Retrieve customer 12345',
+                    'Show me customer details for ID 5',
+                ],
+            },
+            {
+                'id': 'get_customer_profile',
+                'name': 'Get Customer Profile',
+                'description': 'Returns customer details, ticket summary and recent tickets from one precomputed document',
+                'tags': ['customer', 'profile', 'tickets', 'mcp'],
+                'examples': [
+                    'Give me an overview of customer 5',
+                    'What is the status of customer 12345 and their tickets?',
+                ],
+            },
+            {
+                'id': 'find_customer',
+                'name': 'Find Customer',
+                'description': 'Finds customers by email, phone or (partial) name through indexes, best matches first',
+                'tags': ['customer', 'search', 'lookup', 'mcp'],
+                'examples': [
+                    'Find the customer with email alice@example.com',
+                    'Who is the customer with phone 555-0104?',
+                    'Look up customer Evan Wright',
+                ],
+            },
+            {
+                'id': 'list_customers',
+                'name': 'List Customers',
+                'description': 'Lists customers with optional status filtering using customers.status field',
+                'tags': ['customer', 'list', 'filter', 'mcp'],
+                'examples': [
+                    'List all active customers',
+                    'Show me customers with disabled status',
+                    'Get 10 customers',
+                ],
+            },
+            {
+                'id': 'update_customer',
+                'name': 'Update Customer',
+                'description': 'Updates customer records using customers fields',
+                'tags': ['customer', 'update', 'modify', 'mcp'],
+                'examples': [
+                    'Update email for customer 1',
+                    'Change phone number for customer 123',
+                ],
+            },
+            {
+                'id': 'get_customer_history',
+                'name': 'Get Customer History',
+                'description': 'Retrieves ticket history for a customer using tickets.customer_id field',
+                'tags': ['customer', 'history', 'tickets', 'mcp'],
+                'examples': [
+                    'Show ticket history for customer 1',
+                    'Get all tickets for customer 12345',
+                ],
+            },
+            {
+                'id': 'get_customers_with_open_tickets',
+                'name': 'Get Customers with Open Tickets',
+                'description': 'Finds customers who have open tickets, optionally filtered by status',
+                'tags': ['customer', 'tickets', 'query', 'mcp'],
+                'examples': [
+                    'Show active customers with open tickets',
+                    'List customers who have unresolved tickets',
+                ],
+            },
+            {
+                'id': 'report_job',
+                'name': 'Background Report',
+                'description': ('Runs a bulk report (customers_with_open_tickets, customers) as a background task '
+                                'when the request metadata carries report_job: {"report": ..., "args": {"status": ...}}; '
+                                'returns a working task at once, the rows are in its "report" artifact once done'),
+                'tags': ['customer', 'report', 'bulk', 'background'],
+                'examples': [
+                    'Report all active customers with open tickets',
+                ],
+            },
+        ],
+    },
+}
 
 # ============================================================================
 # Agent 2: Support Agent (Specialist)
 # ============================================================================
 
-support_agent = Agent(
-    model='gemini-2.0-flash-lite',
-    name='support_agent',
-    instruction="""
+SUPPORT_AGENT = {
+    'name': 'support_agent',
+    'instruction': """
     You are the Support Agent. Your role is to handle customer support queries and issues.
-    
+
     Your responsibilities:
     - Handle general customer support queries
     - Create support tickets for customer issues
     - Escalate complex issues when needed
     - Request customer context from Data Agent when needed
     - Provide solutions and recommendations
-    
-    You have access to customer lookup tools to find customer IDs when needed.
-    You can create tickets and check customer history.
-    
+
+    You have access to customer lookup tools to find customer IDs when needed: find a
+    customer by email, phone or name instead of listing customers.
+    You can create tickets and check customer history. To see what changed since you last
+    looked, use the ticket change feed and pass back the last sequence number it returned.
+    To decide which open tickets need attention first, rank the open tickets: the ranking
+    scores priority, age, premium status, repeat tickets and urgent keywords in one call.
+
     When a customer mentions they are "customer X" or provides identifying information,
-    use your lookup tools first, then create tickets or check history.
-    
+    use your lookup tools first (the customer profile covers details and recent tickets
+    in one call), then create tickets or check history.
+
     If you cannot proceed (e.g., need billing context), tell the Router exactly what information you require.
     For urgent issues (billing, refunds, critical problems), prioritize them appropriately and escalate if needed.
     """,
-    tools=mcp_tools,  # Support agent also needs customer lookup tools
-)
-
-support_agent_card = AgentCard(
-    name='Support Agent',
-    url='http://localhost:10022',
-    description='Specialist agent for handling customer support queries, ticket creation, and issue resolution',
-    version='1.0',
-    capabilities=AgentCapabilities(streaming=True),
-    default_input_modes=['text/plain'],
-    default_output_modes=['text/plain'],
-    preferred_transport=TransportProtocol.jsonrpc,
-    skills=[
-        AgentSkill(
-            id='create_ticket',
-            name='Create Support Ticket',
-            description='Creates a new support ticket using tickets fields',
-            tags=['support', 'ticket', 'create', 'mcp'],
-            examples=[
-                'Create a ticket for customer 1 about account upgrade',
-                'Open a high priority ticket for billing issue',
-            ],
-        ),
-        AgentSkill(
-            id='handle_support_query',
-            name='Handle Support Query',
-            description='Processes general customer support queries and provides solutions',
-            tags=['support', 'help', 'assistance'],
-            examples=[
-                'I need help with my account',
-                'How do I upgrade my subscription?',
-                'I have a billing question',
-            ],
-        ),
-        AgentSkill(
-            id='escalate_issue',
-            name='Escalate Issue',
-            description='Escalates complex or urgent issues appropriately',
-            tags=['support', 'escalation', 'urgent'],
-            examples=[
-                'I\'ve been charged twice, please refund immediately!',
-                'My account has been compromised',
-            ],
-        ),
-    ],
-)
+    'mcp_tools': True,  # Support agent also needs customer lookup tools
+    # Refunds and escalations are costly to get wrong: a higher confidence bar
+    'cascade': {
+        'tiers': [DEFAULT_MODEL, ESCALATION_MODEL],
+        'min_confidence': 0.8,
+        'required_fields': ['customer_id'],
+    },
+    'card': {
+        'name': 'Support Agent',
+        'description': 'Specialist agent for handling customer support queries, ticket creation, and issue resolution',
+        'output_modes': ['text/plain'],
+        'skills': [
+            {
+                'id': 'create_ticket',
+                'name': 'Create Support Ticket',
+                'description': 'Creates a new support ticket using tickets fields',
+                'tags': ['support', 'ticket', 'create', 'mcp'],
+                'examples': [
+                    'Create a ticket for customer 1 about account upgrade',
+                    'Open a high priority ticket for billing issue',
+                ],
+            },
+            {
+                'id': 'handle_support_query',
+                'name': 'Handle Support Query',
+                'description': 'Processes general customer support queries and provides solutions',
+                'tags': ['support', 'help', 'assistance'],
+                'examples': [
+                    'I need help with my account',
+                    'How do I upgrade my subscription?',
+                    'I have a billing question',
+                ],
+            },
+            {
+                'id': 'escalate_issue',
+                'name': 'Escalate Issue',
+                'description': 'Escalates complex or urgent issues appropriately',
+                'tags': ['support', 'escalation', 'urgent'],
+                'examples': [
+                    'I\'ve been charged twice, please refund immediately!',
+                    'My account has been compromised',
+                ],
+            },
+            {
+                'id': 'rank_open_tickets',
+                'name': 'Rank Open Tickets',
+                'description': ('Ranks all open tickets by escalation score (priority, age, premium customer, '
+                                'open tickets per customer, refund/charged twice/compromised keywords) and returns the top ones'),
+                'tags': ['support', 'tickets', 'escalation', 'triage', 'mcp'],
+                'examples': [
+                    'Which open tickets should we escalate first?',
+                    'Show the 5 most urgent open tickets',
+                ],
+            },
+        ],
+    },
+}
 
 # ============================================================================
 # Agent 3: Router Agent (Orchestrator)
 # ============================================================================
 
-# Create remote references to other agents
-remote_customer_data_agent = RemoteA2aAgent(
-    name='customer_data',
-    description='Specialist agent for accessing customer database information',
-    agent_card=f'http://localhost:10021{AGENT_CARD_WELL_KNOWN_PATH}',
-)
-
-remote_support_agent = RemoteA2aAgent(
-    name='support',
-    description='Specialist agent for handling customer support queries',
-    agent_card=f'http://localhost:10022{AGENT_CARD_WELL_KNOWN_PATH}',
-)
-
-# Router agent - uses SequentialAgent which automatically routes through sub-agents
-router_agent = SequentialAgent(
-    name='router_agent',
-    sub_agents=[remote_customer_data_agent, remote_support_agent],
-)
-
-router_agent_card = AgentCard(
-    name='Router Agent',
-    url='http://localhost:10020',
-    description='Orchestrator agent that receives queries, analyzes intent, and routes to appropriate specialist agents',
-    version='1.0',
-    capabilities=AgentCapabilities(streaming=True),
-    default_input_modes=['text/plain'],
-    default_output_modes=['text/plain'],
-    preferred_transport=TransportProtocol.jsonrpc,
-    skills=[
-        AgentSkill(
-            id='route_query',
-            name='Route Customer Query',
-            description='Analyzes query intent and routes to appropriate specialist agent',
-            tags=['routing', 'orchestration', 'coordination'],
-            examples=[
-                'Get customer information for ID 5',
-                'I\'m customer 1 and need help upgrading my account',
-                'Show me all active customers who have open tickets',
-            ],
-        ),
-        AgentSkill(
-            id='coordinate_agents',
-            name='Coordinate Multiple Agents',
-            description='Coordinates responses from multiple specialist agents for complex queries',
-            tags=['coordination', 'multi-agent', 'orchestration'],
-            examples=[
-                'Update my email and show my ticket history',
-                'I want to cancel but have billing issues',
-            ],
-        ),
-        AgentSkill(
-            id='analyze_intent',
-            name='Analyze Query Intent',
-            description='Analyzes customer queries to determine intent and required actions',
-            tags=['analysis', 'intent', 'routing'],
-            examples=[
-                'Determine if query needs data retrieval or support',
-                'Identify if multiple agents are needed',
-            ],
-        ),
+# Router agent - a SequentialAgent which automatically routes through remote sub-agents
+ROUTER_AGENT = {
+    'name': 'router_agent',
+    'sub_agents': [
+        # (remote agent name, specialist role, description)
+        ('customer_data', 'customer_data', 'Specialist agent for accessing customer database information'),
+        ('support', 'support', 'Specialist agent for handling customer support queries'),
     ],
-)
+    'card': {
+        'name': 'Router Agent',
+        'description': 'Orchestrator agent that receives queries, analyzes intent, and routes to appropriate specialist agents',
+        'output_modes': ['text/plain'],
+        'skills': [
+            {
+                'id': 'route_query',
+                'name': 'Route Customer Query',
+                'description': 'Analyzes query intent and routes to appropriate specialist agent',
+                'tags': ['routing', 'orchestration', 'coordination'],
+                'examples': [
+                    'Get customer information for ID 5',
+                    'I\'m customer 1 and need help upgrading my account',
+                    'Show me all active customers who have open tickets',
+                ],
+            },
+            {
+                'id': 'coordinate_agents',
+                'name': 'Coordinate Multiple Agents',
+                'description': 'Coordinates responses from multiple specialist agents for complex queries',
+                'tags': ['coordination', 'multi-agent', 'orchestration'],
+                'examples': [
+                    'Update my email and show my ticket history',
+                    'I want to cancel but have billing issues',
+                ],
+            },
+            {
+                'id': 'analyze_intent',
+                'name': 'Analyze Query Intent',
+                'description': 'Analyzes customer queries to determine intent and required actions',
+                'tags': ['analysis', 'intent', 'routing'],
+                'examples': [
+                    'Determine if query needs data retrieval or support',
+                    'Identify if multiple agents are needed',
+                ],
+            },
+        ],
+    },
+}
+
+# Definition for each role (see service_config.AGENT_ROLES)
+AGENT_SPECS = {
+    'customer_data': CUSTOMER_DATA_AGENT,
+    'support': SUPPORT_AGENT,
+    'router': ROUTER_AGENT,
+}
+
+# ============================================================================
+# Construction (on first access)
+# ============================================================================
+
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    """Load .env once, before the first agent or card is built."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def resolve_agent_model(agent_name: str, cascade: dict = None):
+    """Resolve the model for an agent from the environment.
+
+    `<AGENT_NAME>_MODEL` (e.g. SUPPORT_AGENT_MODEL) overrides the global
+    `AGENT_MODEL`. Names starting with `simulated` select the offline
+    SimulatedLlm backend (see simulated_llm.py) for load testing.
+
+    Without either, an agent with a `cascade` spec answers through a
+    ModelCascade (see model_cascade.py) over its tiers; `<AGENT_NAME>_CASCADE`
+    or `AGENT_CASCADE` (comma-separated models, cheapest first) replace the
+    tiers and take precedence over `AGENT_MODEL`. MODEL_CASCADE=0 turns it off.
+    """
+    tiers = os.getenv(f'{agent_name.upper()}_CASCADE') or os.getenv('AGENT_CASCADE')
+    model = os.getenv(f'{agent_name.upper()}_MODEL') or (None if tiers else os.getenv('AGENT_MODEL'))
+    cascade_enabled = os.getenv('MODEL_CASCADE', '1').lower() not in ('0', 'false', 'no')
+    if not model and cascade and cascade_enabled:
+        models = tiers.split(',') if tiers else cascade['tiers']
+        if len(models) > 1:
+            from model_cascade import build_cascade
+            return build_cascade(agent_name, [name.strip() for name in models],
+                                 **{key: cascade[key] for key in ('min_confidence', 'required_fields') if key in cascade})
+        model = models[0].strip()
+    model = model or DEFAULT_MODEL
+    if model.startswith('simulated'):
+        from simulated_llm import SimulatedLlm
+        return SimulatedLlm(model=model, agent_name=agent_name)
+    return model
+
+
+@functools.lru_cache(maxsize=None)
+def get_mcp_tools():
+    """MCP tools shared by the specialist agents."""
+    from mcp_tools_wrapper import create_mcp_tools
+    return create_mcp_tools()
+
+
+@functools.lru_cache(maxsize=None)
+def get_agent_card(role: str):
+    """A2A agent card for a role."""
+    from a2a.types import AgentCapabilities, AgentCard, AgentSkill, TransportProtocol
+
+    load_environment()
+    spec = AGENT_SPECS[role]
+    card = spec['card']
+    return AgentCard(
+        name=card['name'],
+        url=agent_url(role),
+        description=card['description'],
+        version='1.0',
+        capabilities=AgentCapabilities(streaming=True, push_notifications=bool(spec.get('report_jobs'))),
+        default_input_modes=['text/plain'],
+        default_output_modes=card['output_modes'],
+        preferred_transport=TransportProtocol.jsonrpc,
+        skills=[AgentSkill(**skill) for skill in card['skills']],
+    )
+
+
+def remote_agent_kwargs(agent_card, replicas=None):
+    """Card and client arguments for a RemoteA2aAgent pointing at a specialist.
+
+    With A2A_TRANSPORT=in_memory the router calls specialists served by the
+    same process directly (see a2a_transport.py) and uses their local cards
+    instead of fetching them over HTTP. With a replica set (several
+    `<ROLE>_AGENT_URLS`) calls are balanced across the replicas (see
+    replica_set.py), using the local card.
+    """
+    from a2a.types import TransportProtocol
+    from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+    from a2a_transport import create_client_factory, in_memory_transport_enabled
+
+    if in_memory_transport_enabled() or replicas is not None:
+        return {
+            'agent_card': agent_card,
+            'a2a_client_factory': create_client_factory(
+                streaming=False, polling=False, supported_transports=[TransportProtocol.jsonrpc], replicas=replicas
+            ),
+        }
+    return {'agent_card': f"{agent_card.url}{AGENT_CARD_WELL_KNOWN_PATH}"}
+
+
+def build_remote_agent(name: str, role: str, description: str, parent_name: str):
+    """RemoteA2aAgent reference to a specialist, called by `parent_name`."""
+    from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+    from metrics import make_hop_recorder, start_hop_timer
+    from prefetch import prefetch_metadata
+    from replica_set import get_replica_set
+    from tool_memo import absorb_remote_memo, memo_metadata
+    from tracing import remote_agent_trace_metadata
+
+    def request_metadata(ctx, message):
+        # Trace context, the customer ID detected upstream (the specialist
+        # prefetches it) and the turn's tool results so far
+        return {**remote_agent_trace_metadata(ctx, message), **prefetch_metadata(), **memo_metadata()}
+
+    return RemoteA2aAgent(
+        name=name,
+        description=description,
+        **remote_agent_kwargs(get_agent_card(role), get_replica_set(role)),
+        a2a_request_meta_provider=request_metadata,
+        before_agent_callback=start_hop_timer,
+        after_agent_callback=[make_hop_recorder(parent_name), absorb_remote_memo],
+    )
+
+
+def history_window(turns: int):
+    """before_model_callback keeping the last `turns` user turns of the session in the prompt.
+
+    With context IDs the session holds the whole conversation; like the
+    history clients embed, older turns are dropped so prompts stop growing.
+    Other agents' replayed turns ("For context:") and tool responses are not
+    turns, so a turn is cut together with its tool calls.
+    """
+    def trim(callback_context, llm_request):
+        starts = [
+            i for i, content in enumerate(llm_request.contents)
+            if content.role == 'user' and content.parts and content.parts[0].text
+            and content.parts[0].text != 'For context:'
+        ]
+        if len(starts) > turns:
+            llm_request.contents = llm_request.contents[starts[-turns]:]
+        return None
+
+    return trim
+
+
+@functools.lru_cache(maxsize=None)
+def get_agent(role: str):
+    """ADK agent for a role; the router only needs its specialists' cards, not their agents."""
+    from google.adk.agents import Agent, SequentialAgent
+    from metrics import record_model_usage
+
+    load_environment()
+    spec = AGENT_SPECS[role]
+    if 'sub_agents' in spec:
+        return SequentialAgent(
+            name=spec['name'],
+            sub_agents=[
+                build_remote_agent(name, specialist, description, spec['name'])
+                for name, specialist, description in spec['sub_agents']
+            ],
+        )
+    from model_cascade import ModelCascade, track_invocation
+
+    model = resolve_agent_model(spec['name'], spec.get('cascade'))
+    before_model = [track_invocation] if isinstance(model, ModelCascade) else []
+    if agent_history_turns(role) > 0:
+        before_model.append(history_window(agent_history_turns(role)))
+    return Agent(
+        model=model,
+        name=spec['name'],
+        instruction=spec['instruction'],
+        tools=get_mcp_tools() if spec.get('mcp_tools') else [],
+        before_model_callback=before_model or None,
+        after_model_callback=record_model_usage,
+    )
+
+
+# Module attributes kept for existing imports (e.g. `from agents_definitions import router_agent`)
+_LEGACY_NAMES = {
+    'customer_data_agent': lambda: get_agent('customer_data'),
+    'customer_data_agent_card': lambda: get_agent_card('customer_data'),
+    'support_agent': lambda: get_agent('support'),
+    'support_agent_card': lambda: get_agent_card('support'),
+    'router_agent': lambda: get_agent('router'),
+    'router_agent_card': lambda: get_agent_card('router'),
+    'remote_customer_data_agent': lambda: get_agent('router').sub_agents[0],
+    'remote_support_agent': lambda: get_agent('router').sub_agents[1],
+    'mcp_tools': get_mcp_tools,
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_NAMES:
+        return _LEGACY_NAMES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Export all agents and cards
 __all__ = [
+    'AGENT_ROLES',
+    'get_agent',
+    'get_agent_card',
     'customer_data_agent',
     'customer_data_agent_card',
     'support_agent',
@@ -262,4 +487,3 @@ __all__ = [
     'router_agent',
     'router_agent_card',
 ]
-
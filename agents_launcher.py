@@ -0,0 +1,179 @@
+"""
+Production Agent Launcher
+Runs each agent as its own group of worker processes and restarts crashed workers
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from service_config import AGENT_ROLES, agent_host, agent_port, agent_store_limits, agent_workers
+
+# Restart backoff for crashed workers (seconds)
+RESTART_BACKOFF_INITIAL = 1.0
+RESTART_BACKOFF_MAX = 30.0
+# A worker that stays up this long resets its backoff
+STABLE_UPTIME = 60.0
+# Sessions of agents with several workers, unless <ROLE>_AGENT_SESSION_DB is set
+SHARED_SESSION_DB = '{role}_agent_sessions.db'
+
+
+def event_loop_name() -> str:
+    """Use uvloop when it is installed, otherwise the stock asyncio loop."""
+    return 'uvloop' if importlib.util.find_spec('uvloop') else 'asyncio'
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """Create a listening TCP socket, optionally with SO_REUSEPORT."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(role: str, host: str, port: int, sock, log_level: str):
+    """Worker process entry point: serve one agent on a (shared or own) socket."""
+    import uvicorn
+    from agents_server import build_role_app
+    from tracing import setup_tracing
+
+    setup_tracing(f'{role}_agent')
+
+    app = build_role_app(role)
+
+    if sock is None:
+        sock = bind_socket(host, port, reuse_port=True)
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        log_level=log_level,
+        loop=event_loop_name(),
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class AgentSupervisor:
+    """Starts N workers per agent and keeps them running."""
+
+    def __init__(self, roles: list[str], workers: dict, socket_mode: str, log_level: str):
+        self.roles = roles
+        self.workers = workers
+        self.socket_mode = socket_mode
+        self.log_level = log_level
+        self.context = multiprocessing.get_context('spawn')
+        self.sockets = {}
+        self.processes = {}  # (role, index) -> Process
+        self.started_at = {}
+        self.backoff = {}
+        self.restart_at = {}
+        self.restarts = {role: 0 for role in roles}
+        self.stopping = False
+
+    def _spawn(self, role: str, index: int):
+        process = self.context.Process(
+            target=run_worker,
+            args=(role, agent_host(role), agent_port(role), self.sockets.get(role), self.log_level),
+            name=f'{role}-worker-{index}',
+            daemon=False,
+        )
+        process.start()
+        self.processes[(role, index)] = process
+        self.started_at[(role, index)] = time.monotonic()
+
+    def start(self):
+        for role in self.roles:
+            host, port = agent_host(role), agent_port(role)
+            if self.socket_mode == 'shared':
+                self.sockets[role] = bind_socket(host, port, reuse_port=False)
+            sessions = 'in-process'
+            if self.workers[role] > 1:
+                # The kernel spreads connections over the workers, so the turns of
+                # one conversation (context ID) must find its session in any of them
+                sessions = agent_store_limits(role)['session_db'] or SHARED_SESSION_DB.format(role=role)
+                os.environ[f'{role.upper()}_AGENT_SESSION_DB'] = sessions
+            for index in range(self.workers[role]):
+                self._spawn(role, index)
+            print(f"✅ {role} agent: {self.workers[role]} worker(s) on http://{host}:{port} "
+                  f"(loop={event_loop_name()}, socket={self.socket_mode}, sessions={sessions})")
+
+    def check_workers(self):
+        """Schedule and perform restarts for workers that have exited."""
+        now = time.monotonic()
+        for key, process in list(self.processes.items()):
+            if process.is_alive():
+                if now - self.started_at[key] > STABLE_UPTIME:
+                    self.backoff.pop(key, None)
+                continue
+            if key not in self.restart_at:
+                delay = self.backoff.get(key, RESTART_BACKOFF_INITIAL)
+                self.backoff[key] = min(delay * 2, RESTART_BACKOFF_MAX)
+                self.restart_at[key] = now + delay
+                print(f"⚠️  {process.name} exited with code {process.exitcode}; restarting in {delay:.0f}s")
+            elif now >= self.restart_at[key]:
+                del self.restart_at[key]
+                role, index = key
+                self.restarts[role] += 1
+                self._spawn(role, index)
+                print(f"🔄 {process.name} restarted (restarts for {role}: {self.restarts[role]})")
+
+    def stop(self, timeout: float = 10.0):
+        self.stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self.processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+        for sock in self.sockets.values():
+            sock.close()
+
+    def run_forever(self):
+        def request_stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.start()
+        print("\nPress Ctrl+C to stop all servers.\n")
+        try:
+            while not self.stopping:
+                self.check_workers()
+                time.sleep(0.5)
+        finally:
+            print("\n\nShutting down all servers...")
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--agents', nargs='+', choices=AGENT_ROLES, default=AGENT_ROLES,
+                        help='Agents to launch (default: all)')
+    parser.add_argument('--workers', type=int,
+                        help='Workers per agent (default: <ROLE>_AGENT_WORKERS / AGENT_WORKERS / 1)')
+    parser.add_argument('--socket-mode', choices=['reuseport', 'shared'],
+                        default='reuseport' if hasattr(socket, 'SO_REUSEPORT') else 'shared',
+                        help='reuseport: each worker binds with SO_REUSEPORT; '
+                             'shared: the supervisor binds once and workers inherit the socket')
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    workers = {role: args.workers or agent_workers(role) for role in args.agents}
+    supervisor = AgentSupervisor(args.agents, workers, args.socket_mode, args.log_level)
+    supervisor.run_forever()
+
+
+if __name__ == "__main__":
+    main()
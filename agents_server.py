@@ -2,32 +2,95 @@
 Agent Servers Runner
 Creates and runs independent A2A servers for each agent
 """
+import time
+# Measured before the heavy imports below, for the startup-time log
+PROCESS_STARTED = time.perf_counter()
+
 import asyncio
+from contextlib import asynccontextmanager
 import nest_asyncio
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from google.adk.a2a.executor.a2a_agent_executor import (
     A2aAgentExecutor,
     A2aAgentExecutorConfig,
 )
-from google.adk.artifacts import InMemoryArtifactService
-from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from agents_definitions import (
-    customer_data_agent,
-    customer_data_agent_card,
-    support_agent,
-    support_agent_card,
-    router_agent,
-    router_agent_card,
+from starlette.responses import JSONResponse
+from agents_definitions import AGENT_SPECS, get_agent, get_agent_card
+from a2a_transport import register_local_agent
+from admission_control import AdmissionController, AdmissionMiddleware
+from jsonrpc_batch import JsonRpcBatchMiddleware
+from metrics import MetricsMiddleware, register_snapshot_gauges
+from prefetch import prefetch_scope
+from profiling import add_profiling_routes
+from report_jobs import ReportJobRunner, create_report_request_handler, requested_report
+from tool_memo import MemoEventQueue, memo_scope, returns_memo
+from tracing import server_span, setup_tracing
+from bounded_stores import (
+    BoundedArtifactService,
+    BoundedMemoryService,
+    BoundedSessionService,
+    BoundedTaskStore,
+    SharedSessionService,
+    SqliteTaskSpillStore,
+    sweep_stores,
+)
+from service_config import (
+    AGENT_ROLES,
+    agent_admission_limits,
+    agent_host,
+    agent_http_options,
+    agent_port,
+    agent_report_limits,
+    agent_store_limits,
+    agent_warmup,
 )
+from response_compression import CompressionMiddleware
+from warmup import ReadinessState, add_health_routes, warmup_lifespan
 
 # Apply nest_asyncio for Jupyter/async compatibility
 nest_asyncio.apply()
 
+# Session/task/artifact/memory stores per agent name, for stats endpoints
+AGENT_STORES = {}
+
+def build_role_app(role):
+    """Build the agent app for a role (see service_config.py); agents are created on first use."""
+    return build_agent_app(get_agent(role), get_agent_card(role))
+
+class TracedA2aAgentExecutor(A2aAgentExecutor):
+    """A2aAgentExecutor that continues the caller's trace from the request metadata,
+    prefetches the customer the request is about (see prefetch.py) and shares
+    the turn's read-tool results with the caller (see tool_memo.py). With a
+    ReportJobRunner, requests asking for a report job skip the model and run
+    the report in the background (see report_jobs.py).
+    """
+
+    def __init__(self, agent_name: str, prefetch: bool = True, reports: ReportJobRunner = None, **kwargs):
+        super().__init__(**kwargs)
+        self.agent_name = agent_name
+        self.prefetch = prefetch
+        self.reports = reports
+
+    async def execute(self, context, event_queue):
+        with server_span(f'a2a.execute {self.agent_name}', context.metadata,
+                         **{'a2a.agent': self.agent_name, 'a2a.context_id': context.context_id or ''}):
+            report = requested_report(context.metadata) if self.reports else None
+            if report:
+                await self.reports.run(context, event_queue, report)
+                return
+            with memo_scope(context.metadata) as memo, \
+                    prefetch_scope(context.metadata, context.get_user_input(), load=self.prefetch):
+                if returns_memo(context.metadata):
+                    event_queue = MemoEventQueue(event_queue, memo)
+                await super().execute(context, event_queue)
+
+    async def cancel(self, context, event_queue):
+        if not (self.reports and await self.reports.cancel(context, event_queue)):
+            await super().cancel(context, event_queue)
+
 def create_agent_a2a_server(agent, agent_card):
     """Create an A2A server for any ADK agent.
 
@@ -38,34 +101,115 @@ def create_agent_a2a_server(agent, agent_card):
     Returns:
         A2AStarletteApplication instance
     """
+    role = agent.name.removesuffix('_agent')
+    limits = agent_store_limits(role)
+    mb = 1024 * 1024
+    stores = {
+        'sessions': SharedSessionService(limits['session_db'], limits['session_idle_ttl'])
+        if limits['session_db'] else BoundedSessionService(
+            limits['session_max_items'], int(limits['session_max_mb'] * mb), limits['session_idle_ttl']
+        ),
+        'tasks': BoundedTaskStore(
+            limits['task_max_items'], int(limits['task_max_mb'] * mb), limits['task_idle_ttl'],
+            spill_store=SqliteTaskSpillStore(limits['task_spill_db'], limits['task_spill_ttl']) if limits['task_spill_db'] else None,
+        ),
+        'artifacts': BoundedArtifactService().configure(
+            limits['artifact_max_items'], int(limits['artifact_max_mb'] * mb)
+        ),
+        'memory': BoundedMemoryService(limits['memory_max_items'], int(limits['memory_max_mb'] * mb)),
+    }
+    AGENT_STORES[agent.name] = stores
+
     runner = Runner(
         app_name=agent.name,
         agent=agent,
-        artifact_service=InMemoryArtifactService(),
-        session_service=InMemorySessionService(),
-        memory_service=InMemoryMemoryService(),
+        artifact_service=stores['artifacts'],
+        session_service=stores['sessions'],
+        memory_service=stores['memory'],
     )
 
     config = A2aAgentExecutorConfig()
-    executor = A2aAgentExecutor(runner=runner, config=config)
+    reports = None
+    if AGENT_SPECS[role].get('report_jobs'):
+        reports = ReportJobRunner(**agent_report_limits(role))
+        register_snapshot_gauges('report_jobs', ('agent',), (agent.name,), reports.snapshot)
+    # Only agents with tools read the prefetched data; the router just forwards the customer ID
+    executor = TracedA2aAgentExecutor(agent.name, prefetch=bool(getattr(agent, 'tools', None)),
+                                      reports=reports, runner=runner, config=config)
 
-    request_handler = DefaultRequestHandler(
-        agent_executor=executor,
-        task_store=InMemoryTaskStore(),
-    )
+    if reports:
+        # Report progress is also pushed to the webhook a client registers for the task
+        import httpx
+        from a2a.server.tasks import BasePushNotificationSender, InMemoryPushNotificationConfigStore
+
+        push_configs = InMemoryPushNotificationConfigStore()
+        request_handler = create_report_request_handler(
+            agent_executor=executor,
+            task_store=stores['tasks'],
+            push_config_store=push_configs,
+            push_sender=BasePushNotificationSender(httpx.AsyncClient(timeout=10.0), push_configs),
+        )
+    else:
+        request_handler = DefaultRequestHandler(
+            agent_executor=executor,
+            task_store=stores['tasks'],
+        )
+    register_local_agent(agent_card, request_handler)
 
     # Create A2A application
     return A2AStarletteApplication(
         agent_card=agent_card, http_handler=request_handler
     )
 
-async def run_agent_server(agent, agent_card, port):
-    """Run a single agent server."""
-    app = create_agent_a2a_server(agent, agent_card)
+def build_agent_app(agent, agent_card):
+    """Build the ASGI app for an agent, wrapped with admission control and metrics.
 
+    JSON-RPC batches are split in front of those layers, so every element is
+    admitted and measured on its own; responses are compressed last. The app
+    warms up in the background on startup; /readyz reports 200 once done.
+    """
+    role = agent.name.removesuffix('_agent')
+    state = ReadinessState(agent.name, PROCESS_STARTED)
+    warmup = warmup_lifespan(agent, state, lambda: app, **agent_warmup(role))
+    sweep_seconds = agent_store_limits(role)['sweep_seconds']
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Idle-TTL eviction also runs between writes
+        sweeper = asyncio.create_task(sweep_stores(AGENT_STORES[agent.name].values(), sweep_seconds)) \
+            if sweep_seconds > 0 else None
+        try:
+            async with warmup(app):
+                yield
+        finally:
+            if sweeper:
+                sweeper.cancel()
+
+    app = create_agent_a2a_server(agent, agent_card).build(lifespan=lifespan)
+    add_health_routes(app, state)
+    add_profiling_routes(app)
+    stores = AGENT_STORES[agent.name]
+
+    async def store_stats(request):
+        return JSONResponse({name: store.snapshot() for name, store in stores.items()})
+
+    app.add_route('/stores', store_stats, methods=['GET'])
+    controller = AdmissionController(**agent_admission_limits(role))
+    register_snapshot_gauges('admission', ('agent',), (agent.name,), controller.snapshot)
+    for name, store in stores.items():
+        register_snapshot_gauges('agent_store', ('agent', 'store'), (agent.name, name), store.snapshot)
+    app = MetricsMiddleware(AdmissionMiddleware(app, controller), agent.name)
+    options = agent_http_options(role)
+    app = JsonRpcBatchMiddleware(app, agent.name, max_batch=options['max_batch'])
+    if options['compression']:
+        app = CompressionMiddleware(app, agent.name, minimum_size=options['compression_min_bytes'])
+    return app
+
+async def run_agent_server(agent, agent_card, port, host='127.0.0.1'):
+    """Run a single agent server."""
     config = uvicorn.Config(
-        app.build(),
-        host='127.0.0.1',
+        build_agent_app(agent, agent_card),
+        host=host,
         port=port,
         log_level='info',
         loop='none',  # Important: let uvicorn use the current loop
@@ -75,37 +219,25 @@ async def run_agent_server(agent, agent_card, port):
     await server.serve()
 
 async def start_all_servers():
-    """Start all agent servers."""
+    """Start all agent servers in this process (see agents_launcher.py for multi-process)."""
     print("Starting A2A Agent Servers...")
+    if setup_tracing('agents_server'):
+        print("📈 Tracing enabled")
     
     # Store server tasks
     server_tasks = []
     
-    # Start Customer Data Agent (port 10021)
-    task1 = asyncio.create_task(
-        run_agent_server(customer_data_agent, customer_data_agent_card, 10021)
-    )
-    server_tasks.append(task1)
-    print(f"✅ Customer Data Agent starting on http://127.0.0.1:10021")
-    
-    # Start Support Agent (port 10022)
-    task2 = asyncio.create_task(
-        run_agent_server(support_agent, support_agent_card, 10022)
-    )
-    server_tasks.append(task2)
-    print(f"✅ Support Agent starting on http://127.0.0.1:10022")
-    
-    # Start Router Agent (port 10020)
-    task3 = asyncio.create_task(
-        run_agent_server(router_agent, router_agent_card, 10020)
-    )
-    server_tasks.append(task3)
-    print(f"✅ Router Agent starting on http://127.0.0.1:10020")
+    for role in AGENT_ROLES:
+        agent, agent_card = get_agent(role), get_agent_card(role)
+        host, port = agent_host(role), agent_port(role)
+        server_tasks.append(asyncio.create_task(
+            run_agent_server(agent, agent_card, port, host)
+        ))
+        print(f"✅ {agent_card.name} starting on http://{host}:{port}")
     
     print("\n🎉 All agent servers started!")
-    print("   - Router Agent: http://127.0.0.1:10020")
-    print("   - Customer Data Agent: http://127.0.0.1:10021")
-    print("   - Support Agent: http://127.0.0.1:10022")
+    for role in ('router', 'customer_data', 'support'):
+        print(f"   - {get_agent_card(role).name}: http://{agent_host(role)}:{agent_port(role)}")
     print("\nPress Ctrl+C to stop all servers.\n")
     
     # Wait for all servers
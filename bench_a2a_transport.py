@@ -0,0 +1,150 @@
+"""
+A2A Transport Benchmark
+Measures per-hop overhead of the in-memory, JSON-RPC and HTTP+JSON transports
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import uvicorn
+from a2a.client import ClientConfig, ClientFactory, create_text_message_object
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.apps.rest.fastapi_app import A2ARESTFastAPIApplication
+from a2a.server.events import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.types import AgentCapabilities, AgentCard, Part, TextPart, TransportProtocol
+from a2a.utils import new_task
+
+from a2a_transport import create_client_factory, register_local_agent
+from benchmark_utils import summarize
+
+TRANSPORTS = ['in_memory', 'jsonrpc', 'http_json']
+
+
+class EchoAgentExecutor(AgentExecutor):
+    """Completes each task immediately with a fixed-size artifact, isolating transport cost."""
+
+    def __init__(self, response_bytes: int):
+        self.response_text = 'x' * response_bytes
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        task = context.current_task or new_task(context.message)
+        if not context.current_task:
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
+        await updater.add_artifact([Part(root=TextPart(text=self.response_text))], name='response')
+        await updater.complete()
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        pass
+
+
+def echo_card(url: str, transport: str) -> AgentCard:
+    return AgentCard(
+        name='Echo Agent',
+        url=url,
+        description='Benchmark echo agent',
+        version='1.0',
+        capabilities=AgentCapabilities(streaming=True),
+        default_input_modes=['text/plain'],
+        default_output_modes=['text/plain'],
+        preferred_transport=transport,
+        skills=[],
+    )
+
+
+async def start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+async def run_transport(transport: str, args, httpx_client: httpx.AsyncClient) -> dict:
+    """Benchmark one transport; returns latency summary and throughput."""
+    port = args.base_port + TRANSPORTS.index(transport)
+    url = f'http://127.0.0.1:{port}'
+    handler = DefaultRequestHandler(
+        agent_executor=EchoAgentExecutor(args.response_bytes), task_store=InMemoryTaskStore()
+    )
+    server = None
+
+    if transport == 'in_memory':
+        card = echo_card(url, TransportProtocol.jsonrpc)
+        register_local_agent(card, handler)
+        factory = create_client_factory(httpx_client, in_memory=True, streaming=args.streaming)
+    elif transport == 'jsonrpc':
+        card = echo_card(url, TransportProtocol.jsonrpc)
+        server = await start_server(A2AStarletteApplication(agent_card=card, http_handler=handler).build(), port)
+        factory = ClientFactory(ClientConfig(httpx_client=httpx_client, streaming=args.streaming,
+                                             supported_transports=[TransportProtocol.jsonrpc]))
+    else:
+        card = echo_card(url, TransportProtocol.http_json)
+        server = await start_server(A2ARESTFastAPIApplication(agent_card=card, http_handler=handler).build(), port)
+        factory = ClientFactory(ClientConfig(httpx_client=httpx_client, streaming=args.streaming,
+                                             supported_transports=[TransportProtocol.http_json]))
+
+    client = factory.create(card)
+    message_text = 'y' * args.request_bytes
+
+    async def one_call() -> float:
+        started = time.perf_counter()
+        async for _ in client.send_message(create_text_message_object(content=message_text)):
+            pass
+        return time.perf_counter() - started
+
+    for _ in range(args.warmup):
+        await one_call()
+
+    latencies = []
+
+    async def worker():
+        for _ in range(args.iterations // args.concurrency):
+            latencies.append(await one_call())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    if server:
+        server.should_exit = True
+        await asyncio.sleep(0.2)
+
+    return {'latency': summarize(latencies), 'ops_per_sec': len(latencies) / elapsed}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transports', nargs='+', choices=TRANSPORTS, default=TRANSPORTS)
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--request-bytes', type=int, default=256)
+    parser.add_argument('--response-bytes', type=int, default=2048)
+    parser.add_argument('--streaming', action='store_true', help='Use message/stream instead of message/send')
+    parser.add_argument('--base-port', type=int, default=10120)
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    async with httpx.AsyncClient(timeout=30.0) as httpx_client:
+        for transport in args.transports:
+            results[transport] = await run_transport(transport, args, httpx_client)
+            stats = results[transport]['latency']
+            print(f"  {transport:10} p50={stats['p50'] * 1e6:9.1f}us p95={stats['p95'] * 1e6:9.1f}us "
+                  f"p99={stats['p99'] * 1e6:9.1f}us {results[transport]['ops_per_sec']:9.1f} calls/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
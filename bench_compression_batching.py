@@ -0,0 +1,168 @@
+"""
+Compression & Batching Benchmark
+Bytes on the wire and messages/sec of the customer data agent per response encoding and JSON-RPC batch size
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import uvicorn
+
+import mcp_service
+from agents_server import build_role_app
+from bench_mcp_tools import prepare_database
+from benchmark_utils import summarize
+from response_compression import available_encodings
+from service_config import agent_host, agent_port, agent_url
+
+# Queries whose tool results (and therefore task histories) are large
+DEFAULT_MESSAGES = [
+    "Show active customers with open tickets",
+    "List all active customers",
+    "Show ticket history for customer 7",
+    "Get customer information for ID 3",
+]
+
+
+class WireBytesCounter:
+    """Outermost ASGI middleware counting POST request and response body bytes as sent on the wire."""
+
+    def __init__(self, app):
+        self.app = app
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            return await self.app(scope, receive, send)
+        self.requests += 1
+
+        async def counting_receive():
+            message = await receive()
+            self.request_bytes += len(message.get('body', b''))
+            return message
+
+        async def counting_send(message):
+            if message['type'] == 'http.response.body':
+                self.response_bytes += len(message.get('body', b''))
+            await send(message)
+
+        await self.app(scope, counting_receive, counting_send)
+
+
+def send_request(index: int, text: str) -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': index,
+        'method': 'message/send',
+        'params': {'message': {
+            'role': 'user',
+            'messageId': str(uuid.uuid4()),
+            'parts': [{'kind': 'text', 'text': text}],
+        }},
+    }
+
+
+async def run_case(url: str, counter: WireBytesCounter, encoding: str, batch_size: int,
+                   messages: list[str], concurrency: int) -> dict:
+    """Send every message once, `batch_size` per HTTP request, about `concurrency` messages in flight."""
+    requests = [send_request(i, text) for i, text in enumerate(messages)]
+    payloads = [
+        requests[i] if batch_size == 1 else requests[i:i + batch_size]
+        for i in range(0, len(requests), batch_size)
+    ]
+    latencies = []
+    failures = 0
+    http_concurrency = max(concurrency // batch_size, 1)
+    semaphore = asyncio.Semaphore(http_concurrency)
+
+    async def post(client, payload):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(url, json=payload)
+            latencies.append(time.perf_counter() - started)
+            items = response.json()
+            for item in items if isinstance(items, list) else [items]:
+                failures += 'error' in item
+
+    limits = httpx.Limits(max_connections=http_concurrency)
+    async with httpx.AsyncClient(headers={'accept-encoding': encoding}, timeout=120, limits=limits) as client:
+        counter.reset()
+        started = time.perf_counter()
+        await asyncio.gather(*(post(client, payload) for payload in payloads))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'encoding': encoding,
+        'batch_size': batch_size,
+        'messages': len(messages),
+        'http_requests': counter.requests,
+        'failures': failures,
+        'request_bytes': counter.request_bytes,
+        'response_bytes': counter.response_bytes,
+        'bytes_per_message': round((counter.request_bytes + counter.response_bytes) / len(messages)),
+        'messages_per_sec': round(len(messages) / elapsed, 1),
+        'http_latency': summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200, help='Messages sent per case')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--encodings', nargs='+', default=['identity'] + available_encodings())
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Messages in flight (HTTP requests in flight = concurrency / batch size)')
+    parser.add_argument('--tickets', type=int, default=100_000, help='Tickets in the benchmark database')
+    parser.add_argument('--data-dir', default='bench_data')
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    mcp_service.DB_PATH = prepare_database(args.data_dir, args.tickets, rebuild=False)
+    messages = [DEFAULT_MESSAGES[i % len(DEFAULT_MESSAGES)] for i in range(args.messages)]
+
+    counter = WireBytesCounter(build_role_app('customer_data'))
+    server = uvicorn.Server(uvicorn.Config(
+        counter, host=agent_host('customer_data'), port=agent_port('customer_data'), log_level='warning'
+    ))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = agent_url('customer_data')
+    results = []
+    try:
+        # Warm-up: first model/tool calls and connection setup
+        await run_case(url, counter, 'identity', 1, messages[:len(DEFAULT_MESSAGES)], 1)
+        for batch_size in args.batch_sizes:
+            for encoding in args.encodings:
+                results.append(await run_case(url, counter, encoding, batch_size, messages, args.concurrency))
+    finally:
+        server.should_exit = True
+        await asyncio.sleep(0.2)
+
+    print(f"\n{'encoding':>9} {'batch':>5} | {'HTTP reqs':>9} {'req bytes':>10} {'resp bytes':>11} "
+          f"{'bytes/msg':>9} | {'msgs/s':>7} {'p50 ms':>8} {'p95 ms':>8} | fail")
+    for result in results:
+        latency = result['http_latency']
+        print(f"{result['encoding']:>9} {result['batch_size']:>5} | {result['http_requests']:>9} "
+              f"{result['request_bytes']:>10} {result['response_bytes']:>11} {result['bytes_per_message']:>9} "
+              f"| {result['messages_per_sec']:>7} {latency['p50'] * 1000:>8.1f} {latency['p95'] * 1000:>8.1f} "
+              f"| {result['failures']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Conversation State Benchmark
+Compares request bytes and prompt tokens of history-in-message vs server-side (context ID) conversations
+"""
+import argparse
+import asyncio
+import json
+
+import uvicorn
+
+from agents_definitions import get_agent
+from agents_server import AGENT_STORES, build_role_app
+from demo_scenarios import ConversationSession
+from service_config import AGENT_ROLES, agent_host, agent_port, agent_url
+
+MODES = ['history', 'context_id']
+
+# Ten-turn support conversation
+DEFAULT_TURNS = [
+    "I need help with my account",
+    "My customer ID is 5",
+    "Can you show me my account details?",
+    "I have a billing problem",
+    "I was charged twice for my subscription",
+    "Can you issue a refund?",
+    "Show me my ticket history",
+    "Do I have any open tickets?",
+    "Please update my email to evan.new@example.com",
+    "Thanks, can you confirm my updated information?",
+]
+
+
+class RequestBytesCounter:
+    """ASGI middleware counting request body bytes of POSTs (A2A calls)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.bytes = 0
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            return await self.app(scope, receive, send)
+        self.requests += 1
+
+        async def counting_receive():
+            message = await receive()
+            self.bytes += len(message.get('body', b''))
+            return message
+
+        await self.app(scope, counting_receive, send)
+
+
+def prompt_tokens(agent_name: str) -> int:
+    """Prompt tokens recorded on model events across the agent's ADK sessions."""
+    sessions = AGENT_STORES[agent_name]['sessions'].sessions
+    return sum(
+        event.usage_metadata.prompt_token_count or 0
+        for users in sessions.values()
+        for user_sessions in users.values()
+        for session in user_sessions.values()
+        for event in session.events
+        if event.usage_metadata
+    )
+
+
+async def start_agents() -> tuple[dict, list]:
+    """Serve every agent in this process, each behind a byte counter."""
+    counters, servers = {}, []
+    for role in AGENT_ROLES:
+        counters[role] = RequestBytesCounter(build_role_app(role))
+        server = uvicorn.Server(uvicorn.Config(
+            counters[role], host=agent_host(role), port=agent_port(role), log_level='warning'
+        ))
+        asyncio.create_task(server.serve())
+        servers.append(server)
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+    return counters, servers
+
+
+async def run_mode(mode: str, turns: list[str], counters: dict) -> dict:
+    """Run one conversation; returns per-turn bytes and token deltas."""
+    session = ConversationSession(agent_url('router'), server_state=mode == 'context_id')
+    per_turn = []
+    for turn in turns:
+        bytes_before = {role: counter.bytes for role, counter in counters.items()}
+        tokens_before = {role: prompt_tokens(get_agent(role).name) for role in AGENT_ROLES}
+        await session.send_message(turn)
+        if session.last_error:
+            raise RuntimeError(f"{mode} turn failed: {session.last_error!r}")
+        per_turn.append({
+            'client_request_bytes': counters['router'].bytes - bytes_before['router'],
+            'agent_request_bytes': sum(
+                counter.bytes - bytes_before[role] for role, counter in counters.items() if role != 'router'
+            ),
+            'prompt_tokens': sum(
+                prompt_tokens(get_agent(role).name) - tokens_before[role] for role in AGENT_ROLES
+            ),
+        })
+    totals = {key: sum(turn[key] for turn in per_turn) for key in per_turn[0]}
+    return {'turns': per_turn, 'totals': totals}
+
+
+def reduction(before: int, after: int) -> str:
+    return f"{(1 - after / before) * 100:.1f}%" if before else 'n/a'
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--turns', help='JSON file with a list of user messages (default: built-in 10 turns)')
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    turns = DEFAULT_TURNS
+    if args.turns:
+        with open(args.turns) as f:
+            turns = json.load(f)
+
+    counters, servers = await start_agents()
+    results = {}
+    try:
+        for mode in MODES:
+            results[mode] = await run_mode(mode, turns, counters)
+    finally:
+        for server in servers:
+            server.should_exit = True
+        await asyncio.sleep(0.2)
+
+    print(f"\n{'turn':>4} | {'client bytes':>25} | {'agent-to-agent bytes':>25} | {'prompt tokens':>25}")
+    print(f"{'':>4} | {'history':>12} {'context':>12} | {'history':>12} {'context':>12} | {'history':>12} {'context':>12}")
+    for i, (old, new) in enumerate(zip(results['history']['turns'], results['context_id']['turns']), 1):
+        print(f"{i:>4} | {old['client_request_bytes']:>12} {new['client_request_bytes']:>12} "
+              f"| {old['agent_request_bytes']:>12} {new['agent_request_bytes']:>12} "
+              f"| {old['prompt_tokens']:>12} {new['prompt_tokens']:>12}")
+
+    old, new = results['history']['totals'], results['context_id']['totals']
+    print("\nTotals (history -> context_id):")
+    for key, label in (('client_request_bytes', 'client request bytes'),
+                       ('agent_request_bytes', 'agent-to-agent bytes'),
+                       ('prompt_tokens', 'prompt tokens')):
+        print(f"  {label:22} {old[key]:>8} -> {new[key]:>8}  ({reduction(old[key], new[key])} reduction)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'turns': turns, 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,272 @@
+"""
+MCP Tool Benchmarks
+Measures each mcp_service tool across database sizes and concurrency levels
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import mcp_service
+from benchmark_utils import compare_metric, summarize
+from db_initialize import create_customer_lookup, create_customer_profiles, create_database, create_ticket_events
+
+DEFAULT_SIZES = [1_000, 100_000, 10_000_000]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+# Tickets per customer in generated databases
+TICKETS_PER_CUSTOMER = 5
+
+ISSUES = [
+    'Cannot login to account',
+    'Billing inquiry',
+    'Charged twice for subscription',
+    'Feature request: Dark mode',
+    'Payment failed',
+    'Account upgrade assistance',
+]
+
+
+def build_database(db_path: str, num_tickets: int, batch_size: int = 50_000):
+    """Create a seeded database and grow it to `num_tickets` tickets."""
+    # The outbox and profiles are added after the bulk load: it is not a stream
+    # of changes, and the profiles are cheaper to build once at the end
+    create_database(db_path, with_triggers=False)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    rng = random.Random(42)
+    existing_tickets = cursor.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+    num_customers = max(num_tickets // TICKETS_PER_CUSTOMER, 1)
+
+    for start in range(0, num_customers, batch_size):
+        rows = [
+            (f'Customer {i}', f'customer{i}@example.com', f'555-{i:07d}',
+             'active' if rng.random() < 0.8 else 'disabled')
+            for i in range(start, min(start + batch_size, num_customers))
+        ]
+        cursor.executemany(
+            "INSERT INTO customers (name, email, phone, status) VALUES (?, ?, ?, ?)", rows
+        )
+    customer_ids = [row[0] for row in cursor.execute("SELECT id FROM customers")]
+
+    for start in range(existing_tickets, num_tickets, batch_size):
+        rows = [
+            (rng.choice(customer_ids), rng.choice(ISSUES),
+             rng.choice(('open', 'in_progress', 'resolved')), rng.choice(('low', 'medium', 'high')))
+            for _ in range(start, min(start + batch_size, num_tickets))
+        ]
+        cursor.executemany(
+            "INSERT INTO tickets (customer_id, issue, status, priority) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.commit()
+
+    create_ticket_events(cursor)
+    create_customer_profiles(cursor)
+    create_customer_lookup(cursor)
+    conn.commit()
+    conn.close()
+
+
+def prepare_database(data_dir: str, num_tickets: int, rebuild: bool) -> str:
+    """Return the path of a benchmark database, building it if needed."""
+    os.makedirs(data_dir, exist_ok=True)
+    db_path = os.path.join(data_dir, f'bench_{num_tickets}.db')
+    if rebuild or not os.path.exists(db_path):
+        print(f"Building database with {num_tickets:,} tickets at {db_path}...")
+        started = time.perf_counter()
+        build_database(db_path, num_tickets)
+        print(f"  built in {time.perf_counter() - started:.1f}s")
+    return db_path
+
+
+def db_size(db_path: str) -> int:
+    """Size of the database including its WAL/journal files."""
+    return sum(
+        os.path.getsize(db_path + suffix)
+        for suffix in ('', '-wal', '-journal')
+        if os.path.exists(db_path + suffix)
+    )
+
+
+def tool_cases(customer_ids: list[int]) -> dict:
+    """Callables (taking an RNG) that invoke each tool with realistic arguments."""
+    return {
+        'get_customer': lambda rng: mcp_service.get_customer(rng.choice(customer_ids)),
+        # Generated customers are 'Customer <i>' / customer<i>@example.com, i from 0
+        'find_customer': lambda rng: mcp_service.find_customer(
+            email=f'Customer{rng.randrange(len(customer_ids))}@Example.com'
+        ),
+        'find_customer_by_name': lambda rng: mcp_service.find_customer(name=f'customer {rng.randrange(len(customer_ids))}'),
+        'list_customers': lambda rng: mcp_service.list_customers('active', 10),
+        'update_customer': lambda rng: mcp_service.update_customer(
+            rng.choice(customer_ids), json.dumps({'phone': f'555-{rng.randrange(10**7):07d}'})
+        ),
+        'create_ticket': lambda rng: mcp_service.create_ticket(
+            rng.choice(customer_ids), rng.choice(ISSUES), rng.choice(('low', 'medium', 'high'))
+        ),
+        'get_customer_history': lambda rng: mcp_service.get_customer_history(rng.choice(customer_ids)),
+        'get_customers_with_open_tickets': lambda rng: mcp_service.get_customers_with_open_tickets('active', 50),
+    }
+
+
+def measure_allocations(call, rng, samples: int) -> float:
+    """Peak bytes allocated per call, measured with tracemalloc."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            call(rng)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+def run_tool(name: str, call, db_path: str, concurrency: int, iterations: int, seed: int) -> dict:
+    """Benchmark one tool at one concurrency level."""
+    errors = 0
+    latencies = []
+
+    def worker(worker_index: int):
+        nonlocal errors
+        rng = random.Random(seed + worker_index)
+        local = []
+        for _ in range(iterations // concurrency or 1):
+            started = time.perf_counter()
+            try:
+                call(rng)
+            except sqlite3.Error:
+                errors += 1
+                continue
+            local.append(time.perf_counter() - started)
+        return local
+
+    size_before = db_size(db_path)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for local in pool.map(worker, range(concurrency)):
+            latencies.extend(local)
+    elapsed = time.perf_counter() - started
+    growth = db_size(db_path) - size_before
+
+    return {
+        'latency': summarize(latencies),
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'errors': errors,
+        'db_growth_bytes_per_call': growth / max(len(latencies), 1),
+    }
+
+
+def run_benchmarks(args) -> dict:
+    results = []
+    for num_tickets in args.sizes:
+        db_path = prepare_database(args.data_dir, num_tickets, args.rebuild)
+        mcp_service.DB_PATH = db_path
+        conn = sqlite3.connect(db_path)
+        customer_ids = [row[0] for row in conn.execute("SELECT id FROM customers")]
+        conn.close()
+
+        cases = tool_cases(customer_ids)
+        for name in args.tools or cases:
+            call = cases[name]
+            for _ in range(args.warmup):
+                call(random.Random(args.seed))
+            allocations = measure_allocations(call, random.Random(args.seed), args.alloc_samples)
+            for concurrency in args.concurrency:
+                result = run_tool(name, call, db_path, concurrency, args.iterations, args.seed)
+                result.update({
+                    'tool': name,
+                    'tickets': num_tickets,
+                    'concurrency': concurrency,
+                    'alloc_peak_bytes_per_call': allocations,
+                })
+                results.append(result)
+                print(f"  {name:34} tickets={num_tickets:<10,} c={concurrency:<3} "
+                      f"p50={result['latency']['p50'] * 1000:8.3f}ms "
+                      f"p99={result['latency']['p99'] * 1000:8.3f}ms "
+                      f"{result['ops_per_sec']:10.1f} ops/s "
+                      f"{allocations / 1024:8.1f} KiB/call")
+
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline_path: str, current_path: str, threshold: float) -> int:
+    """Compare two result files and print regressions. Returns the count found."""
+    with open(baseline_path) as f:
+        baseline = {(r['tool'], r['tickets'], r['concurrency']): r for r in json.load(f)['results']}
+    with open(current_path) as f:
+        current = {(r['tool'], r['tickets'], r['concurrency']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for key, result in current.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        label = f"{key[0]} tickets={key[1]} c={key[2]}"
+        checks = [
+            compare_metric(f"{label} p50", base['latency']['p50'], result['latency']['p50'], threshold),
+            compare_metric(f"{label} p95", base['latency']['p95'], result['latency']['p95'], threshold),
+            compare_metric(f"{label} ops/sec", base['ops_per_sec'], result['ops_per_sec'], threshold,
+                           higher_is_better=True),
+            compare_metric(f"{label} alloc/call", base['alloc_peak_bytes_per_call'],
+                           result['alloc_peak_bytes_per_call'], threshold),
+        ]
+        regressions.extend(c for c in checks if c)
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        print(f"✅ No regressions beyond {threshold:.0%}")
+    return len(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Ticket counts to benchmark')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--tools', nargs='+', help='Subset of tools to run')
+    parser.add_argument('--iterations', type=int, default=2000, help='Calls per tool/size/concurrency')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--alloc-samples', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', default='bench_data', help='Where generated databases are kept')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate databases even if present')
+    parser.add_argument('--output', default='bench_mcp_tools.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Regression threshold (fraction)')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare_results(*args.compare, args.threshold) else 0)
+
+    report = run_benchmarks(args)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Metrics Overhead Benchmark
+Measures the cost of metric updates, tool instrumentation and the A2A metrics middleware
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from a2a.client import ClientConfig, ClientFactory, create_text_message_object
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import TransportProtocol
+
+import metrics
+from bench_a2a_transport import EchoAgentExecutor, echo_card
+from benchmark_utils import summarize
+
+
+def ns_per_op(func, iterations: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def run_micro(iterations: int) -> dict:
+    """Per-operation cost of the metric primitives (ns/op)."""
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('bench_total', 'bench', ('label',)).labels('a')
+    labelled = registry.counter('bench_labelled_total', 'bench', ('agent', 'method', 'status'))
+    histogram = registry.histogram('bench_seconds', 'bench', ('label',)).labels('a')
+
+    def noop():
+        return None
+
+    instrumented = metrics.instrument_tool(noop)
+    results = {
+        'loop_baseline': ns_per_op(noop, iterations),
+        'counter_inc': ns_per_op(counter.inc, iterations),
+        'counter_labels_inc': ns_per_op(lambda: labelled.labels('agent', 'message/send', '200').inc(), iterations),
+        'histogram_observe': ns_per_op(lambda: histogram.observe(0.0123), iterations),
+        'instrumented_tool_call': ns_per_op(instrumented, iterations),
+    }
+
+    for i in range(200):
+        registry.histogram('bench_render_seconds', 'bench', ('series',)).labels(str(i)).observe(0.01)
+    started = time.perf_counter()
+    text = metrics.REGISTRY.render() + registry.render()
+    results['render_ms'] = (time.perf_counter() - started) * 1000
+    results['render_bytes'] = len(text)
+    return results
+
+
+async def run_middleware(with_metrics: bool, args) -> dict:
+    """A2A message/send latency through an in-process ASGI app, with or without MetricsMiddleware."""
+    card = echo_card('http://bench.local', TransportProtocol.jsonrpc)
+    handler = DefaultRequestHandler(
+        agent_executor=EchoAgentExecutor(args.response_bytes), task_store=InMemoryTaskStore()
+    )
+    app = A2AStarletteApplication(agent_card=card, http_handler=handler).build()
+    if with_metrics:
+        app = metrics.MetricsMiddleware(app, 'bench_agent')
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench.local') as client:
+        factory = ClientFactory(ClientConfig(httpx_client=client, streaming=False,
+                                             supported_transports=[TransportProtocol.jsonrpc]))
+        a2a_client = factory.create(card)
+
+        async def one_call() -> float:
+            started = time.perf_counter()
+            async for _ in a2a_client.send_message(create_text_message_object(content='ping')):
+                pass
+            return time.perf_counter() - started
+
+        for _ in range(args.warmup):
+            await one_call()
+
+        latencies = []
+
+        async def worker():
+            for _ in range(args.iterations // args.concurrency):
+                latencies.append(await one_call())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {'latency': summarize(latencies), 'ops_per_sec': len(latencies) / elapsed}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--micro-iterations', type=int, default=1_000_000)
+    parser.add_argument('--iterations', type=int, default=2000, help='A2A calls per middleware run')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--response-bytes', type=int, default=512)
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    micro = run_micro(args.micro_iterations)
+    print("Metric primitives (ns/op):")
+    for key, value in micro.items():
+        if key not in ('render_ms', 'render_bytes'):
+            print(f"  {key:24} {value:8.1f}")
+    print(f"  render                   {micro['render_ms']:8.2f} ms ({micro['render_bytes']} bytes)")
+
+    middleware = {}
+    for label, with_metrics in (('without_metrics', False), ('with_metrics', True)):
+        middleware[label] = await run_middleware(with_metrics, args)
+        stats = middleware[label]['latency']
+        print(f"  {label:16} p50={stats['p50'] * 1e6:8.1f}us p99={stats['p99'] * 1e6:8.1f}us "
+              f"{middleware[label]['ops_per_sec']:8.1f} calls/s")
+
+    base, instrumented = middleware['without_metrics'], middleware['with_metrics']
+    overhead = {
+        'p50_pct': (instrumented['latency']['p50'] / base['latency']['p50'] - 1) * 100,
+        'throughput_pct': (1 - instrumented['ops_per_sec'] / base['ops_per_sec']) * 100,
+    }
+    print(f"\nMiddleware overhead: p50 {overhead['p50_pct']:+.1f}%, throughput {overhead['throughput_pct']:+.1f}%")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'micro_ns': micro, 'middleware': middleware,
+                       'overhead': overhead}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
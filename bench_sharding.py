@@ -0,0 +1,113 @@
+"""
+Sharding Write Benchmark
+Write throughput and latency of create_ticket / update_customer from concurrent processes per shard count
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import time
+
+from bench_mcp_tools import ISSUES, prepare_database
+from benchmark_utils import summarize
+from reshard import reshard
+from sharding import shard_paths
+
+
+def writer(db_path: str, shards: int, customer_ids: list[int], start_at: float, duration: float, seed: int) -> dict:
+    """One writer process: alternate ticket creation and customer updates until the deadline."""
+    import mcp_service
+
+    mcp_service.DB_PATH = db_path
+    mcp_service.DB_SHARDS = shards
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    time.sleep(max(start_at - time.time(), 0))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        customer_id = rng.choice(customer_ids)
+        started = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                result = mcp_service.create_ticket(customer_id, rng.choice(ISSUES), rng.choice(('low', 'medium', 'high')))
+            else:
+                result = mcp_service.update_customer(customer_id, json.dumps({'phone': f'555-{rng.randrange(10**7):07d}'}))
+        except sqlite3.Error:
+            errors += 1
+            continue
+        if result.startswith('Error'):
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return {'latencies': latencies, 'errors': errors}
+
+
+def prepare_layout(base_db: str, scratch_db: str, shards: int, wal: bool) -> str:
+    """A fresh copy of the benchmark database split into `shards` files (writes of earlier runs discarded)."""
+    shutil.copyfile(base_db, scratch_db)
+    if shards > 1:
+        reshard(scratch_db, 1, shards, force=True)
+    if wal:
+        for path in shard_paths(scratch_db, shards):
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.close()
+    return scratch_db
+
+
+def run_case(db_path: str, shards: int, writers: int, duration: float, customer_ids: list[int], seed: int) -> dict:
+    start_at = time.time() + 1.0  # every writer has started (and imported) before the clock runs
+    jobs = [(db_path, shards, customer_ids, start_at, duration, seed + i) for i in range(writers)]
+    with multiprocessing.Pool(writers) as pool:
+        results = pool.starmap(writer, jobs)
+    latencies = [latency for result in results for latency in result['latencies']]
+    return {
+        'shards': shards,
+        'writers': writers,
+        'writes': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'writes_per_sec': round(len(latencies) / duration, 1),
+        'latency': summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--writers', type=int, default=8, help='Concurrent writer processes')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of writes per shard count')
+    parser.add_argument('--tickets', type=int, default=100_000, help='Tickets in the benchmark database')
+    parser.add_argument('--wal', action='store_true', help='Put every shard in WAL journal mode')
+    parser.add_argument('--data-dir', default='bench_data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    base_db = prepare_database(args.data_dir, args.tickets, rebuild=False)
+    scratch_db = os.path.join(args.data_dir, f'sharding_{args.tickets}.db')
+    conn = sqlite3.connect(base_db)
+    customer_ids = [row[0] for row in conn.execute("SELECT id FROM customers")]
+    conn.close()
+
+    results = []
+    for shards in args.shards:
+        db_path = prepare_layout(base_db, scratch_db, shards, args.wal)
+        result = run_case(db_path, shards, args.writers, args.duration, customer_ids, args.seed)
+        results.append(result)
+        latency = result['latency']
+        speedup = result['writes_per_sec'] / results[0]['writes_per_sec'] if results[0]['writes_per_sec'] else 0
+        print(f"  shards={shards:<3} writers={args.writers:<3} {result['writes_per_sec']:9.1f} writes/s "
+              f"(x{speedup:.2f})  p50={latency['p50'] * 1000 if latency['p50'] else 0:7.2f}ms "
+              f"p99={latency['p99'] * 1000 if latency['p99'] else 0:8.2f}ms  errors={result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
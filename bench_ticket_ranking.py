@@ -0,0 +1,110 @@
+"""
+Ticket Ranking Benchmark
+Latency of rank_open_tickets cold, warm and after writes, against scoring the open tickets row by row in Python
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import time
+
+import mcp_service
+import ticket_ranking
+from admission_control import premium_customer_ids
+from bench_mcp_tools import ISSUES, prepare_database
+from benchmark_utils import summarize
+
+
+def row_by_row_rank(db_path: str, limit: int) -> list[float]:
+    """Baseline: the same score computed per row in Python over a fresh query; returns the top scores."""
+    now = time.time()
+    premium = premium_customer_ids()
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(ticket_ranking.OPEN_TICKET_COLUMNS_SQL).fetchall()
+    conn.close()
+    open_counts = {}
+    for row in rows:
+        open_counts[row[1]] = open_counts.get(row[1], 0) + 1
+    priority_weights = list(ticket_ranking.PRIORITY_WEIGHTS.values())
+    keyword_weights = list(ticket_ranking.KEYWORD_WEIGHTS.values())
+    scored = []
+    for ticket_id, customer_id, priority, created, keywords in rows:
+        score = (priority_weights[priority]
+                 + ticket_ranking.AGE_WEIGHT * math.log1p(max(now - created, 0) / 86400.0)
+                 + ticket_ranking.PREMIUM_WEIGHT * (customer_id in premium)
+                 + ticket_ranking.OPEN_TICKETS_WEIGHT * math.log2(open_counts[customer_id])
+                 + sum(weight for bit, weight in enumerate(keyword_weights) if keywords >> bit & 1))
+        scored.append(score)
+    return heapq.nlargest(limit, scored)
+
+
+def timed(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickets', type=int, default=2_000_000, help='Tickets in the benchmark database')
+    parser.add_argument('--limit', type=int, default=10, help='Top-K tickets returned')
+    parser.add_argument('--runs', type=int, default=20, help='Warm rankings to time')
+    parser.add_argument('--writes', type=int, default=100, help='Tickets created between rankings in the refresh case')
+    parser.add_argument('--data-dir', default='bench_data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results as JSON')
+    args = parser.parse_args()
+
+    base_db = prepare_database(args.data_dir, args.tickets, rebuild=False)
+    # The refresh case writes tickets: work on a copy
+    db_path = os.path.join(args.data_dir, f'ranking_{args.tickets}.db')
+    shutil.copyfile(base_db, db_path)
+    mcp_service.DB_PATH = db_path
+    mcp_service.DB_SHARDS = 1
+    conn = sqlite3.connect(db_path)
+    customer_ids = [row[0] for row in conn.execute("SELECT id FROM customers")]
+    open_tickets = conn.execute("SELECT COUNT(*) FROM tickets WHERE status = 'open'").fetchone()[0]
+    conn.close()
+    print(f"Ranking {open_tickets:,} open tickets of {args.tickets:,} (top {args.limit})")
+
+    def rank():
+        return ticket_ranking.rank((db_path,), args.limit)
+
+    results = {}
+    results['cold'] = summarize(timed(rank, 1))
+    results['warm'] = summarize(timed(rank, args.runs))
+
+    rng = random.Random(args.seed)
+    refresh_samples = []
+    for _ in range(5):
+        for _ in range(args.writes):
+            mcp_service.create_ticket(rng.choice(customer_ids), rng.choice(ISSUES), rng.choice(('low', 'medium', 'high')))
+        refresh_samples.extend(timed(rank, 1))
+    results['after_writes'] = summarize(refresh_samples)
+    results['row_by_row'] = summarize(timed(lambda: row_by_row_rank(db_path, args.limit), 3))
+
+    # Scores, not IDs: equal scores may differ in the last bits between NumPy and math
+    expected = [ticket['score'] for ticket in rank()]
+    if [round(score, 3) for score in row_by_row_rank(db_path, args.limit)] != expected:
+        print("⚠️ Row-by-row baseline found different top scores")
+
+    for case, latency in results.items():
+        print(f"  {case:<13} p50={latency['p50'] * 1000:9.2f}ms  max={latency['max'] * 1000:9.2f}ms  (n={latency['count']})")
+    stats = ticket_ranking.open_ticket_columns(db_path).stats
+    print(f"  column cache: {stats['full_loads']} full load(s), {stats['patches']} patch(es)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'open_tickets': open_tickets, 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark Utilities
+Shared latency statistics and regression comparison for benchmark scripts
+"""
+from typing import Optional
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Latency summary (seconds) for a list of samples."""
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else None,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'max': max(samples) if samples else None,
+    }
+
+
+def compare_metric(name: str, baseline: Optional[float], current: Optional[float],
+                   threshold: float, higher_is_better: bool = False) -> Optional[str]:
+    """Return a regression message if `current` is worse than `baseline` by more than `threshold`."""
+    if not baseline or current is None:
+        return None
+    change = (current - baseline) / baseline
+    if higher_is_better:
+        change = -change
+    if change > threshold:
+        return f"{name}: {baseline:.6g} -> {current:.6g} ({change:+.1%} worse)"
+    return None
@@ -0,0 +1,538 @@
+"""
+Bounded Stores
+Capacity-bounded session, task, artifact and memory stores with LRU and idle-TTL eviction
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Task, TaskState
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events import Event
+from google.adk.memory import in_memory_memory_service
+from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.sqlite_session_service import CREATE_SCHEMA_SQL, SqliteSessionService
+from pydantic import PrivateAttr
+
+TERMINAL_TASK_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+# Fixed per-object overhead added to the size estimates below
+OBJECT_OVERHEAD_BYTES = 512
+
+# A session whose invocation has produced no event for this long is treated as
+# abandoned (e.g. the model call failed) and no longer protected from eviction
+MAX_INVOCATION_SECONDS = 6 * 3600
+
+# The services below extend ADK's in-memory services through these private
+# members, checked at import against the installed google-adk (tested with 1.19)
+ADK_TESTED_VERSION = '1.19'
+ADK_PRIVATE_MEMBERS = (
+    (InMemorySessionService, '_delete_session_impl'),
+    (InMemoryArtifactService, '_artifact_path'),
+    (in_memory_memory_service, '_user_key'),
+)
+# Set by InMemoryMemoryService.__init__, so checked on the instance
+ADK_MEMORY_ATTRIBUTES = ('_session_events', '_lock')
+
+
+def _require_adk_internals(owner, names, label: str):
+    missing = [name for name in names if not hasattr(owner, name)]
+    if missing:
+        from google.adk import __version__
+        raise ImportError(
+            f"bounded_stores needs {label}.{', '.join(missing)}, missing in google-adk {__version__} "
+            f"(tested with {ADK_TESTED_VERSION}.x); pin google-adk or update bounded_stores.py"
+        )
+
+
+for _owner, _name in ADK_PRIVATE_MEMBERS:
+    _require_adk_internals(_owner, (_name,), _owner.__name__)
+_user_key = in_memory_memory_service._user_key
+
+
+def _part_bytes(part: Any) -> int:
+    """Approximate payload size of an A2A or GenAI part."""
+    part = getattr(part, 'root', part)
+    size = len(getattr(part, 'text', None) or '')
+    for attr in ('data', 'function_call', 'function_response'):
+        value = getattr(part, attr, None)
+        if value is not None:
+            payload = value if isinstance(value, dict) else getattr(value, 'args', None) or getattr(value, 'response', None)
+            size += len(json.dumps(payload, default=str)) if payload else 64
+    return size
+
+
+def estimate_task_bytes(task: Task) -> int:
+    """Cheap size estimate for a task (history plus artifacts), without serializing it."""
+    size = OBJECT_OVERHEAD_BYTES
+    for message in task.history or []:
+        size += sum(_part_bytes(p) for p in message.parts)
+    for artifact in task.artifacts or []:
+        size += sum(_part_bytes(p) for p in artifact.parts)
+    return size
+
+
+def estimate_event_bytes(event: Event) -> int:
+    """Cheap size estimate for a session event."""
+    size = OBJECT_OVERHEAD_BYTES
+    if event.content and event.content.parts:
+        size += sum(_part_bytes(p) for p in event.content.parts)
+    return size
+
+
+class LruTracker:
+    """Tracks keys by recency and size, and picks eviction victims.
+
+    Keys are kept in least-recently-used order so both capacity and idle-TTL
+    victims are found at the front without scanning the whole store.
+    """
+
+    def __init__(self, max_items: int = 0, max_bytes: int = 0, idle_ttl: float = 0.0):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> [last_access, size]
+        self.total_bytes = 0
+        self.evictions = {'capacity': 0, 'memory': 0, 'idle_ttl': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def touch(self, key, size: Optional[int] = None, add_bytes: int = 0):
+        """Mark `key` as used now; optionally set or grow its size."""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0.0, 0]
+        else:
+            self._entries.move_to_end(key)
+        entry[0] = time.monotonic()
+        new_size = size if size is not None else entry[1] + add_bytes
+        self.total_bytes += new_size - entry[1]
+        entry[1] = new_size
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def victims(self, evictable=lambda key: True, expirable=None) -> list[tuple[Any, str]]:
+        """Keys to evict now, as (key, reason), oldest first.
+
+        `evictable(key)` protects keys (e.g. running tasks) from capacity and
+        memory eviction, and `expirable(key)` (default: `evictable`) from
+        idle-TTL eviction.
+        """
+        expirable = expirable or evictable
+        result = []
+        now = time.monotonic()
+        count, size = len(self._entries), self.total_bytes
+        for key, (last_access, key_size) in self._entries.items():
+            over_items = self.max_items and count > self.max_items
+            over_bytes = self.max_bytes and size > self.max_bytes
+            idle = self.idle_ttl and now - last_access > self.idle_ttl
+            if not (over_items or over_bytes or idle):
+                break  # later keys were used more recently
+            if idle and expirable(key):
+                reason = 'idle_ttl'
+            elif (over_items or over_bytes) and evictable(key):
+                reason = 'capacity' if over_items else 'memory'
+            else:
+                continue  # protected key: look further for an evictable one
+            result.append((key, reason))
+            count -= 1
+            size -= key_size
+        return result
+
+    def record_eviction(self, key, reason: str):
+        self.remove(key)
+        self.evictions[reason] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'items': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_items': self.max_items,
+            'max_bytes': self.max_bytes,
+            'idle_ttl': self.idle_ttl,
+            'evictions': dict(self.evictions),
+        }
+
+
+# ============================================================================
+# Tasks
+# ============================================================================
+
+class SqliteTaskSpillStore:
+    """SQLite store that keeps evicted completed tasks retrievable outside RAM.
+
+    Spilled tasks older than `ttl` seconds are purged on each store sweep (0 keeps them).
+    """
+
+    def __init__(self, db_path: str, ttl: float = 0.0):
+        self.db_path = db_path
+        self.ttl = ttl
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS spilled_tasks (
+            task_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            spilled_at REAL NOT NULL
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_spilled_tasks_spilled_at ON spilled_tasks(spilled_at)")
+        conn.commit()
+        conn.close()
+        self.spilled = 0
+        self.hits = 0
+        self.purged = 0
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10.0)
+
+    def _put(self, task_id: str, data: str):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO spilled_tasks (task_id, data, spilled_at) VALUES (?, ?, ?)",
+            (task_id, data, time.time()),
+        )
+        conn.commit()
+        conn.close()
+
+    def _get(self, task_id: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute("SELECT data FROM spilled_tasks WHERE task_id = ?", (task_id,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def _delete(self, task_id: str):
+        conn = self._connect()
+        conn.execute("DELETE FROM spilled_tasks WHERE task_id = ?", (task_id,))
+        conn.commit()
+        conn.close()
+
+    async def put(self, task: Task):
+        await asyncio.to_thread(self._put, task.id, task.model_dump_json(exclude_none=True))
+        self.spilled += 1
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        data = await asyncio.to_thread(self._get, task_id)
+        if data is None:
+            return None
+        self.hits += 1
+        return Task.model_validate_json(data)
+
+    async def delete(self, task_id: str):
+        await asyncio.to_thread(self._delete, task_id)
+
+    def purge_older_than(self, seconds: float) -> int:
+        """Drop spilled tasks older than `seconds`; returns the number removed."""
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM spilled_tasks WHERE spilled_at < ?", (time.time() - seconds,))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+
+class BoundedTaskStore(InMemoryTaskStore):
+    """InMemoryTaskStore with LRU, memory and idle-TTL limits.
+
+    Capacity and memory eviction only take tasks in a terminal state, so
+    running tasks are never dropped for space. Idle tasks that are not
+    terminal (e.g. waiting for input) only leave memory for the spill store;
+    without one they stay. Evicted tasks go to the optional spill store and
+    are transparently read back by `get`.
+    """
+
+    def __init__(self, max_tasks: int = 10_000, max_bytes: int = 0, idle_ttl: float = 0.0,
+                 spill_store: Optional[SqliteTaskSpillStore] = None):
+        super().__init__()
+        self.tracker = LruTracker(max_tasks, max_bytes, idle_ttl)
+        self.spill_store = spill_store
+
+    def _is_terminal(self, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        return task is not None and task.status.state in TERMINAL_TASK_STATES
+
+    def _is_expirable(self, task_id: str) -> bool:
+        return self.spill_store is not None or self._is_terminal(task_id)
+
+    def _evict(self) -> list[Task]:
+        """Evict past the limits or the idle TTL; call with the lock held. Returns the tasks to spill."""
+        evicted = []
+        for task_id, reason in self.tracker.victims(self._is_terminal, self._is_expirable):
+            evicted.append(self.tasks.pop(task_id))
+            self.tracker.record_eviction(task_id, reason)
+        return evicted
+
+    async def _spill(self, evicted: list[Task]):
+        if self.spill_store:
+            for victim in evicted:
+                await self.spill_store.put(victim)
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        async with self.lock:
+            self.tasks[task.id] = task
+            self.tracker.touch(task.id, size=estimate_task_bytes(task))
+            evicted = self._evict()
+        await self._spill(evicted)
+
+    async def sweep(self):
+        """Evict idle tasks without waiting for the next write, and purge expired spilled tasks."""
+        async with self.lock:
+            evicted = self._evict()
+        await self._spill(evicted)
+        if self.spill_store and self.spill_store.ttl > 0:
+            self.spill_store.purged += await asyncio.to_thread(
+                self.spill_store.purge_older_than, self.spill_store.ttl
+            )
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        async with self.lock:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                self.tracker.touch(task_id)
+                return task
+        if self.spill_store:
+            return await self.spill_store.get(task_id)
+        return None
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        async with self.lock:
+            self.tasks.pop(task_id, None)
+            self.tracker.remove(task_id)
+        if self.spill_store:
+            await self.spill_store.delete(task_id)
+
+    def snapshot(self) -> dict:
+        stats = self.tracker.snapshot()
+        if self.spill_store:
+            stats['spilled'] = self.spill_store.spilled
+            stats['spill_hits'] = self.spill_store.hits
+            stats['spill_purged'] = self.spill_store.purged
+        return stats
+
+
+# ============================================================================
+# Sessions, Artifacts and Memory
+# ============================================================================
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService with LRU, memory and idle-TTL eviction of sessions.
+
+    Sessions with an invocation in progress (last event not a final
+    response, within MAX_INVOCATION_SECONDS) are not evicted.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, max_bytes: int = 0, idle_ttl: float = 0.0):
+        super().__init__()
+        self.tracker = LruTracker(max_sessions, max_bytes, idle_ttl)
+
+    def _running(self, key) -> bool:
+        app_name, user_id, session_id = key
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if session is None or not session.events:
+            return False
+        last = session.events[-1]
+        return not last.is_final_response() and time.time() - last.timestamp < MAX_INVOCATION_SECONDS
+
+    def _evict(self, protect=None):
+        for key, reason in self.tracker.victims(lambda key: key != protect and not self._running(key)):
+            app_name, user_id, session_id = key
+            self._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+            if not self.sessions.get(app_name, {}).get(user_id, True):
+                del self.sessions[app_name][user_id]
+            self.tracker.record_eviction(key, reason)
+
+    async def create_session(self, *, app_name: str, user_id: str,
+                             state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        self.tracker.touch(key, size=OBJECT_OVERHEAD_BYTES)
+        self._evict(protect=key)
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config=None):
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self.tracker.touch((app_name, user_id, session_id))
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        if not event.partial and key in self.tracker:
+            self.tracker.touch(key, add_bytes=estimate_event_bytes(event))
+            self._evict(protect=key)
+        return event
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self.tracker.remove((app_name, user_id, session_id))
+
+    async def sweep(self):
+        """Evict idle sessions without waiting for the next write."""
+        self._evict()
+
+    def snapshot(self) -> dict:
+        return self.tracker.snapshot()
+
+
+class SharedSessionService(SqliteSessionService):
+    """ADK's SQLite session service, shared by the workers of one agent, with idle-TTL eviction.
+
+    Every worker reads and appends to the same sessions, so the turns of a
+    conversation (one A2A context ID) may land on any worker. Sessions with
+    no event for `idle_ttl` seconds are deleted, with their events, on sweeps.
+    """
+
+    def __init__(self, db_path: str, idle_ttl: float = 0.0):
+        super().__init__(db_path)
+        self.idle_ttl = idle_ttl
+        self.evicted = 0
+        conn = sqlite3.connect(db_path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode = WAL")  # workers read while another appends
+        conn.executescript(CREATE_SCHEMA_SQL)
+        conn.commit()
+        self.items = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        conn.close()
+
+    def _purge_idle(self) -> tuple[int, int]:
+        conn = sqlite3.connect(self._db_path, timeout=10.0)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")  # events go with their session
+            deleted = 0
+            if self.idle_ttl > 0:
+                deleted = conn.execute(
+                    "DELETE FROM sessions WHERE update_time < ?", (time.time() - self.idle_ttl,)
+                ).rowcount
+                conn.commit()
+            return deleted, conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        finally:
+            conn.close()
+
+    async def sweep(self):
+        """Delete idle sessions of every worker (any worker's sweep may do it)."""
+        deleted, self.items = await asyncio.to_thread(self._purge_idle)
+        self.evicted += deleted
+
+    def snapshot(self) -> dict:
+        # Counted on the last sweep: snapshots are taken at scrape time, off the database
+        return {'items': self.items, 'idle_ttl': self.idle_ttl, 'evictions': {'idle_ttl': self.evicted}}
+
+
+class BoundedArtifactService(InMemoryArtifactService):
+    """InMemoryArtifactService that evicts least-recently-used artifact paths."""
+
+    _tracker: LruTracker = PrivateAttr(default_factory=LruTracker)
+
+    def configure(self, max_artifacts: int = 0, max_bytes: int = 0, idle_ttl: float = 0.0):
+        self._tracker = LruTracker(max_artifacts, max_bytes, idle_ttl)
+        return self
+
+    async def save_artifact(self, *, app_name: str, user_id: str, filename: str, artifact,
+                            session_id: Optional[str] = None,
+                            custom_metadata: Optional[dict[str, Any]] = None) -> int:
+        version = await super().save_artifact(
+            app_name=app_name, user_id=user_id, filename=filename, artifact=artifact,
+            session_id=session_id, custom_metadata=custom_metadata,
+        )
+        path = self._artifact_path(app_name, user_id, filename, session_id)
+        size = _part_bytes(artifact)
+        if artifact.inline_data is not None and artifact.inline_data.data:
+            size += len(artifact.inline_data.data)
+        self._tracker.touch(path, add_bytes=size + OBJECT_OVERHEAD_BYTES)
+        self._evict(protect=path)
+        return version
+
+    def _evict(self, protect=None):
+        for key, reason in self._tracker.victims(lambda key: key != protect):
+            self.artifacts.pop(key, None)
+            self._tracker.record_eviction(key, reason)
+
+    async def sweep(self):
+        """Evict idle artifacts without waiting for the next write."""
+        self._evict()
+
+    async def load_artifact(self, *, app_name: str, user_id: str, filename: str,
+                            session_id: Optional[str] = None, version: Optional[int] = None):
+        artifact = await super().load_artifact(
+            app_name=app_name, user_id=user_id, filename=filename, session_id=session_id, version=version
+        )
+        path = self._artifact_path(app_name, user_id, filename, session_id)
+        if artifact is not None and path in self._tracker:
+            self._tracker.touch(path)
+        return artifact
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, filename: str,
+                              session_id: Optional[str] = None) -> None:
+        await super().delete_artifact(
+            app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+        )
+        self._tracker.remove(self._artifact_path(app_name, user_id, filename, session_id))
+
+    def snapshot(self) -> dict:
+        return self._tracker.snapshot()
+
+
+class BoundedMemoryService(InMemoryMemoryService):
+    """InMemoryMemoryService that evicts least-recently-added session memories."""
+
+    def __init__(self, max_sessions: int = 0, max_bytes: int = 0, idle_ttl: float = 0.0):
+        super().__init__()
+        _require_adk_internals(self, ADK_MEMORY_ATTRIBUTES, 'InMemoryMemoryService')
+        self.tracker = LruTracker(max_sessions, max_bytes, idle_ttl)
+
+    async def add_session_to_memory(self, session: Session):
+        await super().add_session_to_memory(session)
+        user_key = _user_key(session.app_name, session.user_id)
+        key = (user_key, session.id)
+        size = sum(estimate_event_bytes(e) for e in session.events if e.content and e.content.parts)
+        with self._lock:
+            self.tracker.touch(key, size=size)
+            self._evict(protect=key)
+
+    def _evict(self, protect=None):
+        for (victim_user, victim_session), reason in self.tracker.victims(lambda k: k != protect):
+            self._session_events.get(victim_user, {}).pop(victim_session, None)
+            if not self._session_events.get(victim_user, True):
+                del self._session_events[victim_user]
+            self.tracker.record_eviction((victim_user, victim_session), reason)
+
+    async def sweep(self):
+        """Evict idle memories without waiting for the next write."""
+        with self._lock:
+            self._evict()
+
+    def snapshot(self) -> dict:
+        return self.tracker.snapshot()
+
+
+async def sweep_stores(stores, interval: float):
+    """Evict idle entries of `stores` every `interval` seconds (eviction otherwise only runs on writes)."""
+    while True:
+        await asyncio.sleep(interval)
+        for store in stores:
+            try:
+                await store.sweep()
+            except Exception as e:
+                print(f"⚠️ Store sweep failed: {e}")
@@ -0,0 +1,96 @@
+"""
+Import-Time Budget Check
+Measures cold-start import time of the client and MCP entry points with `python -X importtime`
+and fails if a module exceeds its budget or pulls in a dependency it should load lazily
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_time_budgets.json')
+
+# --update sets budgets at --headroom times the median of the runs, and never
+# closer than this to it (small imports are noisy)
+MIN_SLACK_MS = 25
+
+
+def measure(module: str) -> tuple[float, set]:
+    """Cumulative import time of `module` (ms) and every module it loaded, from one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(BUDGETS_FILE),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    total_us, loaded = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        loaded.add(name.strip())
+        if name.strip() == module and not name.startswith('  '):
+            total_us = int(cumulative)
+    return total_us / 1000, loaded
+
+
+def check(budgets: dict, runs: int) -> list[dict]:
+    """Best-of-`runs` import time per module, compared with its budget (and the median, for --update)."""
+    results = []
+    for module, budget in budgets.items():
+        samples = [measure(module) for _ in range(runs)]
+        best_ms = min(ms for ms, _ in samples)
+        loaded = samples[0][1]
+        forbidden = sorted(name for name in budget.get('forbidden', []) if name in loaded)
+        results.append({
+            'module': module,
+            'ms': round(best_ms, 1),
+            'median_ms': round(statistics.median(ms for ms, _ in samples), 1),
+            'budget_ms': budget['max_ms'],
+            'forbidden_loaded': forbidden,
+            'ok': best_ms <= budget['max_ms'] and not forbidden,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module (best is kept)')
+    parser.add_argument('--update', action='store_true',
+                        help='Rewrite the budgets as the median times times --headroom')
+    parser.add_argument('--headroom', type=float, default=1.5)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with open(BUDGETS_FILE) as f:
+        budgets = json.load(f)
+    results = check(budgets, args.runs)
+
+    if args.update:
+        for result in results:
+            median_ms = result['median_ms']
+            budgets[result['module']]['max_ms'] = round(max(median_ms * args.headroom, median_ms + MIN_SLACK_MS))
+        with open(BUDGETS_FILE, 'w') as f:
+            json.dump(budgets, f, indent=2)
+            f.write('\n')
+        print(f"✅ Budgets updated in {BUDGETS_FILE}")
+        return
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            status = '✅' if result['ok'] else '⚠️ '
+            line = f"{status} {result['module']:<22} {result['ms']:8.1f}ms  (budget {result['budget_ms']}ms)"
+            if result['forbidden_loaded']:
+                line += f"  loads {', '.join(result['forbidden_loaded'])}"
+            print(line)
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
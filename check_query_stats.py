@@ -0,0 +1,83 @@
+"""
+Query Statistics Check
+Runs statements through every way the tools read rows (fetchone, fetchall, iterating a cursor or
+conn.execute, abandoning a cursor) and fails if one of them is missing from QUERY_STATS.top()
+"""
+import gc
+import os
+import sys
+import tempfile
+
+import query_stats
+from query_stats import QUERY_STATS, statement_shape
+
+ROWS = 25
+
+
+def run_statements(conn) -> dict:
+    """Run one statement per access pattern; returns the expected row count per statement."""
+    expected = {}
+
+    sql = "SELECT id FROM items WHERE id = 1"
+    conn.cursor().execute(sql).fetchone()
+    expected[sql] = 1
+
+    sql = "SELECT id FROM items WHERE id <= 10"
+    conn.cursor().execute(sql).fetchall()
+    expected[sql] = 10
+
+    sql = "SELECT id, name FROM items"
+    cursor = conn.cursor()
+    assert len([row for row in cursor.execute(sql)]) == ROWS
+    expected[sql] = ROWS
+
+    sql = "SELECT name FROM items WHERE id > 5"
+    assert len({row[0] for row in conn.execute(sql)}) == ROWS - 5
+    expected[sql] = ROWS - 5
+
+    sql = "SELECT id FROM items ORDER BY id DESC"
+    for _ in conn.execute(sql):
+        break  # abandoned after one row: recorded when the cursor is collected
+    gc.collect()
+    expected[sql] = 1
+
+    sql = "SELECT id FROM items WHERE id > 20"
+    cursor = conn.cursor()
+    next(iter(cursor.execute(sql)))
+    cursor.close()
+    expected[sql] = 1
+    return expected
+
+
+def main():
+    import mcp_service
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'check.db')
+        query_stats.configure(enabled=True, slow_ms=float('inf'), slow_log_path='')
+        QUERY_STATS.reset()
+        conn = mcp_service.get_db_connection(path)
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO items (name) VALUES (?)", [(f'item {i}',) for i in range(ROWS)])
+        conn.commit()
+        QUERY_STATS.reset()
+        expected = run_statements(conn)
+        conn.close()
+
+    recorded = {row['statement']: row for row in QUERY_STATS.top(limit=100)}
+    failures = 0
+    for sql, rows in expected.items():
+        row = recorded.get(statement_shape(sql))
+        if row is None:
+            print(f"⚠️  not recorded: {sql}")
+            failures += 1
+        elif row['rows'] != rows:
+            print(f"⚠️  {sql}: {row['rows']} rows recorded, expected {rows}")
+            failures += 1
+        else:
+            print(f"✅ {sql}  ({row['calls']} call, {row['rows']} rows)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
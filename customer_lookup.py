@@ -0,0 +1,143 @@
+"""
+Customer Lookup
+Finds customers by email, phone or name through normalized expression indexes and a trigram name index
+"""
+import string
+from typing import Optional
+
+from db_initialize import EMAIL_KEY_SQL, NAME_KEY_SQL, PHONE_KEY_SQL, PHONE_SEPARATORS
+from sharding import scatter
+
+MAX_LIMIT = 20
+
+# FTS5 trigram queries need at least one whole trigram
+MIN_SUBSTRING_CHARS = 3
+
+# Candidates read per shard for substring name matches, per requested match:
+# common substrings match many names, and word-start matches rank higher
+SUBSTRING_CANDIDATES = 4
+
+# Points per matching field; a customer's score is the sum, so matching on
+# several fields outranks any single one
+MATCH_SCORES = {
+    'email': 10,
+    'phone': 8,
+    'name_exact': 6,
+    'name_prefix': 4,
+    'name_word': 3,
+    'name_contains': 2,
+}
+
+# SQLite's lower() folds ASCII only; keys must be folded the same way to hit the indexes
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_PHONE_SEPARATORS = str.maketrans('', '', PHONE_SEPARATORS)
+
+# The largest code point: key + it bounds every key starting with `key`
+_PREFIX_END = '\U0010ffff'
+
+
+def normalize_email(email: str) -> str:
+    return email.strip(' ').translate(_ASCII_LOWER)
+
+
+def normalize_phone(phone: str) -> str:
+    return phone.translate(_PHONE_SEPARATORS)
+
+
+def normalize_name(name: str) -> str:
+    return name.strip(' ').translate(_ASCII_LOWER)
+
+
+_lookup_ready = set()
+
+
+def _ensure_customer_lookup(conn):
+    """Build the lookup indexes on first use in databases created before they existed."""
+    if conn.db_label not in _lookup_ready:
+        from db_initialize import create_customer_lookup
+        create_customer_lookup(conn.cursor())
+        conn.commit()
+        _lookup_ready.add(conn.db_label)
+
+
+def _search_shard(path: str, email: Optional[str], phone: Optional[str], name: Optional[str], limit: int) -> list:
+    """Candidate customer rows of one shard, each found through an index."""
+    import mcp_service
+
+    conn = mcp_service.get_db_connection(path)
+    try:
+        _ensure_customer_lookup(conn)
+        cursor = conn.cursor()
+        rows = []
+        if email:
+            cursor.execute(f"SELECT * FROM customers WHERE {EMAIL_KEY_SQL} = ? LIMIT ?", (email, limit))
+            rows.extend(cursor.fetchall())
+        if phone:
+            cursor.execute(f"SELECT * FROM customers WHERE {PHONE_KEY_SQL} = ? LIMIT ?", (phone, limit))
+            rows.extend(cursor.fetchall())
+        if name:
+            # Exact match sorts first in the prefix range
+            cursor.execute(
+                f"SELECT * FROM customers WHERE {NAME_KEY_SQL} >= ? AND {NAME_KEY_SQL} < ? ORDER BY {NAME_KEY_SQL} LIMIT ?",
+                (name, name + _PREFIX_END, limit),
+            )
+            rows.extend(cursor.fetchall())
+            if len(name) >= MIN_SUBSTRING_CHARS:
+                cursor.execute(
+                    """
+                    SELECT c.* FROM customer_name_index
+                    JOIN customers c ON c.id = customer_name_index.rowid
+                    WHERE customer_name_index MATCH ? LIMIT ?
+                    """,
+                    ('"' + name.replace('"', '""') + '"', limit * SUBSTRING_CANDIDATES),
+                )
+                rows.extend(cursor.fetchall())
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def name_match(candidate: Optional[str], name: str) -> Optional[str]:
+    """How a customer's name matches the normalized search name, or None."""
+    key = normalize_name(candidate or '')
+    if key == name:
+        return 'name_exact'
+    if key.startswith(name):
+        return 'name_prefix'
+    if any(word.startswith(name) for word in key.split()):
+        return 'name_word'
+    # The trigram index folds case beyond ASCII
+    if name in key or name.lower() in key.lower():
+        return 'name_contains'
+    return None
+
+
+def find_customers(email: Optional[str] = None, phone: Optional[str] = None, name: Optional[str] = None,
+                   limit: int = 5) -> list[dict]:
+    """Customers matching any of the given fields, best first (ties: lowest ID), with the fields that matched."""
+    import mcp_service
+
+    limit = max(1, min(limit, MAX_LIMIT))
+    email = normalize_email(email) if email else None
+    phone = normalize_phone(phone) if phone else None
+    name = normalize_name(name) if name else None
+    if not (email or phone or name):
+        return []
+
+    results = scatter(mcp_service.db_shard_paths(), lambda path: _search_shard(path, email, phone, name, limit))
+    candidates = {row['id']: row for rows in results for row in rows}
+    matches = []
+    for customer in candidates.values():
+        matched = []
+        if email and normalize_email(customer['email'] or '') == email:
+            matched.append('email')
+        if phone and normalize_phone(customer['phone'] or '') == phone:
+            matched.append('phone')
+        if name:
+            how = name_match(customer['name'], name)
+            if how:
+                matched.append(how)
+        if matched:
+            matches.append({**customer, 'matched': matched, 'score': sum(MATCH_SCORES[field] for field in matched)})
+    matches.sort(key=lambda match: (-match['score'], match['id']))
+    return matches[:limit]
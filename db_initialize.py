@@ -5,12 +5,190 @@ Sets up multi_agent_service.db with tables and seed data
 import sqlite3
 import datetime
 
-def create_database():
-    conn = sqlite3.connect('multi_agent_service.db')
+DB_PATH = 'multi_agent_service.db'
+
+# Append-only change feed of tickets and customers. Triggers write it in the
+# same transaction as the change; `seq` never decreases or repeats, so
+# consumers resume from the last sequence they saw (see ticket_events.py)
+TICKET_EVENTS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS ticket_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        ticket_id INTEGER,
+        customer_id INTEGER,
+        payload TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS ticket_events_ticket_created AFTER INSERT ON tickets
+    BEGIN
+        INSERT INTO ticket_events (event_type, ticket_id, customer_id, payload)
+        VALUES ('ticket_created', NEW.id, NEW.customer_id,
+                json_object('issue', NEW.issue, 'status', NEW.status, 'priority', NEW.priority));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS ticket_events_ticket_updated AFTER UPDATE ON tickets
+    WHEN OLD.status IS NOT NEW.status OR OLD.priority IS NOT NEW.priority OR OLD.issue IS NOT NEW.issue
+    BEGIN
+        INSERT INTO ticket_events (event_type, ticket_id, customer_id, payload)
+        VALUES ('ticket_updated', NEW.id, NEW.customer_id,
+                json_object('issue', NEW.issue, 'status', NEW.status, 'priority', NEW.priority,
+                            'previous_status', OLD.status));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS ticket_events_customer_updated AFTER UPDATE ON customers
+    BEGIN
+        INSERT INTO ticket_events (event_type, ticket_id, customer_id, payload)
+        VALUES ('customer_updated', NULL, NEW.id,
+                json_object('name', NEW.name, 'email', NEW.email, 'phone', NEW.phone, 'status', NEW.status));
+    END
+    ''',
+]
+
+def create_ticket_events(cursor):
+    """Add the ticket_events outbox and its triggers (idempotent, also upgrades existing databases)."""
+    for statement in TICKET_EVENTS_SCHEMA:
+        cursor.execute(statement)
+
+# Most recent tickets embedded in a customer profile
+PROFILE_RECENT_TICKETS = 5
+
+# One pre-serialized JSON document per customer (customer fields, ticket
+# summary, recent tickets), served as-is by get_customer_profile. Rebuilt for
+# one customer at a time by the triggers below, in the writer's transaction.
+PROFILE_DOCUMENT_SQL = f'''
+    SELECT c.id, json_object(
+        'customer', json_object(
+            'id', c.id, 'name', c.name, 'email', c.email, 'phone', c.phone,
+            'status', c.status, 'created_at', c.created_at, 'updated_at', c.updated_at),
+        'ticket_summary', (
+            SELECT json_object(
+                'total', COUNT(*),
+                'open', COALESCE(SUM(t.status = 'open'), 0),
+                'in_progress', COALESCE(SUM(t.status = 'in_progress'), 0),
+                'resolved', COALESCE(SUM(t.status = 'resolved'), 0),
+                'unresolved_high_priority', COALESCE(SUM(t.status != 'resolved' AND t.priority = 'high'), 0),
+                'last_ticket_at', MAX(t.created_at))
+            FROM tickets t WHERE t.customer_id = c.id),
+        'recent_tickets', (
+            SELECT json_group_array(json_object(
+                'id', r.id, 'issue', r.issue, 'status', r.status, 'priority', r.priority, 'created_at', r.created_at))
+            FROM (SELECT * FROM tickets WHERE customer_id = c.id
+                  ORDER BY created_at DESC, id DESC LIMIT {PROFILE_RECENT_TICKETS}) r)
+    ), CURRENT_TIMESTAMP
+    FROM customers c
+'''
+
+def _refresh_profile(customer_id: str) -> str:
+    return f"INSERT OR REPLACE INTO customer_profiles (customer_id, document, updated_at) {PROFILE_DOCUMENT_SQL} WHERE c.id = {customer_id};"
+
+CUSTOMER_PROFILES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS customer_profiles (
+        customer_id INTEGER PRIMARY KEY,
+        document TEXT NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # The refresh reads one customer's tickets
+    "CREATE INDEX IF NOT EXISTS idx_tickets_customer_id ON tickets (customer_id)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_customer_created AFTER INSERT ON customers
+    BEGIN {_refresh_profile('NEW.id')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_customer_updated AFTER UPDATE ON customers
+    BEGIN {_refresh_profile('NEW.id')} END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_customer_deleted AFTER DELETE ON customers
+    BEGIN DELETE FROM customer_profiles WHERE customer_id = OLD.id; END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_ticket_created AFTER INSERT ON tickets
+    BEGIN {_refresh_profile('NEW.customer_id')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_ticket_updated AFTER UPDATE ON tickets
+    BEGIN {_refresh_profile('NEW.customer_id')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_ticket_moved AFTER UPDATE OF customer_id ON tickets
+    WHEN OLD.customer_id IS NOT NEW.customer_id
+    BEGIN {_refresh_profile('OLD.customer_id')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customer_profiles_ticket_deleted AFTER DELETE ON tickets
+    BEGIN {_refresh_profile('OLD.customer_id')} END
+    """,
+]
+
+def create_customer_profiles(cursor):
+    """Add customer_profiles with its triggers and build every profile (idempotent, also upgrades existing databases)."""
+    for statement in CUSTOMER_PROFILES_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute(f"INSERT OR REPLACE INTO customer_profiles (customer_id, document, updated_at) {PROFILE_DOCUMENT_SQL}")
+
+# Normalized lookup keys of customers, indexed as expressions: SQLite keeps the
+# indexes current on every write, and find_customer queries the same expressions
+# with keys normalized the same way in Python (see customer_lookup.py)
+PHONE_SEPARATORS = ' -().+'
+EMAIL_KEY_SQL = "lower(trim(email))"
+NAME_KEY_SQL = "lower(trim(name))"
+PHONE_KEY_SQL = 'phone'
+for _separator in PHONE_SEPARATORS:
+    PHONE_KEY_SQL = f"replace({PHONE_KEY_SQL}, '{_separator}', '')"
+
+CUSTOMER_LOOKUP_SCHEMA = [
+    f"CREATE INDEX IF NOT EXISTS idx_customers_email_key ON customers ({EMAIL_KEY_SQL})",
+    f"CREATE INDEX IF NOT EXISTS idx_customers_phone_key ON customers ({PHONE_KEY_SQL})",
+    # Exact and prefix matches on the whole name
+    f"CREATE INDEX IF NOT EXISTS idx_customers_name_key ON customers ({NAME_KEY_SQL})",
+    # Substring matches anywhere in the name (last names, partial names): an
+    # FTS5 trigram index over customers.name, kept in sync by the triggers below
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS customer_name_index
+    USING fts5(name, content='customers', content_rowid='id', tokenize='trigram')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customer_name_index_created AFTER INSERT ON customers
+    BEGIN INSERT INTO customer_name_index (rowid, name) VALUES (NEW.id, NEW.name); END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customer_name_index_renamed AFTER UPDATE OF name ON customers
+    BEGIN
+        INSERT INTO customer_name_index (customer_name_index, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        INSERT INTO customer_name_index (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customer_name_index_deleted AFTER DELETE ON customers
+    BEGIN INSERT INTO customer_name_index (customer_name_index, rowid, name) VALUES ('delete', OLD.id, OLD.name); END
+    """,
+]
+
+def create_customer_lookup(cursor):
+    """Add the customer email/phone/name indexes (idempotent, also upgrades existing databases)."""
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'customer_name_index'").fetchone()
+    for statement in CUSTOMER_LOOKUP_SCHEMA:
+        cursor.execute(statement)
+    if not exists:
+        # Index the names already there; later writes go through the triggers
+        cursor.execute("INSERT INTO customer_name_index (customer_name_index) VALUES ('rebuild')")
+
+def create_database(db_path=DB_PATH, with_triggers=True):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     # Initialize multi-agent service database with deterministic test data
     cursor.execute("PRAGMA foreign_keys = OFF;")
+    cursor.execute("DROP TABLE IF EXISTS customer_name_index;")
+    cursor.execute("DROP TABLE IF EXISTS customer_profiles;")
+    cursor.execute("DROP TABLE IF EXISTS ticket_events;")
     cursor.execute("DROP TABLE IF EXISTS tickets;")
     cursor.execute("DROP TABLE IF EXISTS customers;")
     cursor.execute("PRAGMA foreign_keys = ON;")
@@ -70,9 +248,27 @@ def create_database():
     INSERT INTO tickets (customer_id, issue, status, priority) VALUES (?, ?, ?, ?)
     ''', tickets)
 
+    # After the seed data: the feed starts with the first change made to it,
+    # and the profiles are built once and then kept up to date by triggers
+    if with_triggers:
+        create_ticket_events(cursor)
+        create_customer_profiles(cursor)
+        create_customer_lookup(cursor)
+
     conn.commit()
     conn.close()
     print("Database created and initialized with deterministic test data.")
 
 if __name__ == '__main__':
-    create_database()
+    import sys
+    if '--migrate' in sys.argv:
+        # Add the ticket_events outbox, customer profiles and lookup indexes to an existing database, keeping its data
+        conn = sqlite3.connect(DB_PATH)
+        create_ticket_events(conn.cursor())
+        create_customer_profiles(conn.cursor())
+        create_customer_lookup(conn.cursor())
+        conn.commit()
+        conn.close()
+        print("ticket_events outbox, customer_profiles and customer lookup indexes added.")
+    else:
+        create_database()
@@ -3,23 +3,41 @@ Demo Scenarios Runner
 Executes multi-agent test scenarios with conversation support
 """
 import asyncio
+import time
+import uuid
 from typing import Optional
 from agent_client import call_agent
+from prefetch import detect_customer_id
+from service_config import agent_url
+from tracing import setup_tracing, shutdown_tracing, span
 
-ROUTER_AGENT_URL = "http://localhost:10020"
+ROUTER_AGENT_URL = agent_url("router")
 
 class ConversationSession:
-    """Manages a multi-turn conversation session."""
+    """Manages a multi-turn conversation session.
+
+    Every turn carries the same A2A context ID and only the new message is
+    sent; the agents keep the conversation in their ADK sessions (shared by
+    an agent's workers, see SESSION_DB). With `server_state=False` recent
+    history is embedded in each message instead.
+    """
     
-    def __init__(self, agent_url: str):
+    def __init__(self, agent_url: str, server_state: bool = True):
         self.agent_url = agent_url
+        self.server_state = server_state
         self.conversation_history = []
-        self.session_id = None
+        self.session_id = str(uuid.uuid4()) if server_state else None
         self.customer_id = None
+        self.last_error = None
+        self.last_ttfb = None
         
     async def send_message(self, message: str) -> str:
         """Send a message and maintain conversation context."""
         try:
+            # Pick up a customer ID before sending, so it reaches the agents
+            # with this turn (they prefetch that customer's data)
+            self.customer_id = detect_customer_id(message) or self.customer_id
+
             # Build context from history
             context = {
                 "message": message,
@@ -28,7 +46,18 @@ class ConversationSession:
                 "customer_id": self.customer_id
             }
             
-            response = await call_agent(self.agent_url, message, context=context)
+            self.last_error = None
+            self.last_ttfb = None
+            started = time.perf_counter()
+            
+            def on_first_event():
+                self.last_ttfb = time.perf_counter() - started
+            
+            # Root span of the turn; its traceparent reaches every agent and tool
+            with span('conversation.turn', **{'conversation.id': self.session_id or ''}):
+                response = await call_agent(
+                    self.agent_url, message, context=context, on_first_event=on_first_event
+                )
             
             # Update conversation history
             self.conversation_history.append({
@@ -36,25 +65,17 @@ class ConversationSession:
                 "assistant": response
             })
             
-            # Extract customer_id if mentioned in the conversation
-            if not self.customer_id and "customer" in message.lower():
-                # Simple extraction - you might want to make this more robust
-                words = message.split()
-                for i, word in enumerate(words):
-                    if word.lower() in ["id", "customer"] and i + 1 < len(words):
-                        try:
-                            self.customer_id = int(words[i + 1])
-                        except ValueError:
-                            pass
-            
             return response
         except Exception as e:
+            self.last_error = e
             return f"Error: {e}"
     
     def clear_history(self):
         """Clear conversation history."""
         self.conversation_history = []
         self.customer_id = None
+        if self.server_state:
+            self.session_id = str(uuid.uuid4())
 
 
 async def run_interactive_mode():
@@ -108,6 +129,40 @@ async def run_interactive_mode():
         print(response)
 
 
+# Scripted multi-turn scenarios (also replayed by load_test.py)
+DEMO_SCENARIOS = [
+    {
+        "name": "upgrade_with_id_followup",
+        "title": "Multi-turn customer support with ID follow-up",
+        "turns": [
+            "I need help upgrading my account",
+            "My customer ID is 12345",
+            "What options do I have?",
+        ],
+    },
+    {
+        "name": "billing_escalation",
+        "title": "Billing issue with multiple follow-ups",
+        "turns": [
+            "I have a billing problem",
+            "I was charged twice for my subscription",
+            "My customer ID is 5",
+            "Can you issue a refund?",
+        ],
+    },
+    {
+        "name": "email_update",
+        "title": "Email update with verification",
+        "turns": [
+            "I want to update my contact information",
+            "Customer ID 5, please update my email",
+            "New email is evan.new@example.com",
+            "Can you show me my updated information?",
+        ],
+    },
+]
+
+
 async def run_test_scenarios():
     """Run predefined test scenarios with multi-turn conversations."""
     print("=" * 60)
@@ -116,78 +171,21 @@ async def run_test_scenarios():
     print("=" * 60)
     print("\nStarting test scenarios...\n")
     
-    # Scenario 1: Customer needs help, provides ID in follow-up
-    print("\n" + "=" * 60)
-    print("SCENARIO 1: Multi-turn customer support with ID follow-up")
-    print("=" * 60)
-    
-    session1 = ConversationSession(ROUTER_AGENT_URL)
-    
-    print("\n[User]: I need help upgrading my account")
-    response = await session1.send_message("I need help upgrading my account")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: My customer ID is 12345")
-    response = await session1.send_message("My customer ID is 12345")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: What options do I have?")
-    response = await session1.send_message("What options do I have?")
-    print(f"[Agent]: {response}\n")
-    
-    # Scenario 2: Billing issue with escalation
-    print("\n" + "=" * 60)
-    print("SCENARIO 2: Billing issue with multiple follow-ups")
-    print("=" * 60)
-    
-    session2 = ConversationSession(ROUTER_AGENT_URL)
-    
-    print("\n[User]: I have a billing problem")
-    response = await session2.send_message("I have a billing problem")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: I was charged twice for my subscription")
-    response = await session2.send_message("I was charged twice for my subscription")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: My customer ID is 5")
-    response = await session2.send_message("My customer ID is 5")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: Can you issue a refund?")
-    response = await session2.send_message("Can you issue a refund?")
-    print(f"[Agent]: {response}\n")
-    
-    # Scenario 3: Email update with verification
-    print("\n" + "=" * 60)
-    print("SCENARIO 3: Email update with verification")
-    print("=" * 60)
-    
-    session3 = ConversationSession(ROUTER_AGENT_URL)
-    
-    print("\n[User]: I want to update my contact information")
-    response = await session3.send_message("I want to update my contact information")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: Customer ID 5, please update my email")
-    response = await session3.send_message("Customer ID 5, please update my email")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: New email is evan.new@example.com")
-    response = await session3.send_message("New email is evan.new@example.com")
-    print(f"[Agent]: {response}\n")
-    await asyncio.sleep(1)
-    
-    print("[User]: Can you show me my updated information?")
-    response = await session3.send_message("Can you show me my updated information?")
-    print(f"[Agent]: {response}\n")
+    for number, scenario in enumerate(DEMO_SCENARIOS, 1):
+        print("\n" + "=" * 60)
+        print(f"SCENARIO {number}: {scenario['title']}")
+        print("=" * 60)
+        
+        session = ConversationSession(ROUTER_AGENT_URL)
+        
+        for i, turn in enumerate(scenario["turns"]):
+            if i == 0:
+                print(f"\n[User]: {turn}")
+            else:
+                await asyncio.sleep(1)
+                print(f"[User]: {turn}")
+            response = await session.send_message(turn)
+            print(f"[Agent]: {response}\n")
     
     print("\n" + "=" * 60)
     print("All test scenarios completed!")
@@ -198,10 +196,12 @@ async def main():
     """Main entry point - choose mode."""
     import sys
     
+    setup_tracing("demo_client")
     if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
         await run_interactive_mode()
     else:
         await run_test_scenarios()
+    shutdown_tracing()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+JSON-RPC Batching
+ASGI middleware accepting JSON-RPC 2.0 batch requests on an A2A endpoint
+"""
+import asyncio
+import json
+
+from metrics import REGISTRY
+
+# Methods answering with an event stream cannot share a batch response
+STREAMING_METHODS = ('message/stream', 'tasks/resubscribe')
+
+DEFAULT_MAX_BATCH = 20
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+# Implementation-defined server error: the sub-request was rejected before reaching the agent
+SERVER_BUSY = -32000
+
+BATCH_SIZE = REGISTRY.histogram(
+    'a2a_batch_size', 'Requests per JSON-RPC batch', ('agent',), buckets=(1, 2, 4, 8, 16, 32, 64))
+
+
+def _error(request_id, code: int, message: str, data=None) -> dict:
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+class JsonRpcBatchMiddleware:
+    """Splits a JSON-RPC batch (a JSON array body) into single requests.
+
+    Each element is dispatched to the wrapped app as its own POST, so
+    admission control, metrics and tracing see every request, and the
+    elements run concurrently. Responses are returned as one JSON array in
+    request order; notifications (no "id") get no entry. Streaming methods
+    are answered with an error, since their responses are event streams.
+    Non-batch requests pass straight through.
+    """
+
+    def __init__(self, app, agent: str, rpc_path: str = '/', max_batch: int = DEFAULT_MAX_BATCH):
+        self.app = app
+        self.rpc_path = rpc_path
+        self.max_batch = max_batch
+        self.batch_size = BATCH_SIZE.labels(agent)
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['method'] != 'POST'
+                or scope['path'] != self.rpc_path or self.max_batch <= 0):
+            return await self.app(scope, receive, send)
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        if not body.lstrip().startswith(b'['):
+            return await self.app(scope, self._replay(body, receive), send)
+
+        try:
+            batch = json.loads(body)
+        except ValueError:
+            return await self._send_json(send, 200, _error(None, PARSE_ERROR, 'Parse error'))
+        if not batch:
+            return await self._send_json(send, 200, _error(None, INVALID_REQUEST, 'Empty batch'))
+        if len(batch) > self.max_batch:
+            return await self._send_json(
+                send, 200, _error(None, INVALID_REQUEST, f'Batch too large (max {self.max_batch} requests)'))
+
+        self.batch_size.observe(len(batch))
+        responses = await asyncio.gather(*(self._dispatch(scope, receive, request) for request in batch))
+        responses = [response for response in responses if response is not None]
+        if not responses:
+            # Only notifications: nothing to return
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+            return await send({'type': 'http.response.body', 'body': b''})
+        await self._send_json(send, 200, responses)
+
+    async def _dispatch(self, scope, receive, request):
+        """Run one batch element through the app; returns its JSON-RPC response (None for notifications)."""
+        if not isinstance(request, dict):
+            return _error(None, INVALID_REQUEST, 'Invalid Request')
+        request_id = request.get('id')
+        if request.get('method') in STREAMING_METHODS:
+            return _error(request_id, INVALID_REQUEST, f"{request['method']} cannot be batched")
+
+        body = json.dumps(request).encode()
+        # Elements are decoded here, so their responses must stay uncompressed
+        headers = [(key, value) for key, value in scope['headers']
+                   if key not in (b'content-length', b'accept-encoding')]
+        headers.append((b'content-length', str(len(body)).encode()))
+        sub_scope = {**scope, 'headers': headers}
+
+        status = 500
+        chunks = []
+        response_headers = {}
+
+        async def sub_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers.update(message.get('headers', []))
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        try:
+            await self.app(sub_scope, self._replay(body, receive), sub_send)
+        except Exception as e:
+            return _error(request_id, INTERNAL_ERROR, f'Internal error: {e}')
+
+        if 'id' not in request:
+            return None
+        payload = b''.join(chunks)
+        if status == 200:
+            try:
+                return json.loads(payload)
+            except ValueError:
+                pass
+        if status == 429:
+            return _error(request_id, SERVER_BUSY, 'Server overloaded, retry later', {
+                'status': 429,
+                'retry_after': response_headers.get(b'retry-after', b'').decode() or None,
+            })
+        return _error(request_id, INTERNAL_ERROR, f'HTTP {status}', {'status': status})
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        """`receive` returning the buffered body first, then the real channel (disconnects)."""
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        return replay_receive
+
+    @staticmethod
+    async def _send_json(send, status: int, payload):
+        body = json.dumps(payload).encode()
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
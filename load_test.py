@@ -0,0 +1,261 @@
+"""
+Load Test Runner
+Replays conversation scenarios as concurrent virtual users through ConversationSession
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Optional
+
+from benchmark_utils import summarize
+from demo_scenarios import DEMO_SCENARIOS, ROUTER_AGENT_URL, ConversationSession
+from tracing import setup_tracing, shutdown_tracing
+
+
+def load_scenarios(path: Optional[str]) -> list[dict]:
+    """Load scenarios from a JSON file, or fall back to the demo scenarios.
+
+    The file holds a list of {"name": ..., "turns": [...]} objects.
+    """
+    if not path:
+        return DEMO_SCENARIOS
+    with open(path) as f:
+        scenarios = json.load(f)
+    for i, scenario in enumerate(scenarios):
+        scenario.setdefault('name', f'scenario_{i + 1}')
+    return scenarios
+
+
+class LoadTestRecorder:
+    """Collects per-turn and per-scenario measurements."""
+
+    def __init__(self):
+        self.turns = []
+        self.scenarios = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.arrivals = 0  # open-loop arrivals, including those dropped at the concurrency cap
+        self.dropped = 0
+
+    def record_arrival(self, dropped: bool):
+        self.arrivals += 1
+        if dropped:
+            self.dropped += 1
+
+    def record_turn(self, scenario: str, turn_index: int, latency: float, ttfb: Optional[float], error: Optional[str]):
+        self.turns.append({
+            'scenario': scenario,
+            'turn': turn_index,
+            'latency': latency,
+            'ttfb': ttfb,
+            'error': error,
+        })
+
+    def record_scenario(self, scenario: str, duration: float, failed: bool):
+        self.scenarios.append({'scenario': scenario, 'duration': duration, 'failed': failed})
+
+    def report(self, elapsed: float, settings: dict) -> dict:
+        """Build the machine-readable report."""
+        ok_turns = [t for t in self.turns if not t['error']]
+        errors = defaultdict(int)
+        for t in self.turns:
+            if t['error']:
+                errors[t['error'][:120]] += 1
+
+        by_turn = defaultdict(list)
+        by_scenario = defaultdict(list)
+        for t in ok_turns:
+            by_turn[(t['scenario'], t['turn'])].append(t['latency'])
+        for s in self.scenarios:
+            by_scenario[s['scenario']].append(s)
+
+        report = {
+            'settings': settings,
+            'elapsed_sec': elapsed,
+            'turns': {
+                'total': len(self.turns),
+                'errors': len(self.turns) - len(ok_turns),
+                'error_rate': (len(self.turns) - len(ok_turns)) / len(self.turns) if self.turns else 0.0,
+                'throughput_per_sec': len(ok_turns) / elapsed if elapsed else 0.0,
+                'latency': summarize([t['latency'] for t in ok_turns]),
+                'ttfb': summarize([t['ttfb'] for t in ok_turns if t['ttfb'] is not None]),
+            },
+            'scenarios': {
+                name: {
+                    'completed': len(runs),
+                    'succeeded': sum(1 for r in runs if not r['failed']),
+                    'failed': sum(1 for r in runs if r['failed']),
+                    'throughput_per_sec': sum(1 for r in runs if not r['failed']) / elapsed if elapsed else 0.0,
+                    'duration': summarize([r['duration'] for r in runs if not r['failed']]),
+                    'turns': {
+                        str(turn): summarize(samples)
+                        for (scenario, turn), samples in sorted(by_turn.items())
+                        if scenario == name
+                    },
+                }
+                for name, runs in by_scenario.items()
+            },
+            'errors': dict(errors),
+            'peak_in_flight': self.peak_in_flight,
+        }
+        if self.arrivals:
+            # Rates over the arrival window (ramp-up + duration), not the drain after it
+            window = settings['ramp_up'] + settings['duration']
+            started = self.arrivals - self.dropped
+            report['arrivals'] = {
+                'offered': self.arrivals,
+                'started': started,
+                'dropped': self.dropped,
+                'drop_rate': self.dropped / self.arrivals,
+                'offered_rate_per_sec': self.arrivals / window if window else 0.0,
+                'achieved_rate_per_sec': started / window if window else 0.0,
+            }
+        return report
+
+
+async def run_scenario(agent_url: str, scenario: dict, recorder: LoadTestRecorder, think_time: float):
+    """Run one scenario as a fresh conversation."""
+    session = ConversationSession(agent_url)
+    started = time.perf_counter()
+    failed = False
+    recorder.in_flight += 1
+    recorder.peak_in_flight = max(recorder.peak_in_flight, recorder.in_flight)
+    try:
+        for i, turn in enumerate(scenario['turns']):
+            if i and think_time:
+                await asyncio.sleep(random.expovariate(1.0 / think_time))
+            turn_started = time.perf_counter()
+            await session.send_message(turn)
+            error = repr(session.last_error) if session.last_error else None
+            recorder.record_turn(scenario['name'], i + 1, time.perf_counter() - turn_started, session.last_ttfb, error)
+            if error:
+                failed = True
+                break
+    finally:
+        recorder.in_flight -= 1
+    recorder.record_scenario(scenario['name'], time.perf_counter() - started, failed)
+
+
+async def run_closed_loop(args, scenarios: list[dict], recorder: LoadTestRecorder):
+    """N virtual users, each running scenarios back to back until the deadline."""
+    deadline = time.perf_counter() + args.ramp_up + args.duration
+
+    async def virtual_user(user_index: int):
+        await asyncio.sleep(args.ramp_up * user_index / args.users)
+        iteration = 0
+        while time.perf_counter() < deadline:
+            if args.iterations and iteration >= args.iterations:
+                break
+            scenario = scenarios[(user_index + iteration) % len(scenarios)]
+            await run_scenario(args.url, scenario, recorder, args.think_time)
+            iteration += 1
+
+    await asyncio.gather(*(virtual_user(i) for i in range(args.users)))
+
+
+async def run_open_loop(args, scenarios: list[dict], recorder: LoadTestRecorder):
+    """Start new conversations as a Poisson process, ramping up to the target rate."""
+    started = time.perf_counter()
+    deadline = started + args.ramp_up + args.duration
+    tasks = []
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if args.ramp_up and now - started < args.ramp_up:
+            rate = max(args.rate * (now - started) / args.ramp_up, args.rate * 0.05)
+        else:
+            rate = args.rate
+        await asyncio.sleep(random.expovariate(rate))
+        if args.users and recorder.in_flight >= args.users:
+            # Over the concurrency cap: counted as dropped rather than silently lowering the offered rate
+            recorder.record_arrival(dropped=True)
+            continue
+        scenario = scenarios[(recorder.arrivals - recorder.dropped) % len(scenarios)]
+        recorder.record_arrival(dropped=False)
+        tasks.append(asyncio.create_task(run_scenario(args.url, scenario, recorder, args.think_time)))
+    await asyncio.gather(*tasks)
+
+
+def print_summary(report: dict):
+    """Print a human-readable summary of the report."""
+    def ms(value):
+        return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+    turns = report['turns']
+    print("\n" + "=" * 60)
+    print("Load Test Results")
+    print("=" * 60)
+    print(f"Elapsed:          {report['elapsed_sec']:.1f}s")
+    print(f"Turns:            {turns['total']} ({turns['errors']} errors, {turns['error_rate']:.1%})")
+    print(f"Throughput:       {turns['throughput_per_sec']:.2f} turns/sec")
+    print(f"Peak in-flight:   {report['peak_in_flight']}")
+    if 'arrivals' in report:
+        arrivals = report['arrivals']
+        print(f"Arrivals:         {arrivals['offered']} offered, {arrivals['started']} started, "
+              f"{arrivals['dropped']} dropped at the concurrency cap ({arrivals['drop_rate']:.1%})")
+        print(f"Arrival rate:     {arrivals['offered_rate_per_sec']:.2f}/sec offered, "
+              f"{arrivals['achieved_rate_per_sec']:.2f}/sec achieved")
+    print(f"\n{'':28}{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(f"{'turn latency':28}{ms(turns['latency']['p50'])} {ms(turns['latency']['p95'])} {ms(turns['latency']['p99'])}")
+    print(f"{'time to first byte':28}{ms(turns['ttfb']['p50'])} {ms(turns['ttfb']['p95'])} {ms(turns['ttfb']['p99'])}")
+    for name, scenario in report['scenarios'].items():
+        duration = scenario['duration']
+        print(f"\n{name} ({scenario['completed']} runs: {scenario['succeeded']} succeeded, {scenario['failed']} failed)")
+        print(f"  {'scenario':26}{ms(duration['p50'])} {ms(duration['p95'])} {ms(duration['p99'])}")
+        for turn, stats in scenario['turns'].items():
+            print(f"  {'turn ' + turn:26}{ms(stats['p50'])} {ms(stats['p95'])} {ms(stats['p99'])}")
+    if report['errors']:
+        print("\nErrors:")
+        for error, count in report['errors'].items():
+            print(f"  {count:5d}  {error}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default=ROUTER_AGENT_URL, help='Agent URL to load (default: router)')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed',
+                        help='closed: fixed virtual users; open: Poisson arrivals at --rate')
+    parser.add_argument('--users', type=int, default=10,
+                        help='Virtual users (closed) or max concurrent conversations (open, 0 = unbounded)')
+    parser.add_argument('--rate', type=float, default=1.0, help='Conversations started per second (open loop)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of steady-state load after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds to ramp users/arrival rate up')
+    parser.add_argument('--iterations', type=int, default=0, help='Scenarios per virtual user (closed, 0 = until duration)')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean seconds between turns')
+    parser.add_argument('--scenarios', help='JSON file with custom scenarios')
+    parser.add_argument('--report', default='load_test_report.json', help='Where to write the JSON report')
+    parser.add_argument('--seed', type=int, help='Random seed for arrivals and think time')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    setup_tracing('load_test')
+    scenarios = load_scenarios(args.scenarios)
+    recorder = LoadTestRecorder()
+
+    print(f"Running {args.mode}-loop load test against {args.url} "
+          f"({len(scenarios)} scenarios, users={args.users}, rate={args.rate}/s)")
+    started = time.perf_counter()
+    if args.mode == 'closed':
+        await run_closed_loop(args, scenarios, recorder)
+    else:
+        await run_open_loop(args, scenarios, recorder)
+    elapsed = time.perf_counter() - started
+
+    settings = {k: v for k, v in vars(args).items() if k != 'report'}
+    settings['scenario_names'] = [s['name'] for s in scenarios]
+    report = recorder.report(elapsed, settings)
+    print_summary(report)
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report written to {args.report}")
+    shutdown_tracing()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,25 +2,191 @@
 MCP Service Implementation
 FastMCP server exposing database tools
 """
-from mcp.server.fastmcp import FastMCP
+import functools
+import os
 import sqlite3
 import json
+import time
 from typing import List, Optional
+from metrics import (
+    DB_CONNECT_SECONDS,
+    DB_CONNECTIONS_OPEN,
+    DB_CONNECTIONS_OPENED,
+    PROMETHEUS_CONTENT_TYPE,
+    REGISTRY,
+    instrument_tool,
+)
+from profiling import PROFILING_ROUTES
+from query_stats import ORDER_KEYS, cursor_factory, diagnostics
+from sharding import merge_sorted, scatter, shard_index, shard_paths
+from ticket_events import (
+    DEFAULT_LIMIT,
+    FEED,
+    format_sse,
+    latest_sequence,
+    notify_ticket_events,
+    parse_cursor,
+    read_events,
+)
+from tracing import setup_tracing, traced_tool
 
-# Initialize FastMCP server
-mcp = FastMCP("Multi-Agent Service MCP")
+SERVER_NAME = "Multi-Agent Service MCP"
+
+# Tools and HTTP routes are registered here and attached to the FastMCP server
+# when it is built, so importing the tool functions does not load the MCP SDK
+TOOLS = []
+ROUTES = []
+
+def tool(func):
+    """Register an MCP tool."""
+    TOOLS.append(func)
+    return func
+
+def custom_route(path: str, methods: List[str]):
+    """Register an HTTP route served alongside the MCP endpoint (HTTP transports only)."""
+    def register(handler):
+        ROUTES.append((path, methods, handler))
+        return handler
+    return register
+
+# Admin-only CPU / memory profiling (see profiling.py)
+ROUTES.extend(PROFILING_ROUTES)
+
+@functools.lru_cache(maxsize=None)
+def build_mcp_server():
+    """The FastMCP server with all registered tools and routes."""
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP(SERVER_NAME)
+    for func in TOOLS:
+        server.add_tool(func)
+    for path, methods, handler in ROUTES:
+        server.custom_route(path, methods=methods)(handler)
+    return server
+
+def __getattr__(name):
+    # `mcp_service.mcp` still returns the server, built on first access
+    if name == "mcp":
+        return build_mcp_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 DB_PATH = "multi_agent_service.db"
+# Files the customers, tickets and their events are split across by customer ID
+# (1 = DB_PATH only); see sharding.py and reshard.py
+DB_SHARDS = int(os.getenv("DB_SHARDS", "1"))
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+class TrackedConnection(sqlite3.Connection):
+    """sqlite3 connection that keeps the open-connection gauge accurate and instruments statements."""
+
+    db_label = DB_PATH
+    _closed = False
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            DB_CONNECTIONS_OPEN.labels(self.db_label).dec()
+        super().close()
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or cursor_factory())
+
+    def execute(self, sql, parameters=()):
+        # sqlite3.Connection.execute bypasses the cursor's execute method
+        return self.cursor().execute(sql, parameters)
+
+def get_db_connection(db_path: Optional[str] = None):
+    db_path = db_path or DB_PATH
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, factory=TrackedConnection)
+    conn.db_label = db_path
+    DB_CONNECT_SECONDS.labels(db_path).observe(time.perf_counter() - started)
+    DB_CONNECTIONS_OPENED.labels(db_path).inc()
+    DB_CONNECTIONS_OPEN.labels(db_path).inc()
     conn.row_factory = sqlite3.Row
     return conn
 
-@mcp.tool()
+def db_shard_paths() -> tuple:
+    """Database files of the current layout (just DB_PATH when unsharded)."""
+    return shard_paths(DB_PATH, DB_SHARDS)
+
+def get_customer_connection(customer_id: int):
+    """Connection to the shard holding a customer and its tickets."""
+    paths = db_shard_paths()
+    return get_db_connection(paths[shard_index(customer_id, len(paths))])
+
+def query_all_shards(query: str, params) -> list:
+    """Rows of `query` from every shard, one list per shard."""
+    def run(path):
+        conn = get_db_connection(path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+    return scatter(db_shard_paths(), run)
+
+@custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request):
+    """Prometheus metrics (HTTP transports only)."""
+    from starlette.responses import Response
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@custom_route("/queries", methods=["GET"])
+async def queries_endpoint(request):
+    """Top SQL statements and recent slow queries (HTTP transports only)."""
+    from starlette.responses import JSONResponse
+    order_by = request.query_params.get("order_by", "total_ms")
+    if order_by not in ORDER_KEYS:
+        return JSONResponse({"error": f"order_by must be one of {', '.join(ORDER_KEYS)}"}, status_code=400)
+    return JSONResponse(diagnostics(int(request.query_params.get("limit", 10)), order_by))
+
+def _events_start(request):
+    """Cursor to resume after: Last-Event-ID (SSE reconnects), else ?after= ("now" = only new events)."""
+    after = request.headers.get("last-event-id") or request.query_params.get("after", "0")
+    if after == "now":
+        return latest_sequence()
+    parse_cursor(after, len(db_shard_paths()))  # ValueError for malformed or stale cursors
+    return after
+
+@custom_route("/events", methods=["GET"])
+async def events_endpoint(request):
+    """Long-poll the ticket change feed: ?after=<seq>&customer_id=&limit=&timeout= (HTTP transports only)."""
+    from starlette.responses import JSONResponse
+    try:
+        after = _events_start(request)
+        customer_id = request.query_params.get("customer_id")
+        customer_id = int(customer_id) if customer_id else None
+        limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        timeout = min(float(request.query_params.get("timeout", 25)), 60.0)
+    except ValueError as e:
+        return JSONResponse({"error": f"invalid after, customer_id, limit or timeout: {e}"}, status_code=400)
+    events, cursor = await FEED.wait(after, customer_id, limit, timeout)
+    return JSONResponse({"events": events, "last_seq": cursor})
+
+@custom_route("/events/stream", methods=["GET"])
+async def events_stream_endpoint(request):
+    """Ticket change feed as server-sent events, resumable with Last-Event-ID (HTTP transports only)."""
+    from starlette.responses import JSONResponse, StreamingResponse
+    try:
+        after = _events_start(request)
+        customer_id = request.query_params.get("customer_id")
+        customer_id = int(customer_id) if customer_id else None
+    except ValueError as e:
+        return JSONResponse({"error": f"invalid after or customer_id: {e}"}, status_code=400)
+
+    async def body():
+        async for event in FEED.stream(after, customer_id):
+            yield format_sse(event)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"cache-control": "no-cache"})
+
+@tool
+@instrument_tool
+@traced_tool
 def get_customer(customer_id: int) -> str:
     """Get customer details by ID."""
-    conn = get_db_connection()
+    conn = get_customer_connection(customer_id)
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM customers WHERE id = ?", (customer_id,))
     customer = cursor.fetchone()
@@ -30,12 +196,30 @@ def get_customer(customer_id: int) -> str:
         return json.dumps(dict(customer))
     return "Customer not found"
 
-@mcp.tool()
+@tool
+@instrument_tool
+@traced_tool
+def find_customer(email: Optional[str] = None, phone: Optional[str] = None, name: Optional[str] = None,
+                  limit: int = 5) -> str:
+    """Find customers by email, phone and/or name, best matches first.
+
+    Case and phone formatting are ignored; names match in full, by prefix or
+    by any part of at least 3 characters. Each match lists the fields that matched.
+    """
+    from customer_lookup import find_customers
+
+    if not (email or phone or name):
+        return "Provide an email, phone or name to search for"
+    customers = find_customers(email, phone, name, limit)
+    if customers:
+        return json.dumps(customers)
+    return "No matching customers found"
+
+@tool
+@instrument_tool
+@traced_tool
 def list_customers(status: Optional[str] = None, limit: int = 10) -> str:
     """List customers, optionally filtered by status."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     query = "SELECT * FROM customers"
     params = []
     
@@ -43,16 +227,17 @@ def list_customers(status: Optional[str] = None, limit: int = 10) -> str:
         query += " WHERE status = ?"
         params.append(status)
         
-    query += " LIMIT ?"
+    query += " ORDER BY id LIMIT ?"
     params.append(limit)
     
-    cursor.execute(query, params)
-    customers = cursor.fetchall()
-    conn.close()
+    # Every shard returns its first `limit` by ID; the merge keeps the overall first `limit`
+    customers = merge_sorted(query_all_shards(query, params), key=lambda c: c["id"], limit=limit)
     
     return json.dumps([dict(c) for c in customers])
 
-@mcp.tool()
+@tool
+@instrument_tool
+@traced_tool
 def update_customer(customer_id: int, data: str) -> str:
     """Update customer details. Data should be a JSON string of fields to update."""
     try:
@@ -60,7 +245,7 @@ def update_customer(customer_id: int, data: str) -> str:
     except json.JSONDecodeError:
         return "Invalid JSON data"
         
-    conn = get_db_connection()
+    conn = get_customer_connection(customer_id)
     cursor = conn.cursor()
     
     # Check if customer exists
@@ -79,15 +264,18 @@ def update_customer(customer_id: int, data: str) -> str:
         cursor.execute(query, values)
         conn.commit()
         conn.close()
+        notify_ticket_events()
         return f"Customer {customer_id} updated successfully"
     except Exception as e:
         conn.close()
         return f"Error updating customer: {str(e)}"
 
-@mcp.tool()
+@tool
+@instrument_tool
+@traced_tool
 def create_ticket(customer_id: int, issue: str, priority: str = "medium") -> str:
     """Create a new support ticket."""
-    conn = get_db_connection()
+    conn = get_customer_connection(customer_id)
     cursor = conn.cursor()
     
     # Check if customer exists
@@ -104,15 +292,18 @@ def create_ticket(customer_id: int, issue: str, priority: str = "medium") -> str
         ticket_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        notify_ticket_events()
         return f"Ticket created with ID {ticket_id}"
     except Exception as e:
         conn.close()
         return f"Error creating ticket: {str(e)}"
 
-@mcp.tool()
+@tool
+@instrument_tool
+@traced_tool
 def get_customer_history(customer_id: int) -> str:
     """Get ticket history for a customer."""
-    conn = get_db_connection()
+    conn = get_customer_connection(customer_id)
     cursor = conn.cursor()
     
     cursor.execute("SELECT * FROM tickets WHERE customer_id = ?", (customer_id,))
@@ -123,12 +314,44 @@ def get_customer_history(customer_id: int) -> str:
         return json.dumps([dict(t) for t in tickets])
     return "No tickets found for this customer"
 
-@mcp.tool()
-def get_customers_with_open_tickets(status: Optional[str] = None, limit: int = 50) -> str:
-    """Get customers who have open tickets. Optionally filter by customer status (active/disabled)."""
-    conn = get_db_connection()
+_profiles_ready = set()
+
+def _ensure_customer_profiles(conn):
+    """Build customer_profiles on first use in databases created before it existed.
+
+    Existing profiles are kept current by triggers; rebuilding them is left to
+    `db_initialize.py --migrate`, so a read never rewrites the table.
+    """
+    if conn.db_label not in _profiles_ready:
+        cursor = conn.cursor()
+        if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'customer_profiles'").fetchone():
+            from db_initialize import create_customer_profiles
+            create_customer_profiles(cursor)
+            conn.commit()
+        _profiles_ready.add(conn.db_label)
+
+@tool
+@instrument_tool
+@traced_tool
+def get_customer_profile(customer_id: int) -> str:
+    """Get customer details, ticket counts by status and the most recent tickets in one call."""
+    conn = get_customer_connection(customer_id)
+    _ensure_customer_profiles(conn)
     cursor = conn.cursor()
+    # Stored already serialized: one primary-key read, no JSON encoding per call
+    cursor.execute("SELECT document FROM customer_profiles WHERE customer_id = ?", (customer_id,))
+    profile = cursor.fetchone()
+    conn.close()
     
+    if profile:
+        return profile[0]
+    return "Customer not found"
+
+@tool
+@instrument_tool
+@traced_tool
+def get_customers_with_open_tickets(status: Optional[str] = None, limit: int = 50) -> str:
+    """Get customers who have open tickets. Optionally filter by customer status (active/disabled)."""
     query = """
         SELECT DISTINCT c.* 
         FROM customers c
@@ -141,16 +364,58 @@ def get_customers_with_open_tickets(status: Optional[str] = None, limit: int = 5
         query += " AND c.status = ?"
         params.append(status)
     
-    query += " LIMIT ?"
+    query += " ORDER BY c.id LIMIT ?"
     params.append(limit)
     
-    cursor.execute(query, params)
-    customers = cursor.fetchall()
-    conn.close()
+    # Every shard returns its first `limit` by ID; the merge keeps the overall first `limit`
+    customers = merge_sorted(query_all_shards(query, params), key=lambda c: c["id"], limit=limit)
     
     if customers:
         return json.dumps([dict(c) for c in customers])
     return "No customers found with open tickets"
 
+@tool
+@instrument_tool
+@traced_tool
+def rank_open_tickets(limit: int = 10) -> str:
+    """Open tickets most in need of escalation, highest score first, with the factors behind each score.
+
+    Scores priority, ticket age, premium customers, customers with several
+    open tickets and urgent keywords (refund, charged twice, compromised).
+    """
+    # NumPy is only loaded once a ranking is asked for
+    import ticket_ranking
+
+    tickets = ticket_ranking.rank(db_shard_paths(), limit, run=scatter)
+    if tickets:
+        return json.dumps({"tickets": tickets, "score": ticket_ranking.score_formula()})
+    return "No open tickets"
+
+@tool
+@instrument_tool
+@traced_tool
+def get_ticket_events(after_seq: str = "0", customer_id: Optional[int] = None, limit: int = 50) -> str:
+    """Ticket and customer changes after a sequence number, oldest first.
+
+    Pass the returned last_seq as after_seq next time to get only newer changes.
+    """
+    try:
+        events, cursor = read_events(after_seq, customer_id, limit)
+    except ValueError as e:
+        return f"Invalid after_seq: {e}"
+    return json.dumps({"events": events, "last_seq": cursor})
+
+@tool
+def top_queries(limit: int = 10, order_by: str = "total_ms") -> str:
+    """Diagnostics: SQL statement shapes ranked by total_ms, calls, avg_ms, max_ms or rows, plus recent slow queries.
+
+    Requires QUERY_STATS=1 on the server.
+    """
+    if order_by not in ORDER_KEYS:
+        return f"order_by must be one of {', '.join(ORDER_KEYS)}"
+    return json.dumps(diagnostics(limit, order_by))
+
 if __name__ == "__main__":
-    mcp.run()
+    # stdio by default; MCP_TRANSPORT=streamable-http (or sse) also serves /metrics
+    setup_tracing("mcp_service")
+    build_mcp_server().run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
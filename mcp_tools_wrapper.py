@@ -2,50 +2,90 @@
 MCP Tools Wrapper for ADK Agents
 Wraps MCP service functions as callable tools for ADK agents
 """
+from typing import Optional
+
 from mcp_service import (
+    find_customer,
     get_customer,
+    get_customer_profile,
     list_customers,
     update_customer,
     create_ticket,
     get_customer_history,
-    get_customers_with_open_tickets
+    get_customers_with_open_tickets,
+    get_ticket_events,
+    rank_open_tickets
 )
+from prefetch import invalidate_prefetched, prefetched_call
+from tool_memo import invalidate_memo, memoized_call
 
 # ADK agents can use functions directly as tools
-# These are simple wrappers that maintain the MCP interface
+# These are simple wrappers that maintain the MCP interface. Reads repeated
+# within a user turn come from the turn's tool memo (tool_memo.py), and
+# per-customer reads from the request's prefetch cache when warm (prefetch.py).
+# The change feed is not memoized: callers expect fresh deltas.
 
 def tool_get_customer(customer_id: int) -> str:
     """Get customer details by ID. Uses customers.id field."""
-    return get_customer(customer_id)
+    return memoized_call('get_customer', (customer_id,),
+                         lambda: prefetched_call('get_customer', customer_id, get_customer))
+
+def tool_find_customer(email: Optional[str] = None, phone: Optional[str] = None, name: Optional[str] = None,
+                       limit: int = 5) -> str:
+    """Find customers by email, phone and/or name (case/formatting-insensitive, partial names allowed). Use this instead of listing customers to identify someone."""
+    return memoized_call('find_customer', (email, phone, name, limit), lambda: find_customer(email, phone, name, limit))
 
 def tool_list_customers(status: str = None, limit: int = 10) -> str:
     """List customers, optionally filtered by status. Uses customers.status field."""
-    return list_customers(status, limit)
+    return memoized_call('list_customers', (status, limit), lambda: list_customers(status, limit))
 
 def tool_update_customer(customer_id: int, data: str) -> str:
     """Update customer details. Data should be a JSON string. Uses customers fields."""
+    invalidate_prefetched(customer_id)
+    invalidate_memo(customer_id)
     return update_customer(customer_id, data)
 
 def tool_create_ticket(customer_id: int, issue: str, priority: str = "medium") -> str:
     """Create a new support ticket. Uses tickets fields."""
+    invalidate_prefetched(customer_id)
+    invalidate_memo(customer_id)
     return create_ticket(customer_id, issue, priority)
 
 def tool_get_customer_history(customer_id: int) -> str:
     """Get ticket history for a customer. Uses tickets.customer_id field."""
-    return get_customer_history(customer_id)
+    return memoized_call('get_customer_history', (customer_id,),
+                         lambda: prefetched_call('get_customer_history', customer_id, get_customer_history))
+
+def tool_get_customer_profile(customer_id: int) -> str:
+    """Get customer details plus ticket summary and recent tickets in one call. Prefer this over separate customer and history lookups."""
+    return memoized_call('get_customer_profile', (customer_id,),
+                         lambda: prefetched_call('get_customer_profile', customer_id, get_customer_profile))
 
 def tool_get_customers_with_open_tickets(status: str = None, limit: int = 50) -> str:
     """Get customers who have open tickets. Optionally filter by customer status."""
-    return get_customers_with_open_tickets(status, limit)
+    return memoized_call('get_customers_with_open_tickets', (status, limit),
+                         lambda: get_customers_with_open_tickets(status, limit))
+
+def tool_rank_open_tickets(limit: int = 10) -> str:
+    """Rank open tickets by escalation score (priority, age, premium, repeat tickets, urgent keywords). Returns the top ones."""
+    return memoized_call('rank_open_tickets', (limit,), lambda: rank_open_tickets(limit))
+
+def tool_get_ticket_events(after_seq: str = "0", customer_id: Optional[int] = None, limit: int = 50) -> str:
+    """Get ticket/customer changes after a sequence number. Pass the returned last_seq next time for only new changes."""
+    return get_ticket_events(after_seq, customer_id, limit)
 
 def create_mcp_tools():
     """Create list of MCP tools for ADK agents."""
     return [
         tool_get_customer,
+        tool_find_customer,
         tool_list_customers,
         tool_update_customer,
         tool_create_ticket,
         tool_get_customer_history,
+        tool_get_customer_profile,
         tool_get_customers_with_open_tickets,
+        tool_rank_open_tickets,
+        tool_get_ticket_events,
     ]
 
@@ -0,0 +1,392 @@
+"""
+Service Metrics
+Lock-light counters, gauges and histograms rendered in the Prometheus text format
+"""
+import bisect
+import functools
+import re
+import threading
+import time
+from typing import Callable
+
+# Default latency buckets (seconds): sub-millisecond tool calls up to slow model turns
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+JSONRPC_METHOD_PATTERN = re.compile(rb'"method"\s*:\s*"([^"]+)"')
+
+_enabled = True
+
+
+def set_enabled(enabled: bool):
+    """Turn recording on or off process-wide (used by the overhead benchmark)."""
+    global _enabled
+    _enabled = enabled
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Base class: one child per label-value tuple.
+
+    The hot path is a dict lookup plus an update under the child's own
+    lock, uncontended almost always: updates come from the event loop and
+    from worker threads (shard scatter, prefetch, report workers, spills),
+    where a bare `value += amount` could lose increments.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in list(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        if _enabled:
+            with self.lock:
+                self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f'{name}{_format_labels(labelnames, values)} {self.value}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    _new_child = staticmethod(_CounterChild)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        if _enabled:
+            with self.lock:
+                self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    _new_child = staticmethod(_GaugeChild)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        if _enabled:
+            bucket = bisect.bisect_left(self.bounds, value)
+            with self.lock:
+                self.counts[bucket] += 1
+                self.sum += value
+
+    def render(self, name, labelnames, values):
+        # Counts and sum from the same moment
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+            lines.append(f'{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}')
+        labels = _format_labels(labelnames, values)
+        lines.append(f'{name}_sum{labels} {total}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics plus collectors evaluated at scrape time."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics.setdefault(name, cls(name, documentation, labelnames, **kwargs))
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Run `collector` before each scrape, e.g. to copy snapshots into gauges."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# ============================================================================
+# Service metrics
+# ============================================================================
+
+A2A_REQUESTS = REGISTRY.counter(
+    'a2a_requests_total', 'A2A HTTP requests by agent, JSON-RPC method and status', ('agent', 'method', 'status'))
+A2A_REQUEST_SECONDS = REGISTRY.histogram(
+    'a2a_request_duration_seconds', 'A2A request latency by agent and JSON-RPC method', ('agent', 'method'))
+A2A_IN_FLIGHT = REGISTRY.gauge('a2a_in_flight_requests', 'A2A requests currently being served', ('agent',))
+TOOL_CALLS = REGISTRY.counter('mcp_tool_calls_total', 'MCP tool calls by tool and outcome', ('tool', 'status'))
+TOOL_SECONDS = REGISTRY.histogram('mcp_tool_duration_seconds', 'MCP tool latency', ('tool',))
+HOP_SECONDS = REGISTRY.histogram(
+    'subagent_hop_duration_seconds', 'Latency of router calls to remote sub-agents', ('agent', 'sub_agent'))
+MODEL_TOKENS = REGISTRY.counter('model_tokens_total', 'Model tokens by agent and kind', ('agent', 'kind'))
+MODEL_CALLS = REGISTRY.counter('model_calls_total', 'Completed model calls by agent', ('agent',))
+MODEL_TIER_CALLS = REGISTRY.counter(
+    'model_cascade_calls_total', 'Cascade model calls by agent, tier and outcome', ('agent', 'tier', 'outcome'))
+MODEL_TIER_SECONDS = REGISTRY.histogram(
+    'model_cascade_tier_duration_seconds', 'Latency of cascade model calls by agent and tier', ('agent', 'tier'))
+MODEL_ESCALATIONS = REGISTRY.counter(
+    'model_cascade_escalations_total', 'Cascade escalations by agent, tier escalated from and reason',
+    ('agent', 'tier', 'reason'))
+MODEL_ESCALATION_RATE = REGISTRY.gauge(
+    'model_cascade_escalation_rate', 'Escalated / answered calls of a tier since start', ('agent', 'tier'))
+REPLICA_REQUESTS = REGISTRY.counter(
+    'agent_replica_requests_total', 'Client requests to agent replicas by role, replica and outcome',
+    ('role', 'replica', 'outcome'))
+REPLICA_EJECTIONS = REGISTRY.counter(
+    'agent_replica_ejections_total', 'Replicas ejected after consecutive failures', ('role', 'replica'))
+REPLICA_OUTSTANDING = REGISTRY.gauge(
+    'agent_replica_outstanding', 'Requests in flight to an agent replica from this process', ('role', 'replica'))
+REPLICA_WEIGHT = REGISTRY.gauge(
+    'agent_replica_weight', 'Balancing weight of an agent replica (0 ejected, <1 slow start)', ('role', 'replica'))
+CACHE_LOOKUPS = REGISTRY.counter('cache_lookups_total', 'Cache lookups by cache and result', ('cache', 'result'))
+CACHE_HIT_RATIO = REGISTRY.gauge('cache_hit_ratio', 'Hits / lookups since start', ('cache',))
+DB_CONNECTIONS_OPENED = REGISTRY.counter('db_connections_opened_total', 'SQLite connections opened', ('db',))
+DB_CONNECTIONS_OPEN = REGISTRY.gauge('db_connections_open', 'SQLite connections currently open', ('db',))
+DB_CONNECT_SECONDS = REGISTRY.histogram('db_connect_duration_seconds', 'Time to open a SQLite connection', ('db',))
+
+
+def _update_cache_ratios():
+    totals = {}
+    for (cache, result), child in list(CACHE_LOOKUPS._children.items()):
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (child.value if result == 'hit' else 0), lookups + child.value)
+    for cache, (hits, lookups) in totals.items():
+        CACHE_HIT_RATIO.labels(cache).set(hits / lookups if lookups else 0.0)
+
+
+REGISTRY.register_collector(_update_cache_ratios)
+
+
+def _update_escalation_rates():
+    totals = {}
+    for (agent, tier, outcome), child in list(MODEL_TIER_CALLS._children.items()):
+        escalated, calls = totals.get((agent, tier), (0, 0))
+        totals[(agent, tier)] = (escalated + (child.value if outcome == 'escalated' else 0), calls + child.value)
+    for (agent, tier), (escalated, calls) in totals.items():
+        MODEL_ESCALATION_RATE.labels(agent, tier).set(escalated / calls if calls else 0.0)
+
+
+REGISTRY.register_collector(_update_escalation_rates)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def instrument_tool(func):
+    """Decorator recording call count and latency of an MCP tool function."""
+    name = func.__name__
+    ok, error, latency = TOOL_CALLS.labels(name, 'ok'), TOOL_CALLS.labels(name, 'error'), TOOL_SECONDS.labels(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            error.inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
+        ok.inc()
+        return result
+
+    return wrapper
+
+
+def register_snapshot_gauges(prefix: str, labelnames: tuple, labelvalues: tuple, snapshot: Callable[[], dict]):
+    """Export the numeric fields of a snapshot() dict (admission, stores) as gauges at scrape time."""
+
+    def collect():
+        for key, value in snapshot().items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    if isinstance(sub_value, (int, float)):
+                        REGISTRY.gauge(f'{prefix}_{key}', f'{prefix} {key}',
+                                       labelnames + ('kind',)).labels(*labelvalues, sub_key).set(sub_value)
+            elif isinstance(value, (int, float)):
+                REGISTRY.gauge(f'{prefix}_{key}', f'{prefix} {key}', labelnames).labels(*labelvalues).set(value)
+
+    REGISTRY.register_collector(collect)
+
+
+# ============================================================================
+# ADK callbacks (model tokens, sub-agent hops)
+# ============================================================================
+
+_hop_started = {}
+
+
+def record_model_usage(callback_context, llm_response) -> None:
+    """after_model_callback: count prompt/completion tokens of finished model calls."""
+    usage = llm_response.usage_metadata
+    if llm_response.partial or usage is None:
+        return None
+    agent = callback_context.agent_name
+    MODEL_CALLS.labels(agent).inc()
+    MODEL_TOKENS.labels(agent, 'prompt').inc(usage.prompt_token_count or 0)
+    MODEL_TOKENS.labels(agent, 'completion').inc(usage.candidates_token_count or 0)
+    return None
+
+
+def start_hop_timer(callback_context) -> None:
+    """before_agent_callback for RemoteA2aAgent sub-agents."""
+    _hop_started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+    return None
+
+
+def make_hop_recorder(parent: str):
+    """after_agent_callback recording the hop latency from `parent` to the sub-agent."""
+
+    def record_hop(callback_context) -> None:
+        started = _hop_started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            HOP_SECONDS.labels(parent, callback_context.agent_name).observe(time.perf_counter() - started)
+        return None
+
+    return record_hop
+
+
+# ============================================================================
+# ASGI middleware
+# ============================================================================
+
+class MetricsMiddleware:
+    """Records A2A request metrics and serves `GET /metrics`.
+
+    The JSON-RPC method is read from the first body chunk with a regex, so
+    the body is never parsed or buffered here.
+    """
+
+    def __init__(self, app, agent: str):
+        self.app = app
+        self.agent = agent
+        self.in_flight = A2A_IN_FLIGHT.labels(agent)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        if scope['method'] == 'GET' and scope['path'] == '/metrics':
+            body = REGISTRY.render().encode()
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', PROMETHEUS_CONTENT_TYPE.encode()),
+                (b'content-length', str(len(body)).encode()),
+            ]})
+            return await send({'type': 'http.response.body', 'body': body})
+        if scope['method'] != 'POST':
+            return await self.app(scope, receive, send)
+
+        method = 'unknown'
+        status = 500
+        first = True
+
+        async def metered_receive():
+            nonlocal method, first
+            message = await receive()
+            if first:
+                first = False
+                match = JSONRPC_METHOD_PATTERN.search(message.get('body', b'')[:512])
+                if match:
+                    method = match.group(1).decode('ascii', 'replace')
+            return message
+
+        async def metered_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, metered_receive, metered_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.dec()
+            A2A_REQUESTS.labels(self.agent, method, str(status)).inc()
+            A2A_REQUEST_SECONDS.labels(self.agent, method).observe(elapsed)
+
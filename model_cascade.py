@@ -0,0 +1,221 @@
+"""
+Model Cascade
+Answers each model call with the cheapest tier whose output passes cheap validators, escalating to stronger tiers otherwise
+"""
+import contextvars
+import inspect
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import PrivateAttr
+
+from metrics import MODEL_ESCALATIONS, MODEL_TIER_CALLS, MODEL_TIER_SECONDS
+from prefetch import detect_customer_id
+
+# Appended to the system instruction of every tier but the last; the line is
+# stripped from the reply before it is returned
+CONFIDENCE_INSTRUCTION = (
+    "After your final answer (not after tool calls), add one last line of the form "
+    "`Confidence: <number between 0 and 1>` rating how sure you are that the answer is correct and complete."
+)
+CONFIDENCE_PATTERN = re.compile(r'\n?[ \t*`]*confidence:?[ \t*`]*([01](?:\.\d+)?)[ \t*`.]*\s*$', re.IGNORECASE)
+
+DEFAULT_MIN_CONFIDENCE = 0.7
+
+# Finish reasons of a cut-off or blocked answer
+BAD_FINISH_REASONS = {'MAX_TOKENS', 'SAFETY', 'RECITATION', 'BLOCKLIST', 'PROHIBITED_CONTENT', 'MALFORMED_FUNCTION_CALL'}
+
+# Invocations escalated so far: later model calls of the same agent turn start
+# at the tier that was escalated to, instead of retrying the cheap one
+MAX_TRACKED_INVOCATIONS = 1024
+
+_invocation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('cascade_invocation', default=None)
+
+
+def track_invocation(callback_context, llm_request) -> None:
+    """before_model_callback of cascaded agents: tells the cascade which agent turn a model call belongs to."""
+    _invocation.set(callback_context.invocation_id)
+    return None
+
+
+def resolve_tier(model: str, agent_name: str) -> BaseLlm:
+    if model.startswith('simulated'):
+        from simulated_llm import SimulatedLlm
+        return SimulatedLlm(model=model, agent_name=agent_name)
+    return LLMRegistry.new_llm(model)
+
+
+# ============================================================================
+# Validators
+# ============================================================================
+
+def _user_text(llm_request: LlmRequest) -> str:
+    """The latest user message (other agents' replayed turns are skipped)."""
+    for content in reversed(llm_request.contents):
+        parts = content.parts or []
+        if content.role != 'user' or (parts and parts[0].text == 'For context:'):
+            continue
+        texts = [part.text for part in parts if part.text]
+        if texts:
+            return texts[0]
+    return ''
+
+
+def check_function_call(call: types.FunctionCall, llm_request: LlmRequest) -> Optional[str]:
+    """Why a function call does not match the declared tool, or None."""
+    tool = llm_request.tools_dict.get(call.name)
+    if tool is None:
+        return 'unknown_tool'
+    func = getattr(tool, 'func', None)
+    if func is None:
+        return None
+    args = call.args or {}
+    parameters = {name: param for name, param in inspect.signature(func).parameters.items() if name != 'tool_context'}
+    if any(name not in parameters for name in args):
+        return 'unexpected_argument'
+    for name, param in parameters.items():
+        if name not in args:
+            if param.default is inspect.Parameter.empty:
+                return 'missing_argument'
+        elif param.annotation is int and not str(args[name]).lstrip('-').isdigit():
+            return 'invalid_argument'
+    return None
+
+
+def check_required_fields(text: str, llm_request: LlmRequest, fields: tuple) -> Optional[str]:
+    """Why a final answer lacks a field the request calls for, or None."""
+    if 'customer_id' in fields:
+        customer_id = detect_customer_id(_user_text(llm_request))
+        if customer_id is not None and not re.search(rf'\b{customer_id}\b', text):
+            return 'missing_customer_id'
+    return None
+
+
+def split_confidence(text: str) -> tuple[str, Optional[float]]:
+    """Reply text without its trailing `Confidence: x` line, and x (None when not reported)."""
+    match = CONFIDENCE_PATTERN.search(text)
+    if match is None:
+        return text, None
+    return text[:match.start()].rstrip(), float(match.group(1))
+
+
+# ============================================================================
+# Cascade
+# ============================================================================
+
+class ModelCascade(BaseLlm):
+    """Tiers of models tried from cheapest to strongest for every model call.
+
+    Each tier but the last answers with a complete (non-streamed) response
+    that is checked before anything reaches the agent: no error or cut-off,
+    function calls that match a declared tool and its arguments, and for
+    final answers a self-reported confidence of at least `min_confidence`
+    (an answer without one escalates) plus the `required_fields`. The first response that passes is returned;
+    the last tier's response is returned as is (streamed when requested).
+    """
+
+    agent_name: str
+    tiers: list[BaseLlm]
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE
+    required_fields: tuple = ()
+    _escalated: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return []
+
+    def validate_response(self, responses: list[LlmResponse], llm_request: LlmRequest) -> tuple[Optional[str], Optional[LlmResponse]]:
+        """(escalation reason, None) or (None, the response to return with its confidence line removed)."""
+        final = next((response for response in reversed(responses) if not response.partial), None)
+        if final is None or final.error_code or final.content is None or not final.content.parts:
+            return 'error', None
+        if final.finish_reason is not None and final.finish_reason.name in BAD_FINISH_REASONS:
+            return 'finish_reason', None
+        calls = [part.function_call for part in final.content.parts if part.function_call]
+        for call in calls:
+            reason = check_function_call(call, llm_request)
+            if reason:
+                return reason, None
+        if calls:
+            return None, final
+
+        text = ''.join(part.text or '' for part in final.content.parts if not part.thought)
+        answer, confidence = split_confidence(text)
+        if not answer.strip():
+            return 'empty', None
+        if confidence is None:
+            # A cheap tier ignoring the confidence instruction cannot vouch for its answer
+            return 'no_confidence', None
+        if confidence < self.min_confidence:
+            return 'low_confidence', None
+        reason = check_required_fields(answer, llm_request, self.required_fields)
+        if reason:
+            return reason, None
+        final = final.model_copy(deep=True)
+        final.content.parts = [part for part in final.content.parts if part.thought or not part.text] + [
+            types.Part(text=answer)]
+        return None, final
+
+    def _start_tier(self, invocation_id: Optional[str]) -> int:
+        return self._escalated.get(invocation_id, 0) if invocation_id else 0
+
+    def _remember_escalation(self, invocation_id: Optional[str], tier: int):
+        if invocation_id:
+            self._escalated[invocation_id] = tier
+            self._escalated.move_to_end(invocation_id)
+            while len(self._escalated) > MAX_TRACKED_INVOCATIONS:
+                self._escalated.popitem(last=False)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        invocation_id = _invocation.get()
+        last = len(self.tiers) - 1
+        for index in range(self._start_tier(invocation_id), last):
+            tier = self.tiers[index]
+            request = llm_request.model_copy(deep=True)
+            request.model = tier.model
+            request.append_instructions([CONFIDENCE_INSTRUCTION])
+            started = time.perf_counter()
+            try:
+                responses = [response async for response in tier.generate_content_async(request, stream=False)]
+                reason, accepted = self.validate_response(responses, llm_request)
+            except Exception:
+                reason, accepted = 'error', None
+            MODEL_TIER_SECONDS.labels(self.agent_name, tier.model).observe(time.perf_counter() - started)
+            if accepted is not None:
+                MODEL_TIER_CALLS.labels(self.agent_name, tier.model, 'accepted').inc()
+                yield accepted
+                return
+            MODEL_TIER_CALLS.labels(self.agent_name, tier.model, 'escalated').inc()
+            MODEL_ESCALATIONS.labels(self.agent_name, tier.model, reason).inc()
+            self._remember_escalation(invocation_id, index + 1)
+
+        tier = self.tiers[last]
+        request = llm_request.model_copy(deep=True)
+        request.model = tier.model
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            async for response in tier.generate_content_async(request, stream=stream):
+                yield response
+            outcome = 'accepted'
+        finally:
+            MODEL_TIER_SECONDS.labels(self.agent_name, tier.model).observe(time.perf_counter() - started)
+            MODEL_TIER_CALLS.labels(self.agent_name, tier.model, outcome).inc()
+
+
+def build_cascade(agent_name: str, models: list[str], min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                  required_fields: tuple = ()) -> ModelCascade:
+    return ModelCascade(
+        model='cascade:' + '>'.join(models),
+        agent_name=agent_name,
+        tiers=[resolve_tier(model, agent_name) for model in models],
+        min_confidence=min_confidence,
+        required_fields=tuple(required_fields),
+    )
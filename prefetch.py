@@ -0,0 +1,152 @@
+"""
+Speculative Customer Prefetch
+Loads a customer's record and ticket history as soon as their ID shows up in a request,
+into a request-scoped cache the MCP tool wrappers read from
+"""
+import contextvars
+import inspect
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from metrics import record_cache_lookup
+
+# A2A request metadata key carrying the detected customer ID to the next agent
+CUSTOMER_ID_METADATA_KEY = 'customer_id'
+
+# "customer 5", "customer ID is 5", "ID 5", "customer #5"
+CUSTOMER_ID_PATTERN = re.compile(r'\b(?:customer(?:\s+id)?|id)\s*(?:is\s*)?#?(\d+)', re.IGNORECASE)
+
+# Per-customer tool results loaded ahead of the model's tool calls; the
+# ticket history also covers the customer's open tickets
+PREFETCHED_TOOLS = ('get_customer', 'get_customer_history', 'get_customer_profile')
+
+# Seconds a tool waits for a prefetch still in progress before querying itself
+PREFETCH_WAIT_TIMEOUT = 5.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+_current: contextvars.ContextVar[Optional['PrefetchCache']] = contextvars.ContextVar('prefetch_cache', default=None)
+
+
+def prefetch_enabled() -> bool:
+    return os.getenv('PREFETCH', '1').lower() not in ('0', 'false', 'no')
+
+
+def detect_customer_id(text: str) -> Optional[int]:
+    """Last customer ID mentioned in `text`, if any."""
+    matches = CUSTOMER_ID_PATTERN.findall(text or '')
+    return int(matches[-1]) if matches else None
+
+
+def _loaders() -> dict[str, Callable[[int], str]]:
+    # The undecorated queries: a prefetch is not a tool call, so it is kept out of the tool metrics
+    import mcp_service
+    return {name: inspect.unwrap(getattr(mcp_service, name)) for name in PREFETCHED_TOOLS}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='prefetch')
+    return _executor
+
+
+class PrefetchCache:
+    """Tool results for one A2A request, keyed by (tool, customer_id).
+
+    Entries are futures: a tool call that arrives while its prefetch is still
+    running waits for it instead of issuing the same query again. Writes to a
+    customer invalidate that customer's entries.
+    """
+
+    def __init__(self, customer_id: Optional[int] = None):
+        self.customer_id = customer_id
+        self.entries: dict[tuple[str, int], Future] = {}
+
+    def start(self, customer_id: int):
+        """Begin loading the customer's data in the background."""
+        from tool_memo import memo_contains
+
+        self.customer_id = customer_id
+        loaders = _loaders()
+        for name in PREFETCHED_TOOLS:
+            # Results an earlier agent already produced this turn come from the tool memo
+            if (name, customer_id) not in self.entries and not memo_contains(name, customer_id):
+                # Run in a copy of the request context, so statement spans join the request's trace
+                context = contextvars.copy_context()
+                self.entries[(name, customer_id)] = _get_executor().submit(context.run, loaders[name], customer_id)
+
+    def get(self, name: str, customer_id: int) -> Optional[str]:
+        future = self.entries.get((name, customer_id))
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=PREFETCH_WAIT_TIMEOUT)
+        except Exception:
+            return None
+
+    def invalidate(self, customer_id: int):
+        for name in PREFETCHED_TOOLS:
+            future = self.entries.pop((name, customer_id), None)
+            if future is not None:
+                future.cancel()
+
+    def close(self):
+        for future in self.entries.values():
+            future.cancel()
+        self.entries.clear()
+
+
+@contextmanager
+def prefetch_scope(metadata: Optional[dict], text: str, load: bool = True):
+    """Request scope: detect the customer ID (request metadata first, then the message) and start prefetching.
+
+    With `load=False` (the router, which has no tools) the ID is only kept
+    so it can be forwarded to the specialists.
+    """
+    customer_id = None
+    if metadata and metadata.get(CUSTOMER_ID_METADATA_KEY) is not None:
+        try:
+            customer_id = int(metadata[CUSTOMER_ID_METADATA_KEY])
+        except (TypeError, ValueError):
+            customer_id = None
+    if customer_id is None:
+        customer_id = detect_customer_id(text)
+
+    cache = PrefetchCache(customer_id)
+    if load and customer_id is not None and prefetch_enabled():
+        cache.start(customer_id)
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        cache.close()
+
+
+def prefetched_call(name: str, customer_id: int, call: Callable[[int], str]) -> str:
+    """Tool result from the request's prefetch cache, falling back to `call`."""
+    cache = _current.get()
+    if cache is not None and cache.entries:
+        result = cache.get(name, customer_id)
+        record_cache_lookup('prefetch', result is not None)
+        if result is not None:
+            return result
+    return call(customer_id)
+
+
+def invalidate_prefetched(customer_id: int):
+    """Drop prefetched data for a customer about to be modified."""
+    cache = _current.get()
+    if cache is not None:
+        cache.invalidate(customer_id)
+
+
+def prefetch_metadata() -> dict:
+    """Request metadata forwarding the detected customer ID to the next agent."""
+    cache = _current.get()
+    if cache is None or cache.customer_id is None:
+        return {}
+    return {CUSTOMER_ID_METADATA_KEY: cache.customer_id}
@@ -0,0 +1,475 @@
+"""
+On-Demand Profiling
+Admin endpoints for a sampling CPU profiler (collapsed stacks) and tracemalloc snapshot diffs in running servers
+"""
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+DEFAULT_INTERVAL_MS = 10.0
+MAX_PROFILE_SECONDS = 300.0
+
+# Leaf frames of threads that are waiting, not running (event loop select,
+# idle executor workers, lock waits); left out unless ?idle=1
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('thread.py', '_worker'),
+    ('queue.py', 'get'),
+}
+
+DEFAULT_TRACE_FRAMES = 25
+MAX_SNAPSHOTS = 8
+MEMORY_GROUPINGS = ('lineno', 'filename', 'traceback')
+
+# Allocations of the import system are not interesting (nor tracemalloc's own)
+EXCLUDED_ALLOCATION_FILES = (
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+
+def admin_token() -> Optional[str]:
+    """ADMIN_TOKEN enables the endpoints; requests must send it as a bearer token or X-Admin-Token."""
+    return os.getenv('ADMIN_TOKEN') or None
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# ============================================================================
+# CPU: sampling profiler
+# ============================================================================
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread from a background thread.
+
+    Each sample walks `sys._current_frames()` and counts the folded stack
+    (root first, frames separated by `;`, the thread name as the root), so
+    the result is the collapsed format flamegraph.pl and speedscope read.
+    Samples are wall-clock: a thread counts whether it runs or waits, and
+    waiting leaf frames (IDLE_FRAMES) can be dropped when rendering.
+    """
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval = DEFAULT_INTERVAL_MS / 1000
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = DEFAULT_INTERVAL_MS) -> bool:
+        """Start sampling from scratch; False if a profile is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.interval = max(interval_ms, 1.0) / 1000
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cpu-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        """Stop sampling; False if no profile was running."""
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            self._thread.join()
+            self.stopped_at = time.time()
+            return True
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self.stacks[(names.get(thread_id, str(thread_id)), tuple(reversed(stack)))] += 1
+            self.samples += 1
+
+    def _counts(self, idle: bool) -> Counter:
+        counts = Counter()
+        for (thread_name, stack), count in list(self.stacks.items()):
+            leaf = stack[-1] if stack else None
+            if not idle and leaf and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                continue
+            counts[(thread_name, stack)] += count
+        return counts
+
+    def collapsed(self, idle: bool = False) -> str:
+        """One `thread;frame;...;leaf count` line per distinct stack."""
+        lines = [
+            ';'.join([f"thread:{thread_name}", *(_frame_label(code) for code in stack)]) + f" {count}"
+            for (thread_name, stack), count in self._counts(idle).most_common()
+        ]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def top(self, idle: bool = False, limit: int = 30) -> str:
+        """Functions by samples as the leaf (self) and anywhere on the stack (total)."""
+        own, total, all_samples = Counter(), Counter(), 0
+        for (_, stack), count in self._counts(idle).items():
+            all_samples += count
+            if stack:
+                own[stack[-1]] += count
+            for code in set(stack):
+                total[code] += count
+        lines = [f"{'self':>7} {'self%':>6} {'total':>7} {'total%':>6}  function"]
+        for code, count in own.most_common(limit):
+            lines.append(f"{count:7d} {100 * count / all_samples:5.1f}% {total[code]:7d} "
+                         f"{100 * total[code] / all_samples:5.1f}%  {_frame_label(code)}")
+        return '\n'.join(lines) + '\n'
+
+    def status(self) -> dict:
+        end = self.stopped_at or time.time()
+        return {
+            'running': self.running,
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'seconds': round(end - self.started_at, 3) if self.started_at else 0.0,
+        }
+
+
+# ============================================================================
+# Memory: tracemalloc snapshots
+# ============================================================================
+
+class MemorySnapshots:
+    """tracemalloc snapshots kept by ID, compared by allocation site.
+
+    tracemalloc (and its pickle/fnmatch imports) loads on first use, keeping
+    it out of the MCP server's import time.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.next_id = 1
+        self._lock = threading.Lock()  # snapshots are taken on worker threads
+
+    def start(self, frames: int = DEFAULT_TRACE_FRAMES) -> bool:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        return True
+
+    def stop(self) -> bool:
+        """Stop tracing and drop the snapshots; False if it was not tracing."""
+        import tracemalloc
+        with self._lock:
+            self.snapshots.clear()
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        return True
+
+    def take(self) -> int:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+        filters = [tracemalloc.Filter(False, name) for name in (tracemalloc.__file__, *EXCLUDED_ALLOCATION_FILES)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        with self._lock:
+            snapshot_id = self.next_id
+            self.next_id += 1
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > MAX_SNAPSHOTS:
+                del self.snapshots[min(self.snapshots)]
+        return snapshot_id
+
+    def get(self, snapshot_id: int):
+        with self._lock:
+            if snapshot_id not in self.snapshots:
+                raise KeyError(f"unknown snapshot {snapshot_id}; kept: {sorted(self.snapshots)}")
+            return self.snapshots[snapshot_id]
+
+    @staticmethod
+    def _site(stat, group_by: str) -> dict:
+        # Frames run from the outermost caller to the allocating line
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        if group_by == 'filename':
+            return {'site': stat.traceback[-1].filename}
+        if group_by == 'traceback':
+            return {'site': frames[-1], 'traceback': frames}
+        return {'site': frames[-1]}
+
+    def top(self, snapshot_id: int, group_by: str = 'lineno', limit: int = 25) -> list[dict]:
+        """Largest allocation sites of a snapshot."""
+        return [
+            {**self._site(stat, group_by), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in self.get(snapshot_id).statistics(group_by)[:limit]
+        ]
+
+    def diff(self, base_id: int, other_id: int, group_by: str = 'lineno', limit: int = 25) -> list[dict]:
+        """Allocation sites that grew (or shrank) most from snapshot `base_id` to `other_id`."""
+        stats = self.get(other_id).compare_to(self.get(base_id), group_by)
+        return [
+            {
+                **self._site(stat, group_by),
+                'size_kb': round(stat.size / 1024, 1),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'count': stat.count,
+                'count_diff': stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def status(self) -> dict:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshots = sorted(self.snapshots)
+        return {
+            'tracing': tracemalloc.is_tracing(),
+            'frames': tracemalloc.get_traceback_limit(),
+            'traced_kb': round(current / 1024, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'overhead_kb': round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            'snapshots': snapshots,
+        }
+
+
+PROFILER = SamplingProfiler()
+MEMORY = MemorySnapshots()
+
+
+# ============================================================================
+# HTTP endpoints (Starlette)
+# ============================================================================
+
+def _unauthorized(request):
+    """Error response unless the request carries the admin token (404 while ADMIN_TOKEN is unset)."""
+    import hmac
+    from starlette.responses import JSONResponse
+
+    token = admin_token()
+    if token is None:
+        return JSONResponse({'error': 'profiling endpoints are disabled (set ADMIN_TOKEN)'}, status_code=404)
+    supplied = request.headers.get('x-admin-token') or request.headers.get('authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return JSONResponse({'error': 'admin token required'}, status_code=401)
+    return None
+
+
+def _bad_request(error: ValueError):
+    from starlette.responses import JSONResponse
+
+    return JSONResponse({'error': str(error)}, status_code=400)
+
+
+def _number_param(request, name: str, default, cast=float):
+    """A numeric query parameter; ValueError naming it if it is not a (finite) number."""
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number):
+        raise ValueError(f"{name} must be {'an integer' if cast is int else 'a number'}")
+    return number
+
+
+def _cpu_query(request) -> tuple[bool, bool, int]:
+    idle = request.query_params.get('idle', '0').lower() in ('1', 'true', 'yes')
+    top = request.query_params.get('format', 'collapsed') == 'top'
+    return idle, top, _number_param(request, 'limit', 30, int)
+
+
+async def _cpu_output(idle: bool, top: bool, limit: int):
+    import asyncio
+    from starlette.responses import PlainTextResponse
+
+    # Folding the stacks walks every sample: off the event loop
+    if top:
+        body = await asyncio.to_thread(PROFILER.top, idle, limit)
+    else:
+        body = await asyncio.to_thread(PROFILER.collapsed, idle)
+    status = PROFILER.status()
+    return PlainTextResponse(body, headers={'X-Profile-Samples': str(status['samples']),
+                                            'X-Profile-Seconds': str(status['seconds'])})
+
+
+async def cpu_profile_endpoint(request):
+    """GET ?seconds=10&interval_ms=10&format=collapsed|top&idle=0: sample for N seconds, then return the profile."""
+    import asyncio
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        seconds = min(_number_param(request, 'seconds', 10.0), MAX_PROFILE_SECONDS)
+        interval_ms = _number_param(request, 'interval_ms', DEFAULT_INTERVAL_MS)
+        output = _cpu_query(request)
+    except ValueError as e:
+        return _bad_request(e)
+    if not PROFILER.start(interval_ms):
+        return JSONResponse({'error': 'a CPU profile is already running', **PROFILER.status()}, status_code=409)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        # Joins the sampler thread
+        await asyncio.to_thread(PROFILER.stop)
+    return await _cpu_output(*output)
+
+
+async def cpu_start_endpoint(request):
+    """POST ?interval_ms=10: start sampling until /debug/profile/cpu/stop."""
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        interval_ms = _number_param(request, 'interval_ms', DEFAULT_INTERVAL_MS)
+    except ValueError as e:
+        return _bad_request(e)
+    if not PROFILER.start(interval_ms):
+        return JSONResponse({'error': 'a CPU profile is already running', **PROFILER.status()}, status_code=409)
+    return JSONResponse(PROFILER.status())
+
+
+async def cpu_stop_endpoint(request):
+    """POST ?format=collapsed|top&idle=0: stop sampling and return the profile (also the last one if already stopped)."""
+    import asyncio
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        output = _cpu_query(request)
+    except ValueError as e:
+        return _bad_request(e)
+    await asyncio.to_thread(PROFILER.stop)
+    return await _cpu_output(*output)
+
+
+async def memory_start_endpoint(request):
+    """POST ?frames=25: start tracemalloc, keeping that many frames per allocation."""
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        frames = _number_param(request, 'frames', DEFAULT_TRACE_FRAMES, int)
+        MEMORY.start(frames)
+    except ValueError as e:
+        return _bad_request(e)
+    return JSONResponse(MEMORY.status())
+
+
+async def memory_stop_endpoint(request):
+    import asyncio
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    # Frees every trace
+    await asyncio.to_thread(MEMORY.stop)
+    return JSONResponse(MEMORY.status())
+
+
+def _memory_query(request) -> tuple[str, int]:
+    group_by = request.query_params.get('group_by', 'lineno')
+    if group_by not in MEMORY_GROUPINGS:
+        raise ValueError(f"group_by must be one of {', '.join(MEMORY_GROUPINGS)}")
+    return group_by, _number_param(request, 'limit', 25, int)
+
+
+async def memory_snapshot_endpoint(request):
+    """POST ?group_by=lineno|filename|traceback&limit=25: take a snapshot; returns its ID and largest sites."""
+    import asyncio
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        group_by, limit = _memory_query(request)
+    except ValueError as e:
+        return _bad_request(e)
+    # Snapshots and statistics walk the whole traced heap: off the event loop
+    try:
+        snapshot_id = await asyncio.to_thread(MEMORY.take)
+    except RuntimeError as e:
+        return JSONResponse({'error': str(e)}, status_code=409)
+    top = await asyncio.to_thread(MEMORY.top, snapshot_id, group_by, limit)
+    return JSONResponse({'id': snapshot_id, **MEMORY.status(), 'top': top})
+
+
+async def memory_diff_endpoint(request):
+    """GET ?base=<id>&other=<id>&group_by=lineno&limit=25: growth per site from `base` to `other` (default: a new snapshot)."""
+    import asyncio
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    try:
+        group_by, limit = _memory_query(request)
+    except ValueError as e:
+        return _bad_request(e)
+    try:
+        base_id = int(request.query_params['base'])
+        MEMORY.get(base_id)
+        other_id = int(request.query_params['other']) if 'other' in request.query_params else None
+        if other_id is not None:
+            MEMORY.get(other_id)
+    except (KeyError, ValueError) as e:
+        return JSONResponse({'error': f"base (and optional other) must be snapshot IDs: {e}"}, status_code=400)
+    try:
+        if other_id is None:
+            other_id = await asyncio.to_thread(MEMORY.take)
+        stats = await asyncio.to_thread(MEMORY.diff, base_id, other_id, group_by, limit)
+    except RuntimeError as e:
+        return JSONResponse({'error': str(e)}, status_code=409)
+    except KeyError as e:
+        # The base was dropped by a newer snapshot (MAX_SNAPSHOTS) meanwhile
+        return JSONResponse({'error': f"base (and optional other) must be snapshot IDs: {e}"}, status_code=400)
+    return JSONResponse({'base': base_id, 'other': other_id, 'group_by': group_by, 'diff': stats})
+
+
+async def profiling_status_endpoint(request):
+    from starlette.responses import JSONResponse
+
+    if error := _unauthorized(request):
+        return error
+    return JSONResponse({'cpu': PROFILER.status(), 'memory': MEMORY.status()})
+
+
+# (path, methods, endpoint) of the admin routes
+PROFILING_ROUTES = [
+    ('/debug/profile', ['GET'], profiling_status_endpoint),
+    ('/debug/profile/cpu', ['GET'], cpu_profile_endpoint),
+    ('/debug/profile/cpu/start', ['POST'], cpu_start_endpoint),
+    ('/debug/profile/cpu/stop', ['POST'], cpu_stop_endpoint),
+    ('/debug/profile/memory/start', ['POST'], memory_start_endpoint),
+    ('/debug/profile/memory/stop', ['POST'], memory_stop_endpoint),
+    ('/debug/profile/memory/snapshot', ['POST'], memory_snapshot_endpoint),
+    ('/debug/profile/memory/diff', ['GET'], memory_diff_endpoint),
+]
+
+
+def add_profiling_routes(app):
+    """Register the profiling endpoints on a Starlette app."""
+    for path, methods, endpoint in PROFILING_ROUTES:
+        app.add_route(path, endpoint, methods=methods)
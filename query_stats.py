@@ -0,0 +1,166 @@
+"""
+SQL Statement Statistics
+Per-statement-shape timings, a slow-query log with EXPLAIN QUERY PLAN, and top-query ranking
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from tracing import TracedCursor
+
+# Ranking keys accepted by top_queries()
+ORDER_KEYS = ('total_ms', 'calls', 'avg_ms', 'max_ms', 'rows')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(sql: str) -> str:
+    """Normalize a statement so calls differing only in literals share a shape."""
+    shape = ' '.join(sql.split())
+    shape = _STRING_LITERAL.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    return _IN_LIST.sub('IN (...)', shape)
+
+
+class QueryStats:
+    """Aggregates statement timings per shape and logs slow statements.
+
+    Statements taking at least `slow_ms` are appended to `slow_log_path`
+    (JSON lines) with their EXPLAIN QUERY PLAN, and kept in a short
+    in-memory ring for the diagnostics tool. Statements run on the event
+    loop and on worker threads (shard scatter, prefetch, report jobs), so
+    updates take a lock.
+    """
+
+    def __init__(self, enabled: bool = False, slow_ms: float = 50.0,
+                 slow_log_path: str | None = None, recent_slow: int = 50):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.shapes = {}  # shape -> [calls, total_s, max_s, rows]
+        self.slow = deque(maxlen=recent_slow)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, conn: sqlite3.Connection, sql: str, parameters, seconds: float, rows: int):
+        shape = statement_shape(sql)
+        with self._lock:
+            entry = self.shapes.get(shape)
+            if entry is None:
+                entry = self.shapes[shape] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[3] += rows
+            if seconds > entry[2]:
+                entry[2] = seconds
+        # The EXPLAIN runs outside the lock
+        if seconds * 1000 >= self.slow_ms:
+            self._log_slow(conn, sql, parameters, seconds, rows)
+
+    def _log_slow(self, conn, sql, parameters, seconds, rows):
+        record = {
+            'timestamp': time.time(),
+            'duration_ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'statement': ' '.join(sql.split()),
+            'parameters': [repr(p) for p in parameters] if isinstance(parameters, (list, tuple)) else repr(parameters),
+            'plan': explain_query_plan(conn, sql, parameters),
+        }
+        with self._lock:
+            self.slow.append(record)
+            if self.slow_log_path:
+                with open(self.slow_log_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+    def top(self, limit: int = 10, order_by: str = 'total_ms') -> list[dict]:
+        if order_by not in ORDER_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDER_KEYS)}")
+        with self._lock:
+            shapes = [(shape, tuple(entry)) for shape, entry in self.shapes.items()]
+        rows = [
+            {
+                'statement': shape,
+                'calls': calls,
+                'total_ms': round(total * 1000, 3),
+                'avg_ms': round(total * 1000 / calls, 3),
+                'max_ms': round(max_s * 1000, 3),
+                'rows': row_count,
+                'avg_rows': round(row_count / calls, 1),
+            }
+            for shape, (calls, total, max_s, row_count) in shapes
+        ]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def recent_slow(self, limit: int = 10) -> list[dict]:
+        with self._lock:
+            return list(self.slow)[-limit:]
+
+    def reset(self):
+        with self._lock:
+            self.shapes.clear()
+            self.slow.clear()
+            self.started_at = time.time()
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, parameters) -> list[str]:
+    """EXPLAIN QUERY PLAN lines for a statement (empty if it cannot be explained)."""
+    try:
+        # A plain cursor, so the EXPLAIN itself is not recorded
+        cursor = sqlite3.Cursor(conn)
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+QUERY_STATS = QueryStats(
+    enabled=_env_flag('QUERY_STATS'),
+    slow_ms=float(os.getenv('SLOW_QUERY_MS', 50)),
+    slow_log_path=os.getenv('SLOW_QUERY_LOG', 'slow_queries.jsonl'),
+)
+
+
+class StatsCursor(TracedCursor):
+    """TracedCursor that also feeds QUERY_STATS."""
+
+    def statement_observer(self, sql, parameters, seconds, rows):
+        QUERY_STATS.record(self.connection, sql, parameters, seconds, rows)
+
+
+def cursor_factory() -> type[sqlite3.Cursor]:
+    """Cursor class for new cursors: statistics only cost anything when enabled."""
+    return StatsCursor if QUERY_STATS.enabled else TracedCursor
+
+
+def configure(enabled: bool | None = None, slow_ms: float | None = None, slow_log_path: str | None = None):
+    """Change settings at runtime (diagnostics tool, benchmarks)."""
+    if enabled is not None:
+        QUERY_STATS.enabled = enabled
+    if slow_ms is not None:
+        QUERY_STATS.slow_ms = slow_ms
+    if slow_log_path is not None:
+        QUERY_STATS.slow_log_path = slow_log_path or None
+
+
+def diagnostics(limit: int = 10, order_by: str = 'total_ms') -> dict:
+    """Top statements plus recent slow queries, as returned by the top_queries tool."""
+    return {
+        'enabled': QUERY_STATS.enabled,
+        'slow_query_ms': QUERY_STATS.slow_ms,
+        'since': QUERY_STATS.started_at,
+        'top': QUERY_STATS.top(limit, order_by),
+        'recent_slow': QUERY_STATS.recent_slow(limit),
+    }
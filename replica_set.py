@@ -0,0 +1,231 @@
+"""
+Agent Replica Sets
+Client-side load balancing across replicas of an agent: power of two choices or least outstanding requests, passive health ejection with slow start, and optional context affinity
+"""
+import functools
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from metrics import REGISTRY, REPLICA_EJECTIONS, REPLICA_OUTSTANDING, REPLICA_REQUESTS, REPLICA_WEIGHT
+from service_config import AGENT_ROLES, agent_balancer_options, agent_urls
+
+POLICIES = ('p2c', 'least_outstanding')
+
+# Conversations and tasks pinned to a replica, per replica set (least recently used dropped first)
+MAX_PINNED = 10_000
+
+# Weight of a replica right after re-admission; it grows linearly to 1 over the slow start
+MIN_WEIGHT = 0.1
+
+# Ejection time doubles with every ejection in a row, up to this
+MAX_EJECTION_SECONDS = 300.0
+
+
+def is_replica_failure(error: BaseException) -> bool:
+    """Whether an error says the replica is unreachable or unhealthy, rather than the request being bad."""
+    import httpx
+    from a2a.client.errors import A2AClientHTTPError, A2AClientTimeoutError
+
+    if isinstance(error, (A2AClientTimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, A2AClientHTTPError):
+        return error.status_code >= 500
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return False
+
+
+def is_connect_failure(error: BaseException) -> bool:
+    """Whether the request never reached the replica, so it is safe to send to another one."""
+    import httpx
+
+    return isinstance(error, httpx.ConnectError) or isinstance(error.__cause__, httpx.ConnectError)
+
+
+class Replica:
+    """One replica's in-flight requests and health."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejections = 0          # ejections in a row, reset by a success after full re-admission
+        self.ejected_until = 0.0
+        self.admitted_at = 0.0      # start of the slow start (0: never ejected)
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def weight(self, now: float, slow_start: float) -> float:
+        if self.ejected(now):
+            return 0.0
+        if not self.admitted_at or slow_start <= 0:
+            return 1.0
+        return max(MIN_WEIGHT, min(1.0, (now - self.admitted_at) / slow_start))
+
+
+class ReplicaSet:
+    """Replicas of one agent role and the choice of replica for each request.
+
+    Requests go to the replica with the fewest outstanding requests, of two
+    replicas picked at random (`p2c`, the default) or of all of them
+    (`least_outstanding`). A replica failing `eject_failures` requests in a row (unreachable, timeout, 5xx) is ejected for
+    `eject_seconds`, doubling on repeated ejections. It then re-enters with
+    a weight ramping from MIN_WEIGHT to 1 over `slow_start` seconds: the
+    share of picks it takes part in. When every replica is ejected, the one
+    due back first is used.
+
+    With `affinity` (off by default), a conversation (A2A context ID) stays
+    on the replica holding its session: its first request is balanced like
+    any other and the context is pinned to the replica that took it, until
+    that replica is ejected. Task calls (get, cancel, resubscribe) always go
+    to the replica that ran the task.
+    """
+
+    def __init__(self, role: str, urls: list[str], policy: str = 'p2c', affinity: bool = False,
+                 eject_failures: int = 3, eject_seconds: float = 10.0, slow_start: float = 30.0,
+                 rng: Optional[random.Random] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+        if not urls:
+            raise ValueError("a replica set needs at least one URL")
+        self.role = role
+        self.replicas = [Replica(url) for url in dict.fromkeys(url.rstrip('/') for url in urls)]
+        self.policy = policy
+        self.affinity = affinity
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.slow_start = slow_start
+        self._by_url = {replica.url: replica for replica in self.replicas}
+        self._contexts = OrderedDict()  # context ID → replica URL
+        self._tasks = OrderedDict()     # task ID → replica URL
+        self._lock = threading.Lock()
+        self._rng = rng or random.Random()
+
+    @property
+    def urls(self) -> list[str]:
+        return [replica.url for replica in self.replicas]
+
+    def _available(self, now: float, exclude=()) -> list[Replica]:
+        candidates = [replica for replica in self.replicas if replica.url not in exclude] or self.replicas
+        healthy = [replica for replica in candidates if not replica.ejected(now)]
+        return healthy or [min(candidates, key=lambda replica: replica.ejected_until)]
+
+    def _least_loaded(self, candidates: list[Replica], now: float) -> Replica:
+        # A replica in slow start takes part in a share of picks equal to its weight
+        eligible = [replica for replica in candidates
+                    if self._rng.random() < replica.weight(now, self.slow_start)] or candidates
+        if self.policy == 'p2c' and len(eligible) > 2:
+            eligible = self._rng.sample(eligible, 2)
+        return min(eligible, key=lambda replica: (replica.outstanding, self._rng.random()))
+
+    @staticmethod
+    def _pin(pins: OrderedDict, key: str, url: str):
+        pins[key] = url
+        pins.move_to_end(key)
+        while len(pins) > MAX_PINNED:
+            pins.popitem(last=False)
+
+    def pick(self, context_id: Optional[str] = None, task_id: Optional[str] = None, exclude=()) -> Replica:
+        """Replica for a request of conversation `context_id` / about task `task_id` (both optional)."""
+        now = time.monotonic()
+        with self._lock:
+            # A task exists only on its replica, ejected or not
+            replica = self._by_url.get(self._tasks.get(task_id)) if task_id else None
+            if replica is not None and replica.url not in exclude:
+                return replica
+            candidates = self._available(now, exclude)
+            if not (context_id and self.affinity):
+                return self._least_loaded(candidates, now)
+            replica = self._by_url.get(self._contexts.get(context_id))
+            if replica is not None and replica in candidates:
+                self._contexts.move_to_end(context_id)
+                return replica
+            # New conversation (or its replica is ejected): balanced, then pinned by remember()
+            return self._least_loaded(candidates, now)
+
+    def remember(self, replica: Replica, context_id: Optional[str] = None, task_id: Optional[str] = None):
+        """Pin the conversation and task seen in a replica's response to that replica."""
+        with self._lock:
+            if context_id and self.affinity:
+                self._pin(self._contexts, context_id, replica.url)
+            if task_id:
+                self._pin(self._tasks, task_id, replica.url)
+
+    def _release(self, replica: Replica, outcome: str):
+        now = time.monotonic()
+        with self._lock:
+            replica.outstanding -= 1
+            if outcome in ('ok', 'error'):
+                # The replica answered
+                replica.consecutive_failures = 0
+                if replica.ejections and now - replica.admitted_at >= self.slow_start:
+                    replica.ejections = 0
+            elif outcome == 'failed':
+                replica.consecutive_failures += 1
+                if replica.consecutive_failures >= self.eject_failures and not replica.ejected(now):
+                    replica.ejections += 1
+                    replica.consecutive_failures = 0
+                    replica.ejected_until = now + min(self.eject_seconds * 2 ** (replica.ejections - 1),
+                                                      MAX_EJECTION_SECONDS)
+                    replica.admitted_at = replica.ejected_until
+                    REPLICA_EJECTIONS.labels(self.role, replica.url).inc()
+        REPLICA_REQUESTS.labels(self.role, replica.url, outcome).inc()
+
+    @contextmanager
+    def track(self, replica: Replica):
+        """Count a request to `replica` as outstanding while the block runs, and record how it ended."""
+        with self._lock:
+            replica.outstanding += 1
+        outcome = 'ok'
+        try:
+            yield replica
+        except BaseException as e:
+            # Cancelled calls and abandoned streams say nothing about the replica
+            outcome = ('failed' if is_replica_failure(e) else 'error') if isinstance(e, Exception) else 'cancelled'
+            raise
+        finally:
+            self._release(replica, outcome)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                replica.url: {
+                    'outstanding': replica.outstanding,
+                    'weight': round(replica.weight(now, self.slow_start), 3),
+                    'ejected_for': round(max(replica.ejected_until - now, 0.0), 1),
+                    'consecutive_failures': replica.consecutive_failures,
+                }
+                for replica in self.replicas
+            }
+
+    def _collect(self):
+        now = time.monotonic()
+        for replica in self.replicas:
+            REPLICA_OUTSTANDING.labels(self.role, replica.url).set(replica.outstanding)
+            REPLICA_WEIGHT.labels(self.role, replica.url).set(replica.weight(now, self.slow_start))
+
+
+@functools.lru_cache(maxsize=None)
+def get_replica_set(role: str) -> Optional[ReplicaSet]:
+    """The role's replica set (shared by every client in the process), or None with a single URL."""
+    urls = agent_urls(role)
+    if len(urls) < 2:
+        return None
+    replicas = ReplicaSet(role, urls, **agent_balancer_options(role))
+    REGISTRY.register_collector(replicas._collect)
+    return replicas
+
+
+def replica_set_for_url(url: str) -> Optional[ReplicaSet]:
+    """Replica set an agent URL belongs to (any replica's URL), or None."""
+    url = url.rstrip('/')
+    for role in AGENT_ROLES:
+        if url in agent_urls(role):
+            return get_replica_set(role)
+    return None
@@ -0,0 +1,240 @@
+"""
+Background Report Jobs
+Runs bulk customer reports of the data agent as A2A tasks on a bounded worker pool, with progress, artifact results and cancellation
+"""
+import contextvars
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+# Request metadata asking for a report job: {"report": <name in REPORTS>, "args": {...}}
+REPORT_JOB_METADATA_KEY = 'report_job'
+
+# Artifact holding the rows once the report is done
+REPORT_ARTIFACT_ID = 'report'
+
+# Customers scanned per query: short reads keep writers and interactive queries moving
+DEFAULT_CHUNK_SIZE = 1000
+
+# Minimum seconds between progress status updates
+PROGRESS_INTERVAL = 0.5
+
+
+# ============================================================================
+# Reports
+# ============================================================================
+
+def _customer_scan(status: Optional[str], open_tickets_only: bool,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[int, int, list[dict]]]:
+    """Walk the customers shard by shard in ID order, yielding (scanned, total, matching rows) per chunk."""
+    import mcp_service
+
+    where = " WHERE status = ?" if status else ""
+    params = [status] if status else []
+    total = sum(rows[0][0] for rows in mcp_service.query_all_shards(f"SELECT COUNT(*) FROM customers{where}", params))
+    query = f"""
+        SELECT c.*, EXISTS (
+            SELECT 1 FROM tickets t WHERE t.customer_id = c.id AND t.status = 'open'
+        ) AS has_open_tickets
+        FROM customers c
+        WHERE c.id > ?{' AND c.status = ?' if status else ''}
+        ORDER BY c.id LIMIT ?
+    """
+    scanned = 0
+    for path in mcp_service.db_shard_paths():
+        last_id = 0
+        while True:
+            conn = mcp_service.get_db_connection(path)
+            try:
+                rows = conn.execute(query, [last_id, *params, chunk_size]).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            scanned += len(rows)
+            matches = [row for row in rows if row['has_open_tickets'] or not open_tickets_only]
+            yield scanned, total, [{key: row[key] for key in row.keys() if key != 'has_open_tickets'} for row in matches]
+
+
+# Report name → function of the report's arguments returning the chunk iterator
+REPORTS: dict[str, Callable[..., Iterator[tuple[int, int, list[dict]]]]] = {
+    'customers_with_open_tickets': lambda status=None: _customer_scan(status, open_tickets_only=True),
+    'customers': lambda status=None: _customer_scan(status, open_tickets_only=False),
+}
+
+
+def requested_report(metadata: Optional[dict]) -> Optional[dict]:
+    """The report job asked for in request metadata, or None for an interactive request."""
+    request = (metadata or {}).get(REPORT_JOB_METADATA_KEY)
+    if not isinstance(request, dict) or not isinstance(request.get('report'), str):
+        return None
+    args = request.get('args') or {}
+    return {'report': request['report'], 'args': args if isinstance(args, dict) else {}}
+
+
+# ============================================================================
+# Job runner (A2A executor side)
+# ============================================================================
+
+class ReportJobRunner:
+    """Runs report jobs for an agent executor on a bounded thread pool.
+
+    The task is reported `working` right away; the report then runs on one
+    of `workers` threads, off the event loop, so interactive requests are
+    not held up. Progress (customers scanned, rows so far) goes out as
+    status updates, at most every PROGRESS_INTERVAL; the rows are stored as
+    the task's `report` artifact when it completes. Jobs beyond
+    `max_pending` (running plus queued) are rejected.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jobs = {}  # task ID → cancel event
+        self.counts = {'completed': 0, 'canceled': 0, 'failed': 0, 'rejected': 0}
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report')
+        return self._executor
+
+    def snapshot(self) -> dict:
+        return {'pending': len(self.jobs), 'workers': self.workers, 'max_pending': self.max_pending, **self.counts}
+
+    async def run(self, context, event_queue, request: dict):
+        """Execute the report job of an A2A request (the body of AgentExecutor.execute)."""
+        import asyncio
+        from a2a.server.tasks import TaskUpdater
+        from a2a.types import DataPart, Part, Task, TaskState, TaskStatus
+        from a2a.utils import new_agent_text_message
+
+        def message(text):
+            return new_agent_text_message(text, context.context_id, context.task_id)
+
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        name, args = request['report'], request['args']
+        if context.current_task is None:
+            # The first event is what a non-blocking message/send returns
+            await event_queue.enqueue_event(Task(
+                id=context.task_id,
+                context_id=context.context_id,
+                status=TaskStatus(state=TaskState.working, message=message(f"Report {name} queued")),
+                history=[context.message] if context.message else [],
+                metadata={REPORT_JOB_METADATA_KEY: request},
+            ))
+        if name not in REPORTS:
+            self.counts['rejected'] += 1
+            await updater.reject(message(f"Unknown report {name}; available: {', '.join(REPORTS)}"))
+            return
+        if len(self.jobs) >= self.max_pending:
+            self.counts['rejected'] += 1
+            await updater.reject(message(f"Report queue is full ({self.max_pending} jobs); retry later"))
+            return
+        try:
+            chunks = REPORTS[name](**args)
+        except TypeError as e:
+            self.counts['rejected'] += 1
+            await updater.reject(message(f"Invalid arguments for report {name}: {e}"))
+            return
+
+        loop = asyncio.get_running_loop()
+        updates = asyncio.Queue()
+        cancelled = threading.Event()
+        self.jobs[context.task_id] = cancelled
+
+        def work():
+            # Runs on a report worker; stops between chunks once the job is cancelled
+            try:
+                for chunk in chunks:
+                    if cancelled.is_set():
+                        return
+                    loop.call_soon_threadsafe(updates.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(updates.put_nowait, e)
+            else:
+                loop.call_soon_threadsafe(updates.put_nowait, None)
+
+        started = time.perf_counter()
+        results, scanned, last_progress = [], 0, 0.0
+        try:
+            self._get_executor().submit(contextvars.copy_context().run, work)
+            while True:
+                update = await updates.get()
+                if update is None:
+                    break
+                if isinstance(update, Exception):
+                    self.counts['failed'] += 1
+                    await updater.failed(message(f"Report {name} failed: {update}"))
+                    return
+                scanned, total, rows = update
+                results.extend(rows)
+                if time.perf_counter() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.perf_counter()
+                    await updater.update_status(
+                        TaskState.working, message(f"Scanned {scanned}/{total} customers"),
+                        metadata={'progress': {'scanned': scanned, 'total': total, 'rows': len(results)}},
+                    )
+            # One artifact with every row: each consumer of the task's events (the
+            # request, resubscribers) saves the task, so appended chunks could be lost
+            await updater.add_artifact([Part(root=DataPart(data={'rows': results}))],
+                                       artifact_id=REPORT_ARTIFACT_ID, name=name, last_chunk=True)
+            self.counts['completed'] += 1
+            await updater.update_status(
+                TaskState.completed,
+                message(f"Report {name} finished: {len(results)} rows from {scanned} customers "
+                        f"in {time.perf_counter() - started:.1f}s"),
+                final=True, metadata={'progress': {'scanned': scanned, 'total': scanned, 'rows': len(results)}},
+            )
+        finally:
+            cancelled.set()
+            self.jobs.pop(context.task_id, None)
+
+    async def cancel(self, context, event_queue) -> bool:
+        """Stop a running or queued report job; False if the task is not one of ours."""
+        cancelled = self.jobs.get(context.task_id)
+        if cancelled is None:
+            return False
+        from a2a.server.tasks import TaskUpdater
+        from a2a.utils import new_agent_text_message
+
+        cancelled.set()
+        self.counts['canceled'] += 1
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel(
+            new_agent_text_message("Report cancelled", context.context_id, context.task_id)
+        )
+        return True
+
+
+def create_report_request_handler(**kwargs):
+    """DefaultRequestHandler that answers report jobs sent with message/send at once.
+
+    A report job sent with message/send is handled as non-blocking whatever
+    the client asked for, so it returns the `working` task instead of holding
+    the HTTP request (and an admission slot) until the report is done.
+    Progress can be followed with tasks/resubscribe, tasks/get or a push
+    notification config, and the task cancelled with tasks/cancel.
+    """
+    from a2a.server.request_handlers import DefaultRequestHandler
+    from a2a.types import MessageSendConfiguration
+
+    class ReportRequestHandler(DefaultRequestHandler):
+        async def on_message_send(self, params, context=None):
+            if requested_report(params.metadata):
+                configuration = params.configuration or MessageSendConfiguration()
+                params = params.model_copy(update={'configuration': configuration.model_copy(update={'blocking': False})})
+            return await super().on_message_send(params, context)
+
+    return ReportRequestHandler(**kwargs)
+
+
+def report_rows(task) -> list[dict]:
+    """Rows of a completed report task."""
+    rows = []
+    for artifact in task.artifacts or []:
+        if artifact.artifact_id == REPORT_ARTIFACT_ID:
+            for part in artifact.parts:
+                rows.extend(getattr(part.root, 'data', {}).get('rows', []))
+    return rows
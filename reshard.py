@@ -0,0 +1,176 @@
+"""
+Resharding Tool
+Copies the customer database into a new shard layout (e.g. 1 → 4 files), routing every row by customer ID
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sqlite3
+import time
+
+from sharding import routing_column, seed_id_blocks, shard_index, shard_paths
+
+DEFAULT_DB_PATH = 'multi_agent_service.db'
+
+# AUTOINCREMENT IDs that are shown to users and must stay unique across shards
+GLOBAL_ID_TABLES = ('customers', 'tickets')
+
+# Per-shard sequences that are renumbered in the new layout (in commit-time
+# order); change feed cursors from the old layout are not valid in the new one
+RENUMBERED_COLUMNS = {'ticket_events': 'seq'}
+
+
+def _schema(conn) -> list[tuple[str, str, str]]:
+    """(type, name, sql) of the user tables, then indexes, then triggers and views."""
+    return conn.execute(
+        """
+        SELECT type, name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+        ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, name
+        """
+    ).fetchall()
+
+
+def _virtual_tables(objects) -> list[str]:
+    return [name for kind, name, sql in objects if kind == 'table' and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+
+
+def _remove(path: str):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def reshard(db_path: str, from_count: int, to_count: int, batch_size: int = 10_000, force: bool = False) -> dict:
+    """Copy the `from_count`-shard layout of `db_path` into a `to_count`-shard layout.
+
+    The source files are only read and are left in place. Indexes and
+    triggers are created after the rows are copied, so the copy itself
+    does not add change-feed events. Virtual tables (the FTS5 customer name
+    index) are created then as well and rebuilt from the copied rows, their
+    shadow tables are not copied. Tables without a customer key are
+    treated as reference data and copied to every new shard. Stop writers
+    before resharding: changes made during the copy are not carried over.
+    """
+    if from_count == to_count:
+        raise ValueError("source and target layouts are the same")
+    sources = shard_paths(db_path, from_count)
+    targets = shard_paths(db_path, to_count)
+    missing = [path for path in sources if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"missing source shards: {', '.join(missing)}")
+    existing = [path for path in targets if os.path.exists(path)]
+    if existing and not force:
+        raise FileExistsError(f"target shards exist (use --force to replace): {', '.join(existing)}")
+    for path in existing:
+        _remove(path)
+
+    started = time.perf_counter()
+    source_conns = [sqlite3.connect(path) for path in sources]
+    target_conns = [sqlite3.connect(path) for path in targets]
+    objects = _schema(source_conns[0])
+    virtual = _virtual_tables(objects)
+    derived = set(virtual) | {name for kind, name, _ in objects
+                              if kind == 'table' and any(name.startswith(f'{table}_') for table in virtual)}
+    tables = [name for kind, name, _ in objects if kind == 'table' and name not in derived]
+    for conn in target_conns:
+        conn.execute("PRAGMA synchronous = OFF")
+        for kind, name, sql in objects:
+            if kind == 'table' and name in tables:
+                conn.execute(sql)
+
+    report = {}
+    max_ids = {}
+    for table in tables:
+        columns = [row[1] for row in source_conns[0].execute(f"PRAGMA table_info({table})")]
+        renumbered = RENUMBERED_COLUMNS.get(table)
+        copied = [column for column in columns if column != renumbered]
+        select = f"SELECT {', '.join(copied)} FROM {table}"
+        insert = f"INSERT INTO {table} ({', '.join(copied)}) VALUES ({', '.join('?' * len(copied))})"
+        key = routing_column(table)
+        key_position = copied.index(key) if key in copied else None
+
+        if key_position is None:
+            rows = source_conns[0].execute(select)
+        elif renumbered:
+            # Interleave the sources by commit time, so each new shard numbers its events chronologically
+            order = copied.index('created_at') if 'created_at' in copied else None
+            rows = heapq.merge(*(conn.execute(f"{select} ORDER BY {renumbered}") for conn in source_conns),
+                               key=(lambda row: row[order] or '') if order is not None else None)
+        else:
+            rows = itertools.chain.from_iterable(conn.execute(select) for conn in source_conns)
+
+        counts = [0] * to_count
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            if key_position is None:
+                for index, conn in enumerate(target_conns):
+                    conn.executemany(insert, batch)
+                    counts[index] += len(batch)
+                continue
+            by_shard = {}
+            for row in batch:
+                owner = row[key_position]
+                by_shard.setdefault(shard_index(owner, to_count) if owner is not None else 0, []).append(row)
+            for index, part in by_shard.items():
+                target_conns[index].executemany(insert, part)
+                counts[index] += len(part)
+
+        source_rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                          for conn in (source_conns if key_position is not None else source_conns[:1]))
+        copied_rows = sum(counts) if key_position is not None else counts[0]
+        if copied_rows != source_rows:
+            raise RuntimeError(f"{table}: copied {copied_rows} rows, expected {source_rows}")
+        report[table] = {'source_rows': source_rows, 'shard_rows': counts}
+        if table in GLOBAL_ID_TABLES:
+            max_ids[table] = max(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                                 for conn in source_conns)
+
+    for conn in target_conns:
+        for kind, name, sql in objects:
+            if name in virtual:
+                conn.execute(sql)
+        for kind, _, sql in objects:
+            if kind != 'table':
+                conn.execute(sql)
+        for table in virtual:
+            conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+    if to_count > 1:
+        seed_id_blocks([conn.cursor() for conn in target_conns], GLOBAL_ID_TABLES, max_ids)
+    for conn in target_conns:
+        conn.commit()
+        conn.close()
+    for conn in source_conns:
+        conn.close()
+
+    return {
+        'from': list(sources),
+        'to': list(targets),
+        'tables': report,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Unsharded database path the shard files are named after')
+    parser.add_argument('--from', dest='from_count', type=int, default=int(os.getenv('DB_SHARDS', '1')),
+                        help='Current number of shards (default: DB_SHARDS or 1)')
+    parser.add_argument('--to', dest='to_count', type=int, required=True, help='Number of shards to create')
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--force', action='store_true', help='Replace existing target shard files')
+    args = parser.parse_args()
+
+    result = reshard(args.db, args.from_count, args.to_count, args.batch_size, args.force)
+    print(f"🔄 {len(result['from'])} → {len(result['to'])} shards in {result['seconds']}s")
+    for table, counts in result['tables'].items():
+        print(f"  {table:16} {counts['source_rows']:>10,} rows  → {counts['shard_rows']}")
+    print(f"✅ Written {', '.join(result['to'])}")
+    print(f"   Restart the servers with DB_SHARDS={args.to_count}; the old files are left in place.")
+
+
+if __name__ == "__main__":
+    main()
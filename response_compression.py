@@ -0,0 +1,182 @@
+"""
+Response Compression
+ASGI middleware compressing HTTP responses with zstd or gzip, negotiated from Accept-Encoding
+"""
+import gzip
+import zlib
+
+from metrics import REGISTRY
+
+# Bodies smaller than this are sent as-is (compression would not pay for itself)
+DEFAULT_MINIMUM_SIZE = 1024
+
+# Streaming responses (message/stream) must reach the client event by event
+EXCLUDED_CONTENT_TYPES = (b'text/event-stream',)
+
+RESPONSE_BYTES = REGISTRY.counter(
+    'http_response_body_bytes_total',
+    'Response body bytes before (identity) and after compression, by agent and encoding',
+    ('agent', 'encoding', 'stage'))
+
+
+def _zstd_module():
+    """zstd codec: `compression.zstd` (Python 3.14+) or the optional `zstandard` package."""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+_ZSTD = _zstd_module()
+
+
+class _GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, self.level, mtime=0)
+
+    def compressobj(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+
+class _ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return _ZSTD.compress(data, level=self.level)
+
+    def compressobj(self):
+        # zstandard streams through compressobj(); compression.zstd's compressor already has compress/flush
+        compressor = _ZSTD.ZstdCompressor(level=self.level)
+        return compressor.compressobj() if hasattr(compressor, 'compressobj') else compressor
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, in server preference order."""
+    return (['zstd'] if _ZSTD is not None else []) + ['gzip']
+
+
+def negotiate_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Pick the first of `encodings` the client accepts (q > 0), or None for identity."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compresses response bodies of at least `minimum_size` bytes.
+
+    zstd is preferred when both sides support it, gzip otherwise; clients
+    that send no Accept-Encoding get identity. Responses that already carry
+    a Content-Encoding, and server-sent event streams, pass through
+    untouched. Multi-chunk bodies are compressed incrementally.
+    """
+
+    def __init__(self, app, agent: str, minimum_size: int = DEFAULT_MINIMUM_SIZE,
+                 gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.agent = agent
+        self.minimum_size = minimum_size
+        self.codecs = {'gzip': _GzipCodec(gzip_level)}
+        if _ZSTD is not None:
+            self.codecs['zstd'] = _ZstdCodec(zstd_level)
+        self.encodings = [name for name in available_encodings() if name in self.codecs]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        accept_encoding = ''
+        for key, value in scope['headers']:
+            if key == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+                break
+        encoding = negotiate_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        await self.app(scope, receive, _CompressingSender(send, self.codecs[encoding], self.minimum_size, self.agent))
+
+
+class _CompressingSender:
+    """ASGI `send` wrapper deciding per response whether and how to compress."""
+
+    def __init__(self, send, codec, minimum_size: int, agent: str):
+        self.send = send
+        self.codec = codec
+        self.minimum_size = minimum_size
+        self.start = None
+        self.passthrough = False
+        self.stream = None
+        self.raw_bytes = RESPONSE_BYTES.labels(agent, codec.name, 'identity')
+        self.sent_bytes = RESPONSE_BYTES.labels(agent, codec.name, 'compressed')
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            headers = dict(message.get('headers', []))
+            content_type = headers.get(b'content-type', b'')
+            self.passthrough = b'content-encoding' in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            return await self.send(message)
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.stream is None:
+            if not more_body:
+                # Whole body in one message: compress it in one go
+                if len(body) < self.minimum_size:
+                    self.passthrough = True
+                    await self.send(self.start)
+                    return await self.send(message)
+                compressed = self.codec.compress(body)
+                self.raw_bytes.inc(len(body))
+                self.sent_bytes.inc(len(compressed))
+                await self.send(self._start_message(len(compressed)))
+                return await self.send({'type': 'http.response.body', 'body': compressed})
+            self.stream = self.codec.compressobj()
+            await self.send(self._start_message(None))
+
+        chunk = self.stream.compress(body)
+        if not more_body:
+            chunk += self.stream.flush()
+        self.raw_bytes.inc(len(body))
+        self.sent_bytes.inc(len(chunk))
+        await self.send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+    def _start_message(self, content_length: int | None) -> dict:
+        headers = [(key, value) for key, value in self.start.get('headers', [])
+                   if key not in (b'content-length', b'vary')]
+        vary = [value for key, value in self.start.get('headers', []) if key == b'vary']
+        headers.append((b'content-encoding', self.codec.name.encode()))
+        headers.append((b'vary', b', '.join(vary + [b'Accept-Encoding'])))
+        if content_length is not None:
+            headers.append((b'content-length', str(content_length).encode()))
+        return {**self.start, 'headers': headers}
@@ -0,0 +1,127 @@
+"""
+Service Configuration
+Hosts, ports, public URLs and worker counts for each agent, overridable via environment
+"""
+import os
+
+# Default ports per agent role
+AGENT_PORTS = {
+    'router': 10020,
+    'customer_data': 10021,
+    'support': 10022,
+}
+
+AGENT_ROLES = list(AGENT_PORTS)
+
+
+def _env(role: str, key: str, default=None):
+    """Look up `<ROLE>_AGENT_<KEY>`, then `AGENT_<KEY>`, then the default."""
+    return os.getenv(f'{role.upper()}_AGENT_{key}') or os.getenv(f'AGENT_{key}') or default
+
+
+def agent_host(role: str) -> str:
+    """Interface the agent's server binds to."""
+    return _env(role, 'HOST', '127.0.0.1')
+
+
+def agent_port(role: str) -> int:
+    """Port the agent's server listens on (never shared between roles)."""
+    return int(os.getenv(f'{role.upper()}_AGENT_PORT') or AGENT_PORTS[role])
+
+
+def agent_url(role: str) -> str:
+    """Public base URL other agents and clients use to reach the agent."""
+    return os.getenv(f'{role.upper()}_AGENT_URL') or f'http://localhost:{agent_port(role)}'
+
+
+def agent_urls(role: str) -> list[str]:
+    """Base URLs of the agent's replicas clients balance across (`<ROLE>_AGENT_URLS`, comma-separated)."""
+    urls = os.getenv(f'{role.upper()}_AGENT_URLS')
+    if not urls:
+        return [agent_url(role)]
+    return [url.strip().rstrip('/') for url in urls.split(',') if url.strip()]
+
+
+def agent_balancer_options(role: str) -> dict:
+    """Client-side balancing across the agent's replicas (see replica_set.py): policy
+    (p2c or least_outstanding), context affinity, ejection after consecutive
+    failures and its duration (seconds), and the slow start after re-admission (seconds).
+    """
+    return {
+        'policy': _env(role, 'LB_POLICY', 'p2c'),
+        'affinity': str(_env(role, 'LB_AFFINITY', '0')).lower() in ('1', 'true', 'yes'),
+        'eject_failures': int(_env(role, 'LB_EJECT_FAILURES', 3)),
+        'eject_seconds': float(_env(role, 'LB_EJECT_SECONDS', 10)),
+        'slow_start': float(_env(role, 'LB_SLOW_START', 30)),
+    }
+
+
+def agent_workers(role: str) -> int:
+    """Number of worker processes the launcher starts for the agent."""
+    return int(_env(role, 'WORKERS', 1))
+
+
+def agent_admission_limits(role: str) -> dict:
+    """Admission control limits for the agent's server (MAX_IN_FLIGHT=0 disables it)."""
+    return {
+        'max_in_flight': int(_env(role, 'MAX_IN_FLIGHT', 32)),
+        'max_queue': int(_env(role, 'MAX_QUEUE', 64)),
+        'queue_timeout': float(_env(role, 'QUEUE_TIMEOUT', 10.0)),
+    }
+
+
+def agent_store_limits(role: str) -> dict:
+    """Capacity, memory (MB) and idle-TTL (seconds) limits for the agent's in-memory stores.
+
+    A limit of 0 disables it. SESSION_DB names an optional SQLite file holding
+    the sessions instead, shared by all workers of the agent (only the idle
+    TTL applies). TASK_SPILL_DB names an optional SQLite file that
+    keeps evicted tasks retrievable for TASK_SPILL_TTL seconds. Idle entries are also evicted every
+    STORE_SWEEP_SECONDS, not only on writes.
+    """
+    return {
+        'session_max_items': int(_env(role, 'SESSION_MAX_ITEMS', 10_000)),
+        'session_max_mb': float(_env(role, 'SESSION_MAX_MB', 512)),
+        'session_idle_ttl': float(_env(role, 'SESSION_IDLE_TTL', 3600)),
+        'session_db': _env(role, 'SESSION_DB'),
+        'task_max_items': int(_env(role, 'TASK_MAX_ITEMS', 10_000)),
+        'task_max_mb': float(_env(role, 'TASK_MAX_MB', 256)),
+        'task_idle_ttl': float(_env(role, 'TASK_IDLE_TTL', 3600)),
+        'artifact_max_items': int(_env(role, 'ARTIFACT_MAX_ITEMS', 10_000)),
+        'artifact_max_mb': float(_env(role, 'ARTIFACT_MAX_MB', 256)),
+        'memory_max_items': int(_env(role, 'MEMORY_MAX_ITEMS', 10_000)),
+        'memory_max_mb': float(_env(role, 'MEMORY_MAX_MB', 256)),
+        'task_spill_db': _env(role, 'TASK_SPILL_DB'),
+        'task_spill_ttl': float(_env(role, 'TASK_SPILL_TTL', 86400)),
+        'sweep_seconds': float(_env(role, 'STORE_SWEEP_SECONDS', 60)),
+    }
+
+
+def agent_warmup(role: str) -> dict:
+    """Warm-up settings: whether to send a synthetic request, and its timeout (seconds)."""
+    return {
+        'synthetic_request': str(_env(role, 'WARMUP_REQUEST', '1')).lower() not in ('0', 'false', 'no'),
+        'timeout': float(_env(role, 'WARMUP_TIMEOUT', 120)),
+    }
+
+
+def agent_history_turns(role: str) -> int:
+    """User turns of its session the agent's model sees (HISTORY_TURNS=0 sends the whole session)."""
+    return int(_env(role, 'HISTORY_TURNS', 3))
+
+
+def agent_report_limits(role: str) -> dict:
+    """Report job worker threads and the most jobs running or queued at once (see report_jobs.py)."""
+    return {
+        'workers': int(_env(role, 'REPORT_WORKERS', 2)),
+        'max_pending': int(_env(role, 'REPORT_MAX_PENDING', 16)),
+    }
+
+
+def agent_http_options(role: str) -> dict:
+    """Response compression (COMPRESSION=0 disables it) and JSON-RPC batching (MAX_BATCH=0 disables it)."""
+    return {
+        'compression': str(_env(role, 'COMPRESSION', '1')).lower() not in ('0', 'false', 'no'),
+        'compression_min_bytes': int(_env(role, 'COMPRESSION_MIN_BYTES', 1024)),
+        'max_batch': int(_env(role, 'MAX_BATCH', 20)),
+    }
@@ -0,0 +1,87 @@
+"""
+Customer Database Sharding
+Routes customer-scoped queries to one of N SQLite files by customer ID and scatter-gathers cross-shard queries
+"""
+import contextvars
+import functools
+import heapq
+import os
+from typing import Callable, Iterable, Optional
+
+# Every customer's tickets, events and other per-customer rows live in the
+# shard of its customers row. Tables and the column they are routed by:
+ROUTING_COLUMNS = {'customers': 'id'}
+DEFAULT_ROUTING_COLUMN = 'customer_id'
+
+# New ticket/customer IDs of each shard come from their own block, so IDs stay
+# unique across shards without coordination (see seed_id_blocks)
+ID_BLOCK = 10 ** 9
+
+_executor = None
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): going from N to N+1 buckets moves only ~1/(N+1) of the keys."""
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_index(customer_id: int, shard_count: int) -> int:
+    return jump_hash(int(customer_id), shard_count) if shard_count > 1 else 0
+
+
+@functools.lru_cache(maxsize=None)
+def shard_paths(db_path: str, shard_count: int) -> tuple[str, ...]:
+    """Files of a layout: `db_path` itself unsharded, else `<name>.shard<i>of<N><ext>` next to it."""
+    if shard_count <= 1:
+        return (db_path,)
+    root, ext = os.path.splitext(db_path)
+    return tuple(f"{root}.shard{i}of{shard_count}{ext}" for i in range(shard_count))
+
+
+def routing_column(table: str) -> str:
+    return ROUTING_COLUMNS.get(table, DEFAULT_ROUTING_COLUMN)
+
+
+def seed_id_blocks(cursors: list, tables: Iterable[str], max_ids: dict[str, int]):
+    """Start each shard's AUTOINCREMENT for `tables` in its own block above every existing ID.
+
+    Shard i of the new layout allocates from R + i * ID_BLOCK, where R is the
+    global maximum rounded up to a block boundary, so new rows never collide
+    with rows copied from the old layout or with other shards.
+    """
+    for table in tables:
+        base = -(-(max_ids.get(table, 0) + 1) // ID_BLOCK) * ID_BLOCK
+        for index, cursor in enumerate(cursors):
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base + index * ID_BLOCK))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='shard')
+    return _executor
+
+
+def scatter(shards: tuple, query: Callable[..., list]) -> list[list]:
+    """Run `query(shard)` for every shard path or index (in parallel when there are several), results in shard order."""
+    if len(shards) == 1:
+        return [query(shards[0])]
+    # Each query runs in a copy of the caller's context, so its statement spans join the caller's trace
+    futures = [_get_executor().submit(contextvars.copy_context().run, query, shard) for shard in shards]
+    return [future.result() for future in futures]
+
+
+def merge_sorted(results: list[list], key: Callable, limit: Optional[int] = None) -> list:
+    """Merge per-shard results that are each sorted by `key`, keeping the first `limit`."""
+    merged = heapq.merge(*results, key=key)
+    if limit is None:
+        return list(merged)
+    return [row for _, row in zip(range(limit), merged)]
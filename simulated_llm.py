@@ -0,0 +1,335 @@
+"""
+Simulated LLM Backend
+Offline model stand-in for load testing the router/specialist/MCP pipeline
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import string
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import PrivateAttr
+
+# ============================================================================
+# Latency Profiles
+# ============================================================================
+
+# ttft_ms: time to first token, tokens_per_sec: decode speed,
+# jitter: distribution applied to both (none, uniform, normal, lognormal),
+# jitter_pct: spread of that distribution relative to the base value.
+LATENCY_PROFILES = {
+    'instant': {'ttft_ms': 0.0, 'tokens_per_sec': 0.0, 'jitter': 'none', 'jitter_pct': 0.0},
+    'fast': {'ttft_ms': 80.0, 'tokens_per_sec': 400.0, 'jitter': 'uniform', 'jitter_pct': 0.1},
+    'realistic': {'ttft_ms': 350.0, 'tokens_per_sec': 120.0, 'jitter': 'lognormal', 'jitter_pct': 0.35},
+    'slow': {'ttft_ms': 1500.0, 'tokens_per_sec': 40.0, 'jitter': 'normal', 'jitter_pct': 0.25},
+}
+
+DEFAULT_PROFILE = 'realistic'
+
+# Tokens charged for emitting a single function call
+FUNCTION_CALL_TOKENS = 24
+
+# ============================================================================
+# Tool-Call Scripts
+# ============================================================================
+
+# Intents are matched in order against the latest user message; the first
+# match wins. A `fallback` intent only wins when no other intent matches the
+# latest or an earlier user message of the session, so a follow-up ("My
+# customer ID is 5") continues the earlier request. Each planned tool call is emitted as one model turn, and tool
+# calls whose arguments reference an unknown placeholder are skipped.
+# `agents` (on an intent or a single tool call) limits it to those agents.
+# Placeholders: $customer_id, $email, $message. IDs and emails missing from
+# the latest message are taken from earlier user messages of the session; a
+# reply needing one that is still unknown asks for it instead. `confidence`
+# (default DEFAULT_CONFIDENCE) is reported when the model cascade asks for it.
+DEFAULT_SCRIPT = [
+    {
+        'intent': 'update_contact',
+        'pattern': r'\bupdate\b|\bchange\b|new email',
+        'agents': ['customer_data_agent'],
+        'tools': [
+            {'name': 'tool_update_customer', 'args': {'customer_id': '$customer_id', 'data': '{"email": "$email"}'}},
+            {'name': 'tool_get_customer', 'args': {'customer_id': '$customer_id'}},
+        ],
+        'reply': 'Customer $customer_id record has been processed.',
+    },
+    {
+        'intent': 'ticket_triage',
+        'pattern': r'most urgent|escalate first|rank\w* (?:the )?(?:open )?tickets|triage',
+        'agents': ['support_agent'],
+        'tools': [
+            {'name': 'tool_rank_open_tickets', 'args': {'limit': 5}},
+        ],
+        'reply': 'These open tickets should be escalated first.',
+    },
+    {
+        'intent': 'open_ticket_report',
+        'pattern': r'open tickets|unresolved',
+        'agents': ['customer_data_agent'],
+        'tools': [
+            {'name': 'tool_get_customers_with_open_tickets', 'args': {'status': 'active'}},
+        ],
+        'reply': 'Here are the active customers with open tickets.',
+    },
+    {
+        'intent': 'billing_escalation',
+        'pattern': r'refund|charged twice|billing|compromised',
+        'tools': [
+            {'name': 'tool_get_customer', 'args': {'customer_id': '$customer_id'}},
+            {
+                'name': 'tool_create_ticket',
+                'agents': ['support_agent'],
+                'args': {'customer_id': '$customer_id', 'issue': '$message', 'priority': 'high'},
+            },
+        ],
+        'reply': 'I have escalated the billing issue for customer $customer_id as high priority.',
+    },
+    {
+        'intent': 'ticket_history',
+        'pattern': r'history|tickets',
+        'tools': [
+            {'name': 'tool_get_customer_history', 'args': {'customer_id': '$customer_id'}},
+        ],
+        'reply': 'This is the ticket history for customer $customer_id.',
+    },
+    {
+        'intent': 'list_customers',
+        'pattern': r'\blist\b|all (active )?customers',
+        'agents': ['customer_data_agent'],
+        'tools': [
+            {'name': 'tool_list_customers', 'args': {'status': 'active'}},
+        ],
+        'reply': 'Here is the list of customers.',
+    },
+    {
+        'intent': 'customer_lookup',
+        'pattern': r'.',
+        'tools': [
+            {'name': 'tool_get_customer', 'args': {'customer_id': '$customer_id'}},
+            {'name': 'tool_find_customer', 'args': {'email': '$email'}},
+        ],
+        'reply': 'I can help with that. Could you share your customer ID?',
+        'confidence': 0.5,
+        'fallback': True,
+    },
+]
+
+DEFAULT_CONFIDENCE = 0.9
+UNMATCHED_CONFIDENCE = 0.3
+MISSING_DETAILS_REPLY = 'Could you share your customer ID so I can look into it?'
+
+CUSTOMER_ID_PATTERN = re.compile(r'(?:customer(?:\s+id)?|\bid)\s*(?:is\s*)?#?(\d+)', re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+')
+
+
+def load_script(path: str) -> list[dict]:
+    """Load a tool-call script from a JSON file (same shape as DEFAULT_SCRIPT)."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_profile(name: str) -> dict:
+    """Resolve a latency profile by name, applying SIM_LLM_* env overrides."""
+    profile = dict(LATENCY_PROFILES.get(name, LATENCY_PROFILES[DEFAULT_PROFILE]))
+    overrides = {
+        'ttft_ms': ('SIM_LLM_TTFT_MS', float),
+        'tokens_per_sec': ('SIM_LLM_TOKENS_PER_SEC', float),
+        'jitter': ('SIM_LLM_JITTER', str),
+        'jitter_pct': ('SIM_LLM_JITTER_PCT', float),
+    }
+    for key, (env_var, cast) in overrides.items():
+        if os.getenv(env_var):
+            profile[key] = cast(os.environ[env_var])
+    return profile
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class SimulatedLlm(BaseLlm):
+    """Scriptable offline LLM with configurable latency characteristics.
+
+    Selected with model names of the form ``simulated`` or
+    ``simulated-<profile>`` (see LATENCY_PROFILES).
+    """
+
+    agent_name: Optional[str] = None
+    profile: dict = {}
+    script: list = []
+    seed: Optional[int] = None
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def model_post_init(self, __context: Any) -> None:
+        if not self.profile:
+            name = self.model.split('-', 1)[1] if '-' in self.model else os.getenv('SIM_LLM_PROFILE', DEFAULT_PROFILE)
+            self.profile = load_profile(name)
+        if not self.script:
+            script_path = os.getenv('SIM_LLM_SCRIPT')
+            self.script = load_script(script_path) if script_path else DEFAULT_SCRIPT
+        if self.seed is None and os.getenv('SIM_LLM_SEED'):
+            self.seed = int(os.environ['SIM_LLM_SEED'])
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r'simulated(-.*)?']
+
+    def _jitter(self, value: float) -> float:
+        """Apply the profile's jitter distribution to a base value."""
+        spread = self.profile.get('jitter_pct', 0.0)
+        kind = self.profile.get('jitter', 'none')
+        if value <= 0 or spread <= 0 or kind == 'none':
+            return value
+        if kind == 'uniform':
+            return value * self._rng.uniform(1 - spread, 1 + spread)
+        if kind == 'normal':
+            return max(0.0, self._rng.gauss(value, value * spread))
+        if kind == 'lognormal':
+            return value * self._rng.lognormvariate(0, spread)
+        raise ValueError(f"Unknown jitter distribution: {kind}")
+
+    def _time_to_first_token(self) -> float:
+        return self._jitter(self.profile.get('ttft_ms', 0.0)) / 1000.0
+
+    def _seconds_per_token(self) -> float:
+        tps = self._jitter(self.profile.get('tokens_per_sec', 0.0))
+        return 1.0 / tps if tps > 0 else 0.0
+
+    def _plan_next_turn(self, llm_request: LlmRequest) -> tuple[Optional[types.Part], str]:
+        """Pick the next function call from the script, or the final reply text."""
+        user_text = ''
+        earlier_texts = []
+        tool_results = []
+        for content in llm_request.contents:
+            parts = content.parts or []
+            if parts and parts[0].text == 'For context:':
+                # Other agents' turns, replayed by ADK as user-role context
+                continue
+            texts = [part.text for part in parts if part.text and not part.thought]
+            if content.role == 'user' and texts:
+                # The first text part is the user's message; later parts carry
+                # other agents' output forwarded by the router
+                if user_text:
+                    earlier_texts.append(user_text)
+                user_text = texts[0]
+                tool_results = []
+            tool_results.extend(part.function_response for part in parts if part.function_response)
+
+        # The latest message first, then earlier turns of the session (most recent last)
+        earlier_text = '\n'.join(earlier_texts)
+        customer_ids = CUSTOMER_ID_PATTERN.findall(user_text) or CUSTOMER_ID_PATTERN.findall(earlier_text)
+        emails = EMAIL_PATTERN.findall(user_text) or EMAIL_PATTERN.findall(earlier_text)
+        values = {'message': user_text.strip().splitlines()[-1][:120] if user_text.strip() else ''}
+        if customer_ids:
+            values['customer_id'] = customer_ids[-1]
+        if emails:
+            values['email'] = emails[-1]
+
+        intent = self._match_intent([user_text] + earlier_texts[::-1])
+        if intent is None:
+            return None, self._with_confidence(llm_request, 'How can I help you today?', UNMATCHED_CONFIDENCE)
+
+        calls = []
+        if not intent.get('agents') or self.agent_name in intent['agents']:
+            for call in intent.get('tools', []):
+                if call['name'] not in llm_request.tools_dict:
+                    continue
+                if call.get('agents') and self.agent_name not in call['agents']:
+                    continue
+                try:
+                    args = {
+                        key: string.Template(value).substitute(values) if isinstance(value, str) else value
+                        for key, value in call.get('args', {}).items()
+                    }
+                except KeyError:
+                    continue
+                calls.append((call['name'], {
+                    key: int(value) if isinstance(value, str) and value.isdigit() else value
+                    for key, value in args.items()
+                }))
+
+        if len(tool_results) < len(calls):
+            name, args = calls[len(tool_results)]
+            return types.Part(function_call=types.FunctionCall(name=name, args=args)), ''
+
+        try:
+            reply = string.Template(intent.get('reply', '')).substitute(values)
+        except KeyError:
+            # The reply needs a detail the user has not given yet
+            reply = MISSING_DETAILS_REPLY
+        for result in tool_results:
+            reply += '\n' + json.dumps(result.response, default=str)[:400]
+        return None, self._with_confidence(llm_request, reply, intent.get('confidence', DEFAULT_CONFIDENCE))
+
+    def _match_intent(self, texts: list[str]) -> Optional[dict]:
+        """First non-fallback intent matching the latest message, else an earlier one, else a fallback."""
+        for text in texts:
+            for entry in self.script:
+                if not entry.get('fallback') and re.search(entry['pattern'], text, re.IGNORECASE):
+                    return entry
+        return next(
+            (entry for entry in self.script if re.search(entry['pattern'], texts[0], re.IGNORECASE)),
+            None,
+        )
+
+    @staticmethod
+    def _with_confidence(llm_request: LlmRequest, reply: str, confidence: float) -> str:
+        """Append the `Confidence:` line the model cascade asks cheap tiers for."""
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        if isinstance(instruction, str) and 'Confidence:' in instruction:
+            return f"{reply}\nConfidence: {confidence}"
+        return reply
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        function_call, text = self._plan_next_turn(llm_request)
+        prompt_tokens = sum(
+            estimate_tokens(part.text or '') for content in llm_request.contents for part in content.parts or []
+        )
+
+        await asyncio.sleep(self._time_to_first_token())
+
+        if function_call is not None:
+            await asyncio.sleep(FUNCTION_CALL_TOKENS * self._seconds_per_token())
+            output_tokens = FUNCTION_CALL_TOKENS
+            parts = [function_call]
+        else:
+            words = text.split(' ')
+            per_word = estimate_tokens(text) / max(len(words), 1) * self._seconds_per_token()
+            if stream:
+                for i, word in enumerate(words):
+                    if i:
+                        await asyncio.sleep(per_word)
+                    chunk = word if i == 0 else ' ' + word
+                    yield LlmResponse(
+                        content=types.Content(role='model', parts=[types.Part(text=chunk)]),
+                        partial=True,
+                    )
+            else:
+                await asyncio.sleep(per_word * max(len(words) - 1, 0))
+            output_tokens = estimate_tokens(text)
+            parts = [types.Part(text=text)]
+
+        yield LlmResponse(
+            content=types.Content(role='model', parts=parts),
+            partial=False,
+            turn_complete=True,
+            model_version=self.model,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+
+LLMRegistry.register(SimulatedLlm)
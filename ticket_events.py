@@ -0,0 +1,249 @@
+"""
+Ticket Change Feed
+Reads the ticket_events outbox and wakes long-poll / SSE subscribers when new events are committed
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import AsyncIterator, Optional
+
+from metrics import REGISTRY
+
+# asyncio is imported where it is used: mcp_service imports this module and
+# the MCP tools are loaded by processes that never subscribe
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Seconds between commit checks while someone is subscribed (PRAGMA data_version, no table access)
+POLL_INTERVAL = float(os.getenv('TICKET_EVENTS_POLL_INTERVAL', '0.25'))
+
+# SSE comment sent on idle streams so proxies keep the connection open
+HEARTBEAT_SECONDS = 15.0
+
+EVENTS_DELIVERED = REGISTRY.counter(
+    'ticket_events_delivered_total', 'Ticket change events sent to subscribers', ('transport',))
+SUBSCRIBERS = REGISTRY.gauge(
+    'ticket_events_subscribers', 'Long-poll and SSE subscribers currently waiting', ('transport',))
+
+_outbox_ready = set()
+
+
+def outbox_connection(db_path: str):
+    import mcp_service
+
+    conn = mcp_service.get_db_connection(db_path)
+    if db_path not in _outbox_ready:
+        # Databases created before the outbox existed get it on first use; from
+        # then on the triggers record every change, whoever makes it
+        from db_initialize import create_ticket_events
+        create_ticket_events(conn.cursor())
+        conn.commit()
+        _outbox_ready.add(db_path)
+    return conn
+
+
+def _row_to_event(row) -> dict:
+    event = dict(row)
+    event['payload'] = json.loads(event['payload']) if event['payload'] else {}
+    return event
+
+
+# Position in the feed. Unsharded it is the event's seq. With DB_SHARDS > 1
+# every shard numbers its own events, and the cursor lists the last seq seen
+# per shard ("12.0.7"); "0" starts every shard from the beginning.
+
+def parse_cursor(after, shard_count: int) -> list[int]:
+    positions = [int(part) for part in str(after).split('.')]
+    if positions == [0]:
+        return [0] * shard_count
+    if len(positions) != shard_count:
+        raise ValueError(f"cursor {after!r} is from a different shard layout ({shard_count} shards now)")
+    return positions
+
+
+def format_cursor(positions: list[int]):
+    return positions[0] if len(positions) == 1 else '.'.join(map(str, positions))
+
+
+def read_events(after=0, customer_id: Optional[int] = None, limit: int = DEFAULT_LIMIT) -> tuple[list[dict], object]:
+    """Events after cursor `after`, oldest first, optionally for one customer; also returns the new cursor.
+
+    Every event carries the cursor just past it, for resuming mid-batch (the SSE event ID).
+    """
+    import mcp_service
+    from sharding import merge_sorted, scatter, shard_index
+
+    paths = mcp_service.db_shard_paths()
+    positions = parse_cursor(after, len(paths))
+    limit = min(limit, MAX_LIMIT)
+    query = "SELECT * FROM ticket_events WHERE seq > ?"
+    if customer_id is not None:
+        query += " AND customer_id = ?"
+    query += " ORDER BY seq LIMIT ?"
+
+    def run(index):
+        if customer_id is not None and index != shard_index(customer_id, len(paths)):
+            return []
+        params = [positions[index]] + ([customer_id] if customer_id is not None else []) + [limit]
+        conn = outbox_connection(paths[index])
+        try:
+            return [(index, _row_to_event(row)) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+    # Shards are interleaved by commit time; each shard's events stay in seq order
+    merged = merge_sorted(scatter(tuple(range(len(paths))), run),
+                          key=lambda item: (item[1]['created_at'], item[0]), limit=limit)
+    events = []
+    for index, event in merged:
+        positions[index] = event['seq']
+        if len(paths) > 1:
+            event['shard'] = index
+        event['cursor'] = format_cursor(positions)
+        events.append(event)
+    return events, format_cursor(positions)
+
+
+def latest_sequence():
+    """Cursor of the newest events (0 when the feed is empty); subscribe from here to get only new changes."""
+    import mcp_service
+
+    positions = []
+    for path in mcp_service.db_shard_paths():
+        conn = outbox_connection(path)
+        try:
+            positions.append(conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ticket_events").fetchone()[0])
+        finally:
+            conn.close()
+    return format_cursor(positions)
+
+
+class TicketEventFeed:
+    """Wakes subscribers when the database has new commits.
+
+    One watcher per process checks `PRAGMA data_version` of every shard
+    (which changes when any other connection commits) every POLL_INTERVAL while there are
+    subscribers, and stops when the last one leaves. Writers in this process
+    call notify() after committing, so their events are delivered without
+    waiting for the next check. Subscribers then read only the rows after
+    their own sequence.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.loop = None
+        self.changed = None  # asyncio.Event, replaced after every wake-up
+        self.waiters = 0
+        self.watcher = None
+
+    def notify(self):
+        """Wake subscribers; safe to call from any thread."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        import asyncio
+
+        if self.changed is not None:
+            self.changed.set()
+            self.changed = asyncio.Event()
+
+    async def _watch(self):
+        import asyncio
+        import mcp_service
+
+        paths, conns, versions = None, [], None
+        try:
+            while self.waiters:
+                if paths != mcp_service.db_shard_paths():
+                    for conn in conns:
+                        conn.close()
+                    paths = mcp_service.db_shard_paths()
+                    conns = [sqlite3.connect(path, check_same_thread=False) for path in paths]
+                    versions = None
+                current = [conn.execute("PRAGMA data_version").fetchone()[0] for conn in conns]
+                if versions is not None and current != versions:
+                    self._wake()
+                versions = current
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            for conn in conns:
+                conn.close()
+            self.watcher = None
+
+    def _subscribe(self, transport: str):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.changed, self.watcher = loop, asyncio.Event(), None
+        self.waiters += 1
+        SUBSCRIBERS.labels(transport).inc()
+        if self.watcher is None:
+            self.watcher = loop.create_task(self._watch())
+
+    def _unsubscribe(self, transport: str):
+        self.waiters -= 1
+        SUBSCRIBERS.labels(transport).dec()
+
+    async def wait(self, after, customer_id: Optional[int] = None,
+                   limit: int = DEFAULT_LIMIT, timeout: float = 25.0) -> tuple[list[dict], object]:
+        """Long-poll: events after cursor `after`, waiting up to `timeout` seconds for the first one."""
+        import asyncio
+
+        deadline = time.monotonic() + timeout
+        self._subscribe('long_poll')
+        try:
+            while True:
+                changed = self.changed
+                events, cursor = await asyncio.to_thread(read_events, after, customer_id, limit)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    EVENTS_DELIVERED.labels('long_poll').inc(len(events))
+                    return events, cursor
+                # Wait on the event captured before the read, so a commit in between is not missed
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._unsubscribe('long_poll')
+
+    async def stream(self, after, customer_id: Optional[int] = None,
+                     heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[Optional[dict]]:
+        """Events after cursor `after` as they are committed; yields None on idle heartbeats."""
+        import asyncio
+
+        self._subscribe('sse')
+        try:
+            while True:
+                changed = self.changed
+                events, after = await asyncio.to_thread(read_events, after, customer_id, MAX_LIMIT)
+                for event in events:
+                    EVENTS_DELIVERED.labels('sse').inc()
+                    yield event
+                if len(events) == MAX_LIMIT:
+                    continue  # catching up: read the next page straight away
+                try:
+                    await asyncio.wait_for(changed.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._unsubscribe('sse')
+
+
+FEED = TicketEventFeed()
+
+
+def notify_ticket_events():
+    """Called by writers in this process after committing a change."""
+    FEED.notify()
+
+
+def format_sse(event: Optional[dict]) -> str:
+    """One server-sent event; its cursor is the event ID, so clients resume with Last-Event-ID."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"id: {event['cursor']}\nevent: {event['event_type']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,221 @@
+"""
+Open Ticket Ranking
+Scores every open ticket for escalation in one vectorized NumPy pass over columnar arrays kept in sync with the ticket_events outbox
+"""
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from admission_control import premium_customer_ids
+
+# Escalation score = priority + age + premium + repeat + keyword terms (see score_tickets)
+PRIORITY_WEIGHTS = {'low': 0.0, 'medium': 1.0, 'high': 3.0}
+AGE_WEIGHT = 1.0            # × log1p(age in days): the first days count most
+PREMIUM_WEIGHT = 2.0
+OPEN_TICKETS_WEIGHT = 1.0   # × log2(open tickets of the customer): 0 for a single ticket
+KEYWORD_WEIGHTS = {'refund': 2.0, 'charged twice': 3.0, 'compromised': 4.0}
+
+MAX_LIMIT = 100
+
+# More changed tickets than this (or than this share of the cached ones) are
+# reloaded in full instead of patched in
+MAX_PATCH_TICKETS = 10_000
+FULL_RELOAD_RATIO = 0.2
+
+PRIORITY_CODES = list(PRIORITY_WEIGHTS)
+
+# Columns of the open tickets, decoded by SQLite so only integers cross into Python:
+# priority as its index in PRIORITY_CODES, created_at as a Unix time, and one
+# bit per KEYWORD_WEIGHTS entry for keywords found in the issue (LIKE is
+# case-insensitive, without building a lowered copy of every issue)
+_KEYWORD_BITS = ' | '.join(
+    f"((issue LIKE '%{keyword}%') << {bit})" for bit, keyword in enumerate(KEYWORD_WEIGHTS)
+)
+_PRIORITY_CASE = ' '.join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(PRIORITY_CODES))
+# unixepoch() (SQLite 3.38+) skips strftime's formatting to text and back
+_CREATED = ("unixepoch(created_at)" if sqlite3.sqlite_version_info >= (3, 38)
+            else "CAST(strftime('%s', created_at) AS INTEGER)")
+OPEN_TICKET_COLUMNS_SQL = f"""
+    SELECT id, customer_id, CASE priority {_PRIORITY_CASE} ELSE 0 END,
+           COALESCE({_CREATED}, 0), {_KEYWORD_BITS}
+    FROM tickets WHERE status = 'open'
+"""
+COLUMNS = ('ids', 'customer_ids', 'priorities', 'created', 'keywords')
+
+
+class OpenTicketColumns:
+    """Open tickets of one database file as parallel int64 arrays.
+
+    The first use loads every open ticket; later refreshes read the
+    ticket_events outbox after the last seen seq and re-read only the
+    tickets that changed, so a ranking costs a scan of the arrays, not of
+    the table. Open ticket counts per customer are recomputed on change.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.arrays = {name: np.empty(0, dtype=np.int64) for name in COLUMNS}
+        self.open_counts = np.empty(0, dtype=np.int64)
+        self.seq = None
+        self.lock = threading.Lock()
+        self.stats = {'full_loads': 0, 'patches': 0, 'last_refresh_ms': 0.0}
+
+    def _set(self, rows: np.ndarray):
+        self.arrays = {name: np.ascontiguousarray(rows[:, i]) for i, name in enumerate(COLUMNS)}
+        _, inverse, counts = np.unique(self.arrays['customer_ids'], return_inverse=True, return_counts=True)
+        self.open_counts = counts[inverse]
+
+    @staticmethod
+    def _rows(cursor, query: str, params=()) -> np.ndarray:
+        rows = cursor.execute(query, params).fetchall()
+        return np.array(rows, dtype=np.int64).reshape(-1, len(COLUMNS))
+
+    def refresh(self):
+        from ticket_events import outbox_connection
+
+        started = time.perf_counter()
+        conn = outbox_connection(self.db_path)
+        conn.row_factory = None  # plain tuples: sqlite3.Row objects double the cost of a full load
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")  # one read snapshot for the outbox position and the rows
+            seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM ticket_events").fetchone()[0]
+            if self.seq is not None and seq == self.seq:
+                return
+            changed = None
+            if self.seq is not None and seq > self.seq:
+                changed = [row[0] for row in cursor.execute(
+                    "SELECT DISTINCT ticket_id FROM ticket_events WHERE seq > ? AND ticket_id IS NOT NULL", (self.seq,)
+                )]
+            if changed is None or len(changed) > min(MAX_PATCH_TICKETS, FULL_RELOAD_RATIO * len(self.arrays['ids'])):
+                # First use, or the outbox was renumbered (resharding, rebuilt database)
+                self._set(self._rows(cursor, OPEN_TICKET_COLUMNS_SQL))
+                self.stats['full_loads'] += 1
+            elif changed:
+                changed_ids = np.array(changed, dtype=np.int64)
+                placeholders = ', '.join('?' * len(changed))
+                fresh = self._rows(cursor, f"{OPEN_TICKET_COLUMNS_SQL} AND id IN ({placeholders})", changed)
+                keep = ~np.isin(self.arrays['ids'], changed_ids)
+                current = np.column_stack([self.arrays[name][keep] for name in COLUMNS])
+                self._set(np.concatenate([current, fresh]))
+                self.stats['patches'] += 1
+            self.seq = seq
+        finally:
+            conn.rollback()
+            conn.close()
+            self.stats['last_refresh_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+
+_columns = {}
+_columns_lock = threading.Lock()
+
+
+def open_ticket_columns(db_path: str) -> OpenTicketColumns:
+    """Column cache of a database file (one per file, kept for the process lifetime); refresh under its lock."""
+    with _columns_lock:
+        columns = _columns.get(db_path)
+        if columns is None:
+            columns = _columns[db_path] = OpenTicketColumns(db_path)
+    return columns
+
+
+def score_tickets(columns: OpenTicketColumns, now: Optional[float] = None,
+                  premium_ids: Optional[set[int]] = None) -> dict[str, np.ndarray]:
+    """Escalation score of every open ticket, with the term each factor contributed."""
+    arrays = columns.arrays
+    now = time.time() if now is None else now
+    premium = np.array(sorted(premium_customer_ids() if premium_ids is None else premium_ids), dtype=np.int64)
+    age_days = np.maximum(now - arrays['created'], 0) / 86400.0
+    keywords = np.zeros(len(age_days))
+    for bit, weight in enumerate(KEYWORD_WEIGHTS.values()):
+        keywords += weight * ((arrays['keywords'] >> bit) & 1)
+
+    factors = {
+        'priority': np.array([PRIORITY_WEIGHTS[name] for name in PRIORITY_CODES])[arrays['priorities']],
+        'age': AGE_WEIGHT * np.log1p(age_days),
+        'premium': PREMIUM_WEIGHT * np.isin(arrays['customer_ids'], premium),
+        'open_tickets': OPEN_TICKETS_WEIGHT * np.log2(np.maximum(columns.open_counts, 1)),
+        'keywords': keywords,
+    }
+    factors['score'] = sum(factors.values())
+    factors['age_days'] = age_days
+    return factors
+
+
+def top_tickets(columns: OpenTicketColumns, limit: int, now: Optional[float] = None) -> list[dict]:
+    """The `limit` highest-scoring open tickets of one file, highest first (ties: oldest ticket first)."""
+    factors = score_tickets(columns, now)
+    scores = factors['score']
+    if not len(scores) or limit <= 0:
+        return []
+    if limit < len(scores):
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.lexsort((columns.arrays['ids'][candidates], -scores[candidates]))]
+    results = []
+    for i in order:
+        keywords = [keyword for bit, keyword in enumerate(KEYWORD_WEIGHTS) if columns.arrays['keywords'][i] >> bit & 1]
+        results.append({
+            'ticket_id': int(columns.arrays['ids'][i]),
+            'customer_id': int(columns.arrays['customer_ids'][i]),
+            'priority': PRIORITY_CODES[columns.arrays['priorities'][i]],
+            'age_days': round(float(factors['age_days'][i]), 2),
+            'premium': bool(factors['premium'][i]),
+            'customer_open_tickets': int(columns.open_counts[i]),
+            'keywords': keywords,
+            'score': round(float(scores[i]), 3),
+            'factors': {name: round(float(factors[name][i]), 3)
+                        for name in ('priority', 'age', 'premium', 'open_tickets', 'keywords')},
+        })
+    return results
+
+
+def _with_issues(db_path: str, tickets: list[dict]) -> list[dict]:
+    """Add the issue text and creation time of a file's top tickets (read by ID, so only K rows)."""
+    if not tickets:
+        return tickets
+    from ticket_events import outbox_connection
+
+    conn = outbox_connection(db_path)
+    try:
+        placeholders = ', '.join('?' * len(tickets))
+        rows = {row[0]: (row[1], row[2]) for row in conn.execute(
+            f"SELECT id, issue, created_at FROM tickets WHERE id IN ({placeholders})",
+            [ticket['ticket_id'] for ticket in tickets],
+        )}
+    finally:
+        conn.close()
+    for ticket in tickets:
+        ticket['issue'], ticket['created_at'] = rows.get(ticket['ticket_id'], (None, None))
+    return tickets
+
+
+def rank(db_paths: tuple, limit: int, run=None) -> list[dict]:
+    """Top `limit` open tickets across database files; `run(paths, fn)` maps fn over them (e.g. sharding.scatter)."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    now = time.time()
+
+    def per_file(path):
+        columns = open_ticket_columns(path)
+        # Scored under the lock: a concurrent refresh replaces the arrays
+        with columns.lock:
+            columns.refresh()
+            tickets = top_tickets(columns, limit, now)
+        return _with_issues(path, tickets)
+
+    results = run(db_paths, per_file) if run else [per_file(path) for path in db_paths]
+    merged = [ticket for tickets in results for ticket in tickets]
+    merged.sort(key=lambda ticket: (-ticket['score'], ticket['ticket_id']))
+    return merged[:limit]
+
+
+def score_formula() -> str:
+    keywords = ', '.join(f"'{keyword}' +{weight:g}" for keyword, weight in KEYWORD_WEIGHTS.items())
+    priorities = ', '.join(f"{name} {weight:g}" for name, weight in PRIORITY_WEIGHTS.items())
+    return (f"priority ({priorities}) + {AGE_WEIGHT:g}×ln(1+age days) + {PREMIUM_WEIGHT:g} if premium "
+            f"+ {OPEN_TICKETS_WEIGHT:g}×log2(customer's open tickets) + keywords ({keywords})")
+
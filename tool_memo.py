@@ -0,0 +1,171 @@
+"""
+Per-Turn Tool Memo
+Serves repeated identical read-tool calls within one user turn from the first result, across the router's sub-agents
+"""
+import contextvars
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from metrics import record_cache_lookup
+
+# A2A metadata key carrying the memo: router → specialist in the request
+# metadata, specialist → router in the final task status (Task.metadata)
+TOOL_MEMO_METADATA_KEY = 'tool_memo'
+
+# Where RemoteA2aAgent keeps the specialist's response on its events (ADK's A2A_METADATA_PREFIX + 'response')
+A2A_RESPONSE_METADATA_KEY = 'a2a:response'
+
+# Read tools whose first argument is the customer ID; other read tools span
+# customers, so any write invalidates them
+PER_CUSTOMER_TOOLS = ('get_customer', 'get_customer_history', 'get_customer_profile')
+
+# Results larger than this are not memoized, and the memo stops growing at
+# MAX_MEMO_BYTES, to keep the metadata small
+MAX_ENTRY_BYTES = 16 * 1024
+MAX_MEMO_BYTES = 64 * 1024
+
+_current: contextvars.ContextVar[Optional['TurnMemo']] = contextvars.ContextVar('tool_memo', default=None)
+
+
+def tool_memo_enabled() -> bool:
+    return os.getenv('TOOL_MEMO', '1').lower() not in ('0', 'false', 'no')
+
+
+def memo_key(name: str, *args) -> str:
+    return json.dumps([name, *args])
+
+
+class TurnMemo:
+    """Read-tool results of one user turn, keyed by tool name and arguments.
+
+    The router forwards its memo to each specialist and takes back the
+    specialist's final memo (the forwarded entries, minus what its writes
+    invalidated, plus what it read), so the next specialist starts from it.
+    """
+
+    def __init__(self, entries: Optional[dict] = None):
+        self.entries = {}
+        self.size = 0
+        self.replace(entries or {})
+
+    def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    def put(self, key: str, result: str):
+        if len(result) > MAX_ENTRY_BYTES or self.size + len(result) > MAX_MEMO_BYTES:
+            return
+        self.size += len(result) - len(self.entries.get(key, ''))
+        self.entries[key] = result
+
+    def invalidate(self, customer_id: int):
+        """Drop the entries a write to `customer_id` may have changed."""
+        for key in list(self.entries):
+            name, *args = json.loads(key)
+            # Models may pass the ID as a string
+            if name not in PER_CUSTOMER_TOOLS or str(args[0]) == str(customer_id):
+                self.size -= len(self.entries.pop(key))
+
+    def replace(self, entries: dict):
+        self.entries = {}
+        self.size = 0
+        for key, result in entries.items():
+            self.put(key, result)
+
+
+def _entries_from(metadata: Optional[dict]) -> Optional[dict]:
+    """Memo entries in A2A metadata, or None when the metadata carries no memo."""
+    entries = (metadata or {}).get(TOOL_MEMO_METADATA_KEY)
+    if not isinstance(entries, dict):
+        return None
+    return {key: value for key, value in entries.items() if isinstance(key, str) and isinstance(value, str)}
+
+
+@contextmanager
+def memo_scope(metadata: Optional[dict]):
+    """Turn scope on an agent: starts from the memo in the request metadata (empty for the router)."""
+    if not tool_memo_enabled():
+        yield None
+        return
+    memo = TurnMemo(_entries_from(metadata))
+    token = _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.reset(token)
+
+
+def memoized_call(name: str, args: tuple, call: Callable[[], str]) -> str:
+    """Result of read tool `name(*args)` from the turn's memo, else from `call()` (then memoized)."""
+    memo = _current.get()
+    if memo is None:
+        return call()
+    key = memo_key(name, *args)
+    result = memo.get(key)
+    record_cache_lookup('tool_memo', result is not None)
+    if result is None:
+        result = call()
+        memo.put(key, result)
+    return result
+
+
+def memo_contains(name: str, *args) -> bool:
+    memo = _current.get()
+    return memo is not None and memo.get(memo_key(name, *args)) is not None
+
+
+def invalidate_memo(customer_id: int):
+    """Drop memoized reads a write to this customer may change."""
+    memo = _current.get()
+    if memo is not None:
+        memo.invalidate(customer_id)
+
+
+def memo_metadata() -> dict:
+    """Request metadata forwarding the turn's memo to a specialist."""
+    memo = _current.get()
+    if memo is None:
+        return {}
+    return {TOOL_MEMO_METADATA_KEY: dict(memo.entries)}
+
+
+def returns_memo(metadata: Optional[dict]) -> bool:
+    """Whether the caller sent a memo and so expects the updated one back."""
+    return _current.get() is not None and _entries_from(metadata) is not None
+
+
+def absorb_remote_memo(callback_context) -> None:
+    """after_agent_callback for RemoteA2aAgent sub-agents: take over the memo the specialist returned."""
+    memo = _current.get()
+    if memo is None:
+        return None
+    for event in reversed(callback_context.session.events):
+        if event.invocation_id != callback_context.invocation_id:
+            break
+        response = (event.custom_metadata or {}).get(A2A_RESPONSE_METADATA_KEY)
+        if event.author != callback_context.agent_name or not response:
+            continue
+        entries = _entries_from(response.get('metadata'))
+        if entries is not None:
+            memo.replace(entries)
+        break
+    return None
+
+
+class MemoEventQueue:
+    """Event queue wrapper adding the turn's memo to the final task status update,
+    which the A2A server merges into the Task returned to the caller.
+    """
+
+    def __init__(self, queue, memo: TurnMemo):
+        self.queue = queue
+        self.memo = memo
+
+    async def enqueue_event(self, event):
+        if getattr(event, 'final', False):
+            event.metadata = {**(event.metadata or {}), TOOL_MEMO_METADATA_KEY: dict(self.memo.entries)}
+        await self.queue.enqueue_event(event)
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
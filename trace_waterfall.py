@@ -0,0 +1,93 @@
+"""
+Trace Waterfall Viewer
+Prints the spans of a traced turn (TRACE_FILE output) as an indented timeline
+"""
+import argparse
+import json
+from collections import defaultdict
+
+BAR_WIDTH = 40
+
+# Root spans opened by this service (a2a-sdk also emits unrelated background-task traces)
+TURN_ROOTS = ('conversation.turn', 'a2a.client send_message', 'a2a.execute ')
+
+
+def load_spans(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def span_label(span: dict) -> str:
+    attributes = span['attributes']
+    label = span['name']
+    if 'db.statement' in attributes:
+        label += f" [{attributes.get('db.rows', '?')} rows] {attributes['db.statement'][:60]}"
+    return label
+
+
+def print_waterfall(spans: list[dict], min_ms: float = 0.0):
+    """Print one trace: each span's offset and duration as a bar under its parent.
+
+    Spans shorter than `min_ms` are hidden together with their children.
+    """
+    children = defaultdict(list)
+    ids = {span['span_id'] for span in spans}
+    roots = []
+    for span in sorted(spans, key=lambda s: s['start_ns']):
+        if span['parent_id'] in ids:
+            children[span['parent_id']].append(span)
+        else:
+            roots.append(span)
+
+    start = min(span['start_ns'] for span in spans)
+    total = max(span['end_ns'] for span in spans) - start or 1
+
+    def visit(span, depth):
+        duration_ms = (span['end_ns'] - span['start_ns']) / 1e6
+        if duration_ms < min_ms:
+            return
+        offset = (span['start_ns'] - start) / total
+        width = (span['end_ns'] - span['start_ns']) / total
+        bar = ' ' * int(offset * BAR_WIDTH) + '█' * max(int(width * BAR_WIDTH), 1)
+        print(f"{bar:<{BAR_WIDTH}} {duration_ms:9.2f}ms  {'  ' * depth}{span_label(span)}  ({span['service']})")
+        for child in children[span['span_id']]:
+            visit(child, depth + 1)
+
+    for root in roots:
+        visit(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('trace_file', help='JSON-lines file written via TRACE_FILE')
+    parser.add_argument('--trace-id', help='Trace to show (default: the slowest)')
+    parser.add_argument('--min-ms', type=float, default=0.0, help='Hide spans shorter than this')
+    parser.add_argument('--list', action='store_true', help='List traces with their root span and duration')
+    parser.add_argument('--all', action='store_true', help='Include traces not rooted at a turn or A2A call')
+    args = parser.parse_args()
+
+    traces = defaultdict(list)
+    for span in load_spans(args.trace_file):
+        traces[span['trace_id']].append(span)
+    if not args.all:
+        traces = {
+            trace_id: spans for trace_id, spans in traces.items()
+            if min(spans, key=lambda s: s['start_ns'])['name'].startswith(TURN_ROOTS)
+        }
+
+    def duration(spans):
+        return max(s['end_ns'] for s in spans) - min(s['start_ns'] for s in spans)
+
+    if args.list:
+        for trace_id, spans in sorted(traces.items(), key=lambda item: -duration(item[1])):
+            root = min(spans, key=lambda s: s['start_ns'])
+            print(f"{trace_id}  {duration(spans) / 1e6:9.2f}ms  {len(spans):4} spans  {root['name']}")
+        return
+
+    trace_id = args.trace_id or max(traces, key=lambda t: duration(traces[t]))
+    print(f"Trace {trace_id}\n")
+    print_waterfall(traces[trace_id], args.min_ms)
+
+
+if __name__ == "__main__":
+    main()
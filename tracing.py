@@ -0,0 +1,288 @@
+"""
+Distributed Tracing
+W3C trace context propagation through A2A request metadata, with file and OTLP span export
+"""
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+# Keys carried in A2A MessageSendParams.metadata
+TRACE_METADATA_KEYS = ('traceparent', 'tracestate')
+
+TRACER_NAME = 'multi_agent_service'
+
+_configured = False
+
+
+def tracing_requested() -> bool:
+    """Whether an exporter is configured via the environment."""
+    return bool(os.getenv('TRACE_FILE') or os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')
+                or os.getenv('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT'))
+
+
+def _active() -> bool:
+    """Spans are created when tracing is configured or OpenTelemetry is already loaded.
+
+    Agent servers always load it (via ADK), so trace context passes through
+    them even without an exporter; CLI clients without tracing never import it.
+    """
+    return _configured or 'opentelemetry.trace' in sys.modules or tracing_requested()
+
+
+@functools.lru_cache(maxsize=None)
+def get_tracer():
+    from opentelemetry import trace
+
+    return trace.get_tracer(TRACER_NAME)
+
+
+class JsonLinesSpanExporter:
+    """SpanExporter appending finished spans to a JSON-lines file (one span per line).
+
+    Several processes may share the file: each batch is written with a
+    single append, so lines do not interleave.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        lines = []
+        for span in spans:
+            parent = span.parent.span_id if span.parent else None
+            lines.append(json.dumps({
+                'trace_id': format(span.context.trace_id, '032x'),
+                'span_id': format(span.context.span_id, '016x'),
+                'parent_id': format(parent, '016x') if parent else None,
+                'name': span.name,
+                'service': span.resource.attributes.get('service.name'),
+                'start_ns': span.start_time,
+                'end_ns': span.end_time,
+                'status': span.status.status_code.name,
+                'attributes': {key: value if isinstance(value, (str, int, float, bool)) else str(value)
+                               for key, value in (span.attributes or {}).items()},
+            }))
+        with self._lock, open(self.path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing(service_name: str) -> bool:
+    """Install a tracer provider if an exporter is configured.
+
+    TRACE_FILE writes spans as JSON lines; OTEL_EXPORTER_OTLP_ENDPOINT (or
+    OTEL_EXPORTER_OTLP_TRACES_ENDPOINT) sends them to an OTLP/HTTP collector.
+    Without either, spans stay no-ops. Returns True if tracing is enabled.
+    """
+    global _configured
+    if _configured:
+        return True
+    if not tracing_requested():
+        return False
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    exporters = []
+    if os.getenv('TRACE_FILE'):
+        exporters.append(JsonLinesSpanExporter(os.environ['TRACE_FILE']))
+    if os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT') or os.getenv('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT'):
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporters.append(OTLPSpanExporter())
+
+    provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+    for exporter in exporters:
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans (call before a short-lived client exits)."""
+    if not _configured:
+        return
+    from opentelemetry import trace
+
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, 'shutdown'):
+        provider.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Current-span context manager; yields None when tracing is inactive."""
+    if not _active():
+        yield None
+        return
+    with get_tracer().start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+# ============================================================================
+# Propagation
+# ============================================================================
+
+def trace_metadata() -> dict[str, str]:
+    """traceparent/tracestate of the current span, for A2A request metadata."""
+    if not _active():
+        return {}
+    from opentelemetry import propagate
+
+    carrier = {}
+    propagate.inject(carrier)
+    return {key: value for key, value in carrier.items() if key in TRACE_METADATA_KEYS}
+
+
+def remote_agent_trace_metadata(ctx, a2a_message) -> dict[str, Any]:
+    """a2a_request_meta_provider for RemoteA2aAgent: continue the trace on the specialist."""
+    return trace_metadata()
+
+
+def extract_context(metadata: Optional[dict]):
+    """OpenTelemetry context from A2A request metadata (or None)."""
+    carrier = {key: metadata[key] for key in TRACE_METADATA_KEYS if metadata and metadata.get(key)}
+    if not carrier:
+        return None
+    from opentelemetry import propagate
+
+    return propagate.extract(carrier)
+
+
+@contextmanager
+def server_span(name: str, metadata: Optional[dict], **attributes):
+    """Span continuing the caller's trace from A2A request metadata."""
+    if not _active():
+        yield None
+        return
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+
+    parent = extract_context(metadata)
+    token = otel_context.attach(parent) if parent is not None else None
+    try:
+        with get_tracer().start_as_current_span(name, kind=trace.SpanKind.SERVER, attributes=attributes) as current:
+            yield current
+    finally:
+        if token is not None:
+            otel_context.detach(token)
+
+
+def traced_tool(func):
+    """Decorator wrapping an MCP tool call in a span."""
+    name = f'mcp.tool {func.__name__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name, **{'mcp.tool': func.__name__}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# ============================================================================
+# SQLite statement spans
+# ============================================================================
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor recording one span per statement, with duration and row count.
+
+    Statements that return rows keep their span open until the rows are
+    fetched (fetchone/fetchall, or iterating to the end), so a slow scan is
+    charged to the query rather than to the tool; a cursor abandoned mid-way
+    finishes on close, on its next execute or when it is collected.
+    Subclasses may define `statement_observer(sql, parameters, seconds, rows)`
+    to receive the same measurements (see query_stats.py).
+    """
+
+    statement_observer = None
+    _pending = None  # (span or None, sql, parameters, started)
+    _iterated = 0  # rows read by iteration since the last execute
+
+    def _finish(self, rows: Optional[int] = None):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        current, sql, parameters, started = pending
+        if rows is None:
+            rows = self._iterated if self.description is not None else max(self.rowcount, 0)
+        if current is not None:
+            current.set_attribute('db.rows', rows)
+            current.end()
+        if self.statement_observer is not None:
+            self.statement_observer(sql, parameters, time.perf_counter() - started, rows)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        current = None
+        if _active():
+            current = get_tracer().start_span('sqlite.query', attributes={
+                'db.system': 'sqlite',
+                'db.statement': ' '.join(sql.split())[:500],
+            })
+        elif self.statement_observer is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception as e:
+            if current is not None:
+                from opentelemetry.trace import Status, StatusCode
+
+                current.set_status(Status(StatusCode.ERROR, str(e)))
+                current.end()
+            raise
+        self._pending = (current, sql, parameters, started)
+        self._iterated = 0
+        if self.description is None:
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._finish(1 if row is not None else 0)
+        return row
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._finish(len(rows))
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._finish()
+            raise
+        self._iterated += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # the connection may already be closed at collection time
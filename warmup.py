@@ -0,0 +1,163 @@
+"""
+Agent Warm-Up and Readiness
+Pre-resolves remote agents, DB and model clients, runs a synthetic request, and gates /readyz on it
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+from starlette.responses import JSONResponse
+
+# Harmless prompt for the synthetic request: exercises routing, sessions and the model
+WARMUP_MESSAGE = "Health check: reply with OK. Do not call any tools."
+
+RETRY_BACKOFF_MAX = 5.0
+
+
+class ReadinessState:
+    """Warm-up progress of one agent server, reported by /healthz and /readyz."""
+
+    def __init__(self, agent_name: str, process_started: float):
+        self.agent_name = agent_name
+        self.process_started = process_started
+        self.status = 'starting'
+        self.attempts = 0
+        self.phases = {}
+        self.last_error: Optional[str] = None
+        self.startup_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def snapshot(self) -> dict:
+        return {
+            'agent': self.agent_name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'startup_seconds': self.startup_seconds,
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            'last_error': self.last_error,
+        }
+
+
+async def _resolve_remote_agents(agent):
+    """Fetch agent cards and build A2A clients for the router's RemoteA2aAgents."""
+    for sub_agent in getattr(agent, 'sub_agents', []):
+        if isinstance(sub_agent, RemoteA2aAgent):
+            await sub_agent._ensure_resolved()
+
+
+async def _open_database():
+    """Open a connection to every shard and touch the main tables so SQLite pages are cached."""
+    from mcp_service import db_shard_paths, get_db_connection
+
+    def touch():
+        for path in db_shard_paths():
+            conn = get_db_connection(path)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM customers")
+                cursor.fetchone()
+                cursor.execute("SELECT COUNT(*) FROM tickets")
+                cursor.fetchone()
+            finally:
+                conn.close()
+
+    await asyncio.to_thread(touch)
+
+
+def _init_model_client(agent):
+    """Resolve the agent's model and construct its API client (no request is sent)."""
+    if not hasattr(agent, 'canonical_model'):
+        return
+    getattr(agent.canonical_model, 'api_client', None)
+
+
+async def _synthetic_request(app, timeout: float):
+    """Send one message/send through the bare A2A app (bypassing admission and metrics)."""
+    payload = {
+        'jsonrpc': '2.0',
+        'id': 'warmup',
+        'method': 'message/send',
+        'params': {'message': {
+            'role': 'user',
+            'messageId': str(uuid.uuid4()),
+            'parts': [{'kind': 'text', 'text': WARMUP_MESSAGE}],
+        }},
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://warmup', timeout=timeout) as client:
+        response = await client.post('/', json=payload)
+    response.raise_for_status()
+    body = response.json()
+    if 'error' in body:
+        raise RuntimeError(f"synthetic request failed: {body['error']}")
+
+
+async def warm_up(agent, app, state: ReadinessState, synthetic_request: bool = True, timeout: float = 120.0):
+    """Run the warm-up phases until they all succeed, then mark the server ready."""
+    phases = [
+        ('remote_agents', lambda: _resolve_remote_agents(agent)),
+        ('database', _open_database),
+        ('model_client', lambda: asyncio.to_thread(_init_model_client, agent)),
+    ]
+    if synthetic_request:
+        phases.append(('synthetic_request', lambda: _synthetic_request(app, timeout)))
+
+    backoff = 0.5
+    while True:
+        state.attempts += 1
+        try:
+            for name, phase in phases:
+                if name in state.phases:
+                    continue
+                started = time.perf_counter()
+                await phase()
+                state.phases[name] = time.perf_counter() - started
+            break
+        except Exception as e:
+            state.last_error = f"{type(e).__name__}: {e}"
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RETRY_BACKOFF_MAX)
+
+    state.startup_seconds = round(time.perf_counter() - state.process_started, 3)
+    state.status = 'ready'
+    phases_text = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in state.phases.items())
+    print(f"✅ {state.agent_name} ready {state.startup_seconds:.2f}s after process start "
+          f"({phases_text}; attempts={state.attempts})")
+
+
+def warmup_lifespan(agent, state: ReadinessState, get_app, **warmup_kwargs):
+    """Starlette lifespan that starts warm-up in the background.
+
+    The server accepts connections (and answers /healthz) immediately;
+    /readyz turns 200 once warm-up has finished.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(warm_up(agent, get_app(), state, **warmup_kwargs))
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    return lifespan
+
+
+def add_health_routes(app, state: ReadinessState):
+    """Register /healthz (liveness) and /readyz (warm-up finished) on a Starlette app."""
+
+    async def healthz(request):
+        return JSONResponse({'status': 'ok', 'agent': state.agent_name})
+
+    async def readyz(request):
+        return JSONResponse(state.snapshot(), status_code=200 if state.ready else 503)
+
+    app.add_route('/healthz', healthz, methods=['GET'])
+    app.add_route('/readyz', readyz, methods=['GET'])